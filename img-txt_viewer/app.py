@@ -16,17 +16,22 @@ More info here: https://github.com/Nenotriple/img-txt_viewer
 #region Imports
 
 
+# Startup timing, installed first so it can time the imports below
+from main.scripts import startup_timer
+startup_timer.install()
+
 # Standard
 import os
 import re
 import sys
-import glob
 import time
+import threading
 import shutil
 import ctypes
-import zipfile
+import multiprocessing
 import webbrowser
 import subprocess
+from functools import cached_property
 
 # tkinter
 from tkinter import ttk, Tk, messagebox, filedialog, StringVar, BooleanVar, IntVar, Frame, PanedWindow, Menu, Label, Text, Event, TclError
@@ -45,30 +50,30 @@ from main.scripts import (
     settings_manager,
     text_controller,
     resize_image,
+    caption_cleaner,
+    dir_watcher,
+    image_prefetcher,
+    media_probe,
+    file_mover,
+    dataset_archiver,
+    batch_cli,
+    file_index,
+    image_probe,
+    tag_index,
+    word_index,
     image_grid,
     edit_panel,
     PyTrominos,
     HelpText,
 )
 
-# Local - Tabbed tools
-from main.scripts import (
-    batch_resize_images,
-    batch_image_edit,
-    batch_tag_edit,
-    find_dupe_file,
-    batch_upscale,
-    batch_rename,
-    CropUI,
-)
-
 # Local - Misc
 from main.scripts import video_frame_extractor
-import main.scripts.video_thumbnail_generator as vtg
 from main.scripts.ThumbnailPanel import ThumbnailPanel
 from main.scripts.Autocomplete import SuggestionHandler
 from main.scripts.OnnxTagger import OnnxTagger as OnnxTagger
-from main.scripts.video_player_widget import VideoPlayerWidget
+
+startup_timer.mark("imports")
 
 
 #endregion
@@ -87,12 +92,17 @@ class ImgTxtViewer:
         self.set_appid()
         self.setup_window()
         self.set_icon()
+        startup_timer.mark("window setup")
         self.initial_class_setup()
         self.define_app_settings()
+        startup_timer.mark("class setup")
         self.create_menu_bar()
         self.create_primary_ui()
+        startup_timer.mark("build ui")
         self.settings_manager.read_settings()
+        startup_timer.mark("read settings")
         self.setup_general_binds()
+        self.root.after_idle(startup_timer.report)
 
 
 #endregion
@@ -103,14 +113,7 @@ class ImgTxtViewer:
         self.about_window = ntk.TextWindow(self.root)
         self.settings_manager = settings_manager.SettingsManager(self, self.root)
         self.stat_calculator = calculate_file_stats.CalculateFileStats(self, self.root)
-        self.batch_resize_images = batch_resize_images.BatchResizeImages()
-        self.batch_rename = batch_rename.BatchRename()
-        self.batch_img_edit = batch_image_edit.BatchImgEdit()
-        self.batch_upscale = batch_upscale.BatchUpscale()
         self.edit_panel = edit_panel.EditPanel(self, self.root)
-        self.batch_tag_edit = batch_tag_edit.BatchTagEdit()
-        self.find_dupe_file = find_dupe_file.FindDupeFile()
-        self.crop_ui = CropUI.CropInterface()
         self.onnx_tagger = OnnxTagger(self)
         self.autocomplete = SuggestionHandler(self)
         self.text_controller = text_controller.TextController(self, self.root)
@@ -138,7 +141,13 @@ class ImgTxtViewer:
 
         # Navigation variables
         self.last_scroll_time = 0
-        self.prev_num_files = 0
+        self.prev_dir_names = frozenset()
+        self.dir_rescan_job_id = None
+        self.dir_watcher = dir_watcher.DirectoryWatcher(self.root, self.on_image_dir_changed)
+        self.file_mover = file_mover.FileMover(self.root, self.on_file_mover_error)
+        self.image_index = file_index.FileIndex(lambda: self.image_files)
+        self.image_probe = image_probe.ImageProbe()
+        self.tag_index = tag_index.TagIndex(lambda: self.text_files)
         self.current_index = 0
 
         # Text tools
@@ -147,6 +156,9 @@ class ImgTxtViewer:
         self.prefix_string_var = StringVar()
         self.append_string_var = StringVar()
         self.custom_highlight_string_var = StringVar()
+        self.word_index = word_index.WordIndex()
+        self.duplicate_highlight_words = set()
+        self.text_clean_cache = {}
 
         # Filter variables
         self.original_image_files = []
@@ -159,6 +171,8 @@ class ImgTxtViewer:
         self.deleted_pairs = []
         self.new_text_files = []
         self.image_info_cache = {}
+        self.image_prefetcher = image_prefetcher.ImagePrefetcher()
+        self.nav_direction = 1
 
         # Misc variables
         self.about_window_open = False
@@ -193,6 +207,8 @@ class ImgTxtViewer:
 
         # Video variables
         self.video_thumb_dict = {}
+        self.media_probe = media_probe.MediaProbe()
+        self.video_probe_generation = 0
 
         # Color Palette
         self.pastel_colors = [
@@ -452,7 +468,7 @@ class ImgTxtViewer:
         self.individual_operations_menu.add_separator()
         self.individual_operations_menu.add_command(label="AutoTag", command=self.text_controller.auto_tag.interrogate_image_tags)
         self.individual_operations_menu.add_separator()
-        self.individual_operations_menu.add_command(label="Extract GIF/Video Frames", command=lambda: video_frame_extractor.extract(self))
+        self.individual_operations_menu.add_command(label="Extract GIF/Video Frames", command=lambda: video_frame_extractor.extract(self, ask_options=True))
 
 
     def enable_menu_options(self):
@@ -618,8 +634,8 @@ class ImgTxtViewer:
         self.primary_display_image.canvas.bind("<Double-1>", lambda event: self.open_image(index=self.current_index, event=event))
         self.primary_display_image.canvas.bind("<Shift-MouseWheel>", self.mousewheel_nav)
         self.primary_display_image.canvas.bind("<Button-3>", self.show_image_context_menu)
-        # Video Player
-        self.video_player = VideoPlayerWidget(master=self.master_image_inner_frame)
+        # Video Player, a placeholder until the first video is shown (see display_mp4_video)
+        self.video_player = ttk.Frame(self.master_image_inner_frame)
         self.video_player.grid(row=1, column=0, sticky="nsew")
         self.video_player.grid_remove()
         # Thumbnail Panel
@@ -858,7 +874,7 @@ class ImgTxtViewer:
         self.text_box.bind("<Button-2>", lambda e: (self.delete_tag_under_mouse(e), self.sync_title_with_content(e)))
         self.text_box.bind("<Button-3>", lambda e: (self.show_text_context_menu(e)))
         # Update the autocomplete suggestion label after every KeyRelease.
-        self.text_box.bind("<KeyRelease>", lambda e: (self.autocomplete.update_suggestions(e), self.sync_title_with_content(e), self.get_text_summary(), self.find_replace_widget.perform_search()))
+        self.text_box.bind("<KeyRelease>", lambda e: (self.autocomplete.update_suggestions(e), self.sync_title_with_content(e), self.get_text_summary(), self.find_replace_widget.perform_search(), self.refresh_duplicate_highlights()))
         # Insert a newline after inserting an autocomplete suggestion when list_mode is active.
         self.text_box.bind('<comma>', self.autocomplete.insert_newline_listmode)
         # Highlight duplicates when selecting text with keyboard or mouse.
@@ -952,7 +968,7 @@ class ImgTxtViewer:
         self.image_context_menu.add_command(label="Resize...", command=self.resize_image)
         self.image_context_menu.add_command(label="Crop...", command=lambda: self.create_crop_ui(show=True, refresh=True))
         self.image_context_menu.add_separator()
-        self.image_context_menu.add_command(label="Extract GIF/Video Frames", state=gif_state, command=lambda: video_frame_extractor.extract(self))
+        self.image_context_menu.add_command(label="Extract GIF/Video Frames", state=gif_state, command=lambda: video_frame_extractor.extract(self, ask_options=True))
         self.image_context_menu.add_command(label="Expand", state=state, command=self.expand_image)
         self.image_context_menu.add_command(label="Rotate", state=state, command=self.rotate_current_image)
         self.image_context_menu.add_command(label="Flip", state=state, command=self.flip_current_image)
@@ -1352,6 +1368,49 @@ class ImgTxtViewer:
                 self.root.unbind(binding)
 
 
+    # Tabbed tools are imported and constructed the first time their tab is opened
+    @cached_property
+    def batch_resize_images(self):
+        from main.scripts import batch_resize_images
+        return batch_resize_images.BatchResizeImages()
+
+
+    @cached_property
+    def batch_rename(self):
+        from main.scripts import batch_rename
+        return batch_rename.BatchRename()
+
+
+    @cached_property
+    def batch_img_edit(self):
+        from main.scripts import batch_image_edit
+        return batch_image_edit.BatchImgEdit()
+
+
+    @cached_property
+    def batch_upscale(self):
+        from main.scripts import batch_upscale
+        return batch_upscale.BatchUpscale()
+
+
+    @cached_property
+    def batch_tag_edit(self):
+        from main.scripts import batch_tag_edit
+        return batch_tag_edit.BatchTagEdit()
+
+
+    @cached_property
+    def find_dupe_file(self):
+        from main.scripts import find_dupe_file
+        return find_dupe_file.FindDupeFile()
+
+
+    @cached_property
+    def crop_ui(self):
+        from main.scripts import CropUI
+        return CropUI.CropInterface()
+
+
     def create_ui_tab(self, ui_component, ui_tab, extra_args=None, show=False, refresh=False):
         app = self
         root = self.root
@@ -1432,24 +1491,14 @@ class ImgTxtViewer:
         selected_text = selected_text.replace(',', '')
         if len(selected_text) < 3:
             return
-        selected_words = selected_text.split()
-        color_dict = {}
-        for word in selected_words:
+        self.word_index.update(self.text_box.get("1.0", "end-1c"))
+        for i, word in enumerate(dict.fromkeys(selected_text.split())):
             if len(word) < 3:
                 continue
-            pattern = re.escape(word)
-            matches = [match for match in re.finditer(pattern, self.text_box.get("1.0", "end"))]
-            if len(matches) > 1:
-                if word not in color_dict and self.pastel_colors:
-                    color = self.pastel_colors.pop(0)
-                    color_dict[word] = color
-                    self.text_box.tag_config(word, background=color_dict[word], foreground="black")
-                for match in matches:
-                    start = match.start()
-                    end = match.end()
-                    start_index = self.text_box.index(f"1.0 + {start}c")
-                    end_index = self.text_box.index(f"1.0 + {end}c")
-                    self.text_box.tag_add(word, start_index, end_index)
+            spans = self.word_index.find(word)
+            if len(spans) > 1:
+                self.text_box.tag_config(word, background=self.pastel_colors[i % len(self.pastel_colors)], foreground="black")
+                self.text_box.tag_add(word, *self.word_index.to_tk_ranges(spans))
 
 
     def toggle_highlight_all_duplicates(self):
@@ -1462,30 +1511,43 @@ class ImgTxtViewer:
 
     def highlight_all_duplicates(self):
         self.text_box.tag_remove("highlight", "1.0", "end")
-        text = self.text_box.get("1.0", "end").strip().replace(',', '')
-        words = text.split()
-        color_dict = {}
-        for word in set(words):
-            if len(word) < 3 or words.count(word) == 1:
-                continue
-            if word not in color_dict and self.pastel_colors:
-                color = self.pastel_colors.pop(0)
-                color_dict[word] = color
-                self.text_box.tag_config(word, background=color_dict[word])
-            start = "1.0"
-            while True:
-                pos = self.text_box.search(word, start, stopindex="end")
-                if not pos:
-                    break
-                end = self.text_box.index(f"{pos} + {len(word)}c")
-                self.text_box.tag_add(word, pos, end)
-                start = end
+        for word in self.duplicate_highlight_words:
+            self.text_box.tag_remove(word, "1.0", "end")
+        self.duplicate_highlight_words = set()
+        self.word_index.update(self.text_box.get("1.0", "end-1c"))
+        for word in self.word_index.duplicates():
+            self._tag_duplicate_word(word)
+
+
+    def refresh_duplicate_highlights(self, event=None):
+        """Re-highlight only the words touched by the last edit while 'Highlight all Duplicates' is active."""
+        if not self.highlight_all_duplicates_var.get():
+            return
+        affected = self.word_index.update(self.text_box.get("1.0", "end-1c"))
+        if affected is None:
+            self.highlight_all_duplicates()
+            return
+        duplicates = self.word_index.duplicates()
+        for word in affected:
+            if word in self.duplicate_highlight_words:
+                self.text_box.tag_remove(word, "1.0", "end")
+                self.duplicate_highlight_words.discard(word)
+            if word in duplicates:
+                self._tag_duplicate_word(word)
+
+
+    def _tag_duplicate_word(self, word):
+        color = self.pastel_colors[len(self.duplicate_highlight_words) % len(self.pastel_colors)]
+        self.text_box.tag_config(word, background=color)
+        self.text_box.tag_add(word, *self.word_index.to_tk_ranges(self.word_index.word_spans(word)))
+        self.duplicate_highlight_words.add(word)
 
 
     def highlight_custom_string(self):
             self.remove_tag()
             if not self.custom_highlight_string_var.get():
                 return
+            self.word_index.update(self.text_box.get("1.0", "end-1c"))
             words = self.custom_highlight_string_var.get().split('+')
             for i, word in enumerate(words):
                 pattern = word.strip()
@@ -1494,18 +1556,12 @@ class ImgTxtViewer:
                 color = f"{self.pastel_colors[i % len(self.pastel_colors)]}"
                 tag_name = f"highlight_{i}"
                 self.text_box.tag_config(tag_name, background=color)
-                if self.highlight_use_regex_var.get():
-                    matches = [match for match in re.finditer(pattern, self.text_box.get("1.0", "end"))]
-                else:
-                    pattern = re.escape(pattern)
-                    matches = [match for match in re.finditer(pattern, self.text_box.get("1.0", "end"))]
-                if matches:
-                    for match in matches:
-                        start = match.start()
-                        end = match.end()
-                        start_index = self.text_box.index(f"1.0 + {start}c")
-                        end_index = self.text_box.index(f"1.0 + {end}c")
-                        self.text_box.tag_add(tag_name, start_index, end_index)
+                try:
+                    spans = self.word_index.find(pattern, regex=self.highlight_use_regex_var.get())
+                except re.error:
+                    continue
+                if spans:
+                    self.text_box.tag_add(tag_name, *self.word_index.to_tk_ranges(spans))
 
 
     def remove_highlight(self, event=None):
@@ -1515,6 +1571,7 @@ class ImgTxtViewer:
 
     def remove_custom_tags(self):
         self.highlight_all_duplicates_var.set(False)
+        self.duplicate_highlight_words = set()
         for tag in self.text_box.tag_names():
             if tag not in ["sel", "highlight"]:
                 self.text_box.tag_remove(tag, "1.0", "end")
@@ -1522,6 +1579,7 @@ class ImgTxtViewer:
 
     def remove_tag(self):
         self.highlight_all_duplicates_var.set(False)
+        self.duplicate_highlight_words = set()
         for tag in self.text_box.tag_names():
             self.text_box.tag_remove(tag, "1.0", "end")
 
@@ -1550,10 +1608,7 @@ class ImgTxtViewer:
 
     def restore_previous_index(self, current_image_path):
         if current_image_path:
-            try:
-                self.current_index = self.image_files.index(current_image_path)
-            except ValueError:
-                self.current_index = 0
+            self.current_index = max(0, self.image_index.index_of(current_image_path))
 
 
     def refresh_file_lists(self):
@@ -1567,13 +1622,37 @@ class ImgTxtViewer:
             self.original_image_files = list(self.image_files)
             self.original_text_files = list(self.text_files)
         self.update_total_image_label()
-        self.prev_num_files = len(files_in_dir)
+        self.prev_dir_names = frozenset(files_in_dir)
+        self.dir_watcher.watch(self.image_dir.get(), files_in_dir)
 
 
     def update_video_thumbnails(self):
         if not self.is_ffmpeg_installed:
             return
-        self.video_thumb_dict = vtg.generate_video_thumbnails(file_paths=self.image_files)
+        # Only probe videos that don't have a thumbnail yet, in the background
+        image_files = set(self.image_files)
+        self.video_thumb_dict = {path: data for path, data in self.video_thumb_dict.items() if path in image_files}
+        new_videos = [path for path in self.image_files if path not in self.video_thumb_dict and path.lower().endswith('.mp4')]
+        self.video_probe_generation += 1
+        if new_videos:
+            self.media_probe.prefetch(new_videos)
+            self.root.after(50, self.poll_video_thumbnails, self.video_probe_generation, new_videos)
+
+
+    def poll_video_thumbnails(self, generation, pending):
+        """Add the videos that finished probing to video_thumb_dict, until none are left."""
+        if generation != self.video_probe_generation:
+            return
+        done = [path for path in pending if not self.media_probe.is_pending(path)]
+        if done:
+            probed = self.media_probe.probe_many(done)
+            self.video_thumb_dict.update({path: data for path, data in probed.items() if data['thumbnail']})
+            # Video cells were drawn with a placeholder, request them again
+            if hasattr(self, 'image_grid'):
+                self.image_grid.refresh_file_list()
+        pending = [path for path in pending if path not in done]
+        if pending:
+            self.root.after(50, self.poll_video_thumbnails, generation, pending)
 
 
     def update_total_image_label(self):
@@ -1582,6 +1661,9 @@ class ImgTxtViewer:
                 self.total_images_label.config(text=f"of {len(self.image_files)}")
             else:
                 self.total_images_label.config(text=f"of {len(self.text_controller.filtered_image_files)}")
+        # Called whenever the file lists change, so the grid's cells follow the new list
+        if hasattr(self, 'image_grid'):
+            self.image_grid.refresh_file_list()
 
 
     def validate_files(self, files_in_dir):
@@ -1626,7 +1708,12 @@ class ImgTxtViewer:
             if file_extension not in ('.gif', '.mp4'):
                 self.video_player.grid_remove()
                 self.primary_display_image.grid(row=1, column=0, sticky="nsew")
-                self.primary_display_image.load_image(self.image_file)
+                try:
+                    self.primary_display_image.set_image(self.image_prefetcher.load(self.image_file))
+                except (OSError, Image.DecompressionBombError):
+                    # Missing, unreadable, truncated or too large, the widget's own loader handles it as before
+                    self.primary_display_image.load_image(self.image_file)
+                self.prefetch_neighbour_images()
                 if self.edit_panel_visible_var.get():
                     self.edit_panel.toggle_edit_panel_widgets("normal")
                 image = self.primary_display_image.get_image(original=False)
@@ -1644,11 +1731,21 @@ class ImgTxtViewer:
             self.check_image_dir()
 
 
+    def prefetch_neighbour_images(self):
+        paths = self.image_prefetcher.neighbours(self.image_files, self.current_index, self.nav_direction)
+        self.image_prefetcher.prefetch(path for path in paths if not path.lower().endswith(('.gif', '.mp4')))
+
+
     def display_mp4_video(self):
         if self.is_image_grid_visible_var.get():
             return
         self.primary_display_image.grid_remove()
-        self.video_player.destroy_player()
+        # tkVideoPlayer and PyAV are slow to import, so they are only loaded once a video is shown
+        from main.scripts.video_player_widget import VideoPlayerWidget
+        if isinstance(self.video_player, VideoPlayerWidget):
+            self.video_player.destroy_player()
+        else:
+            self.video_player.destroy()
         play_image = os.path.join(self.app_root_path, "main", "play.png")
         pause_image = os.path.join(self.app_root_path, "main", "pause.png")
         loading_image = os.path.join(self.app_root_path, "main", "loading.png")
@@ -1719,6 +1816,8 @@ class ImgTxtViewer:
         image_file = image_file if image_file else self.image_file
         if image_file.lower().endswith((".mp4", ".gif")):
             video_data = self.video_thumb_dict.get(image_file)
+            if video_data is None and image_file.lower().endswith('.mp4'):
+                video_data = self.media_probe.probe(image_file)
             original_width = original_height = None
             framerate = None
             total_frames = None
@@ -1726,6 +1825,7 @@ class ImgTxtViewer:
             if video_data:
                 original_width, original_height = video_data.get('resolution', (None, None))
                 framerate = video_data.get('framerate')
+                total_frames = video_data.get('frame_count')
             if image_file.lower().endswith('.gif') and (not original_width or not original_height):
                 try:
                     with Image.open(image_file) as im:
@@ -1748,6 +1848,8 @@ class ImgTxtViewer:
                 gif_extra = ""
                 if image_file.lower().endswith('.gif'):
                     gif_extra = f" | Frames: {total_frames if total_frames is not None else '?'} | Frame Duration: {frame_duration if frame_duration is not None else '?'} ms"
+                elif total_frames:
+                    gif_extra = f" | Frames: {total_frames}"
                 try:
                     if hasattr(self, "video_player") and self.video_player.winfo_ismapped():
                         disp_w = self.video_player.winfo_width()
@@ -1812,13 +1914,13 @@ class ImgTxtViewer:
 
 
     def get_image_info(self, image_file):
-        try:
-            with Image.open(image_file) as image:
-                width, height = image.size
-                color_mode = image.mode
-        except (FileNotFoundError, UnidentifiedImageError):
+        cached_info = self.image_prefetcher.info(image_file)
+        if cached_info is not None:
+            return cached_info
+        header = self.image_probe.get(image_file)
+        if header is None:
             return {"filename": "Image not found", "resolution": "0 x 0", "size": "0 KB", "color_mode": "N/A"}
-        size = os.path.getsize(image_file)
+        width, height, color_mode, size = header.width, header.height, header.mode, header.file_size
         size_kb = size / 1024
         size_str = f"{round(size_kb)} KB" if size_kb < 1024 else f"{round(size_kb / 1024, 2)} MB"
         filename = os.path.basename(image_file)
@@ -1857,8 +1959,10 @@ class ImgTxtViewer:
             self.save_text_file()
         if len(self.image_files) > 0:
             if direction == 'next':
+                self.nav_direction = 1
                 self.current_index = (self.current_index + step) % len(self.image_files)
             elif direction == 'prev':
+                self.nav_direction = -1
                 self.current_index = (self.current_index - step) % len(self.image_files)
             if not silent:
                 self.show_pair()
@@ -1906,24 +2010,46 @@ class ImgTxtViewer:
 
 
     def check_image_dir(self, event=None):
+        """Apply any folder change reported by the directory watcher. Never touches the disk."""
         self.check_working_directory()
-        try:
-            num_files_in_dir = len(os.listdir(self.image_dir.get()))
-        except Exception:
+        self.dir_watcher.apply_pending()
+
+
+    def on_image_dir_changed(self, path, files_in_dir):
+        if os.path.normcase(os.path.normpath(path)) != os.path.normcase(os.path.normpath(self.image_dir.get())):
             return
-        if num_files_in_dir != self.prev_num_files:
-            self.update_image_file_count()
-            self.prev_num_files = num_files_in_dir
+        if self.file_mover.busy:
+            # The listing may predate a queued delete or restore, list the folder again once they've finished
+            if self.dir_rescan_job_id is None:
+                self.dir_rescan_job_id = self.root.after(100, self.rescan_after_file_moves)
+            return
+        # Compare names rather than counts, so renames and a delete plus an add are picked up too
+        if files_in_dir != self.prev_dir_names:
+            self.update_image_file_count(files_in_dir)
+            self.prev_dir_names = frozenset(files_in_dir)
 
 
-    def update_image_file_count(self):
-        extensions = ['.jpg', '.jpeg', '.jpg_large', '.jfif', '.png', '.webp', '.bmp', '.gif']
+    def rescan_after_file_moves(self):
+        if self.file_mover.busy:
+            self.dir_rescan_job_id = self.root.after(100, self.rescan_after_file_moves)
+            return
+        self.dir_rescan_job_id = None
+        self.dir_watcher.rescan()
+
+
+    def update_image_file_count(self, files_in_dir=None):
+        extensions = ('.jpg', '.jpeg', '.jpg_large', '.jfif', '.png', '.webp', '.bmp', '.gif')
         if self.is_ffmpeg_installed:
-            extensions.append('.mp4')
-            self.update_video_thumbnails()
-        self.image_files = [file for ext in extensions for file in glob.glob(f"{self.image_dir.get()}/*{ext}")]
+            extensions += ('.mp4',)
+        if files_in_dir is None:
+            files_in_dir = os.listdir(self.image_dir.get())
+        image_dir = self.image_dir.get()
+        self.image_files = [os.path.join(image_dir, filename) for filename in files_in_dir if filename.lower().endswith(extensions)]
         self.image_files.sort(key=self.get_file_sort_key(), reverse=self.reverse_load_order_var.get())
         self.text_files = [os.path.splitext(file)[0] + '.txt' for file in self.image_files]
+        self.update_video_thumbnails()
+        if self.current_index >= len(self.image_files):
+            self.current_index = max(0, len(self.image_files) - 1)
         self.update_total_image_label()
 
 
@@ -1941,15 +2067,44 @@ class ImgTxtViewer:
 
 
     def get_image_index_by_filename(self, filename):
-        search_name = os.path.basename(filename) if os.path.sep in filename else filename
-        for i, img_path in enumerate(self.image_files):
-            if os.path.basename(img_path) == search_name:
-                return i
-        if os.path.sep in filename and search_name != filename:
-            for i, img_path in enumerate(self.image_files):
-                if os.path.basename(img_path) == search_name:
-                    return i
-        return -1
+        """Index of a full path, or the first file with the same name, in image_files. Returns -1 if not found."""
+        if os.path.dirname(filename):
+            index = self.image_index.index_of(filename)
+            if index != -1:
+                return index
+        return self.image_index.index_of_name(filename)
+
+
+    def add_image_file(self, image_path):
+        """Index of image_path in image_files, inserting a newly written file at its sorted position without listing the folder."""
+        index = self.image_index.index_of(image_path)
+        if index != -1:
+            return index
+        image_dir = os.path.normcase(os.path.normpath(self.image_dir.get()))
+        if os.path.normcase(os.path.dirname(os.path.normpath(image_path))) != image_dir:
+            return -1
+        sort_key = self.get_file_sort_key()
+        reverse = self.reverse_load_order_var.get()
+        new_key = sort_key(os.path.basename(image_path))
+        # Binary search, the sort key may stat the file
+        low, high = 0, len(self.image_files)
+        while low < high:
+            middle = (low + high) // 2
+            key = sort_key(os.path.basename(self.image_files[middle]))
+            if (key > new_key) if reverse else (key <= new_key):
+                low = middle + 1
+            else:
+                high = middle
+        text_path = os.path.join(self.text_dir, os.path.splitext(os.path.basename(image_path))[0] + ".txt")
+        self.image_files.insert(low, image_path)
+        self.image_index.changed(low)
+        self.text_files.insert(low, text_path)
+        if not self.text_controller.filter_is_active:
+            self.original_image_files = list(self.image_files)
+            self.original_text_files = list(self.text_files)
+        self.prev_dir_names |= {os.path.basename(image_path)}
+        self.update_total_image_label()
+        return low
 
 
 #endregion
@@ -2312,7 +2467,8 @@ class ImgTxtViewer:
                 if os.path.exists(txt):
                     shutil.copy2(txt, os.path.join(os.path.dirname(new_filepath), f"{base_filename}_ex.txt"))
                     break
-            self.check_image_dir()
+            # List the folder now, the folder watcher would only pick the new file up on its next tick
+            self.refresh_file_lists()
             index_value = self.get_image_index_by_filename(new_basename)
             if index_value != -1:
                 self.jump_to_image(index_value)
@@ -2542,14 +2698,7 @@ class ImgTxtViewer:
             if not user_confirmation:
                 return
         try:
-            for text_file in self.text_files:
-                if os.path.exists(text_file):
-                    with open(text_file, "r+", encoding="utf-8") as f:
-                        text = f.read().strip()
-                        cleaned_text = self.cleanup_text(text)
-                        f.seek(0)
-                        f.write(cleaned_text)
-                        f.truncate()
+            caption_cleaner.clean_files(self.text_files, list_mode=self.list_mode_var.get(), clean=self.cleaning_text_var.get(), cache=self.text_clean_cache)
             if show_confirmation:
                 messagebox.showinfo("Success", "All text files have been cleaned!")
         except Exception as e:
@@ -2559,36 +2708,12 @@ class ImgTxtViewer:
 
     def cleanup_text(self, text, bypass=False):
         if self.cleaning_text_var.get() or bypass:
-            text = self.remove_duplicate_CSV_captions(text)
-            if self.list_mode_var.get():
-                text = re.sub(r'\.\s', '\n', text)  # Replace period and space with newline
-                text = re.sub(' *\n *', '\n', text)  # Replace spaces around newlines with a single newline
-            else:
-                text = re.sub(r'\.\s', ', ', text)  # Replace period and space with comma and space
-                text = re.sub(' *, *', ',', text)  # Replace spaces around commas with a single comma
-            text = re.sub(' +', ' ', text)  # Replace multiple spaces with a single space
-            text = re.sub(",+", ",", text)  # Replace multiple commas with a single comma
-            text = re.sub(",(?=[^\s])", ", ", text)  # Add a space after a comma if it's not already there
-            text = re.sub(r'\\\\+', r'\\', text)  # Replace multiple backslashes with a single backslash
-            text = re.sub(",+$", "", text)  # Remove trailing commas
-            text = re.sub(" +$", "", text)  # Remove trailing spaces
-            text = text.strip(",")  # Remove leading and trailing commas
-            text = text.strip()  # Remove leading and trailing spaces
+            text = caption_cleaner.clean_caption(text, self.list_mode_var.get())
         return text
 
 
     def remove_duplicate_CSV_captions(self, text: "str"):
-        if self.list_mode_var.get():
-            text = text.split('\n')
-        else:
-            text = text.split(',')
-        text = [item.strip() for item in text]
-        text = list(dict.fromkeys(text))
-        if self.list_mode_var.get():
-            text = '\n'.join(text)
-        else:
-            text = ','.join(text)
-        return text
+        return caption_cleaner.remove_duplicate_captions(text, self.list_mode_var.get())
 
 
 #endregion
@@ -2607,6 +2732,7 @@ class ImgTxtViewer:
                 if file_saved:
                     self.root.title(self.title)
                     self.update_mytags_tab()
+                    self.text_controller.update_caption_index(self.text_files[self.current_index])
                     if highlight:
                         self.save_button.configure(style="Blue+.TButton")
                         self.root.after(120, lambda: self.save_button.configure(style="Blue.TButton"))
@@ -2650,6 +2776,7 @@ class ImgTxtViewer:
     def on_closing(self, event=None):
         try:
             self.settings_manager.save_settings()
+            self.text_controller.close_caption_index()
             self.delete_text_backup()
             self.check_working_directory()
             if os.path.isdir(os.path.join(self.image_dir.get(), 'Trash')):
@@ -2865,22 +2992,54 @@ class ImgTxtViewer:
 
 
     def archive_dataset(self):
-        if not messagebox.askokcancel("Zip Dataset", "This will create an archive of the current folder. Only images, videos, and text files will be archived.\n\nPress OK to set the zip name and output path."):
+        if not messagebox.askokcancel("Zip Dataset", "This will create an archive of the current folder. Only images, videos, and text files will be archived.\n\nPress OK to set the archive name and output path."):
             return
         folder_path = self.image_dir.get()
-        zip_filename = filedialog.asksaveasfilename(defaultextension=".zip", filetypes=[("Zip files", "*.zip")], title="Save As", initialdir=folder_path, initialfile="dataset.zip")
+        filetypes = [("Zip files", "*.zip"), ("Tar files", "*.tar")]
+        if dataset_archiver.zstd_available():
+            filetypes.append(("Zstandard tar files", "*.tar.zst"))
+        zip_filename = filedialog.asksaveasfilename(defaultextension=".zip", filetypes=filetypes, title="Save As", initialdir=folder_path, initialfile="dataset.zip")
         if not zip_filename:
             return
-        allowed_extensions = [".txt", ".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif", ".jfif", ".jpg_large", ".mp4"]
-        file_list = [os.path.join(folder_path, file) for file in os.listdir(folder_path) if any(file.lower().endswith(ext) for ext in allowed_extensions)]
-        num_images = sum(1 for file in file_list if file.lower().endswith(('.jpg', '.jpeg', '.png', '.webp', '.bmp', '.gif', '.jfif', '.jpg_large')))
-        num_videos = sum(1 for file in file_list if file.lower().endswith('.mp4'))
-        num_texts = sum(1 for file in file_list if file.lower().endswith('.txt'))
-        with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_STORED) as zip_file:
-            for file_path in file_list:
-                archive_name = os.path.relpath(file_path, folder_path)
-                zip_file.write(file_path, archive_name)
-        messagebox.showinfo("Success", f"The archive has been successfully zipped!\nNumber of image files: {num_images}\nNumber of video files: {num_videos}\nNumber of text files: {num_texts}")
+        if dataset_archiver.archive_format(zip_filename) == "tar.zst" and not dataset_archiver.zstd_available():
+            messagebox.showerror("Error: app.archive_dataset()", "Zstandard archives need Python 3.14+ or the 'zstandard' package (pip install zstandard).")
+            return
+        update = False
+        compression = "auto"
+        if dataset_archiver.archive_format(zip_filename) == "zip":
+            if os.path.isfile(zip_filename):
+                update = messagebox.askyesnocancel("Update Archive", "The archive already exists.\n\nUpdate it, only adding new and changed files (Yes)\n\nReplace it (No)\n\nor cancel?")
+                if update is None:
+                    return
+            # Zstandard is chosen by saving as .tar.zst
+            compression = ntk.askcombo("Zip Compression", "auto: store media, deflate text\nstore: no compression, fastest\ndeflate: compress every file", values=list(dataset_archiver.COMPRESSION_TYPES), initialvalue="auto", parent=self.root)
+            if compression is None:
+                return
+            if compression not in dataset_archiver.COMPRESSION_TYPES:
+                messagebox.showerror("Error: app.archive_dataset()", f"Unknown compression: {compression}")
+                return
+        file_list = dataset_archiver.collect_dataset_files(folder_path)
+        counts = dataset_archiver.count_file_types(file_list)
+        cancel_event = threading.Event()
+
+        def archive_task(progress_callback):
+            def on_progress(done, total, name):
+                progress_callback(done, f"Archiving {name}", f"{done} of {total}")
+            dataset_archiver.create_archive(folder_path, zip_filename, file_list=file_list, compression=compression, update=update, progress_callback=on_progress, cancel_event=cancel_event)
+            return True
+
+        try:
+            result = ntk.showprogress("Archive Dataset", "Archiving dataset...", archive_task, args=(), max_value=max(1, len(file_list)))
+        except Exception as e:
+            cancel_event.set()
+            messagebox.showerror("Error: app.archive_dataset()", f"An error occurred while archiving the dataset.\n\n{e}")
+            return
+        if result is None:
+            # The progress dialog was cancelled, stop the job and remove its partial output
+            cancel_event.set()
+            return
+        if result:
+            messagebox.showinfo("Success", f"The archive has been successfully zipped!\nNumber of image files: {counts['images']}\nNumber of video files: {counts['videos']}\nNumber of text files: {counts['texts']}")
 
 
     def manually_rename_single_pair(self):
@@ -2916,14 +3075,15 @@ class ImgTxtViewer:
             if text_file:
                 os.rename(text_file, new_text_file)
             self.image_files[self.current_index] = new_image_file
+            self.image_index.changed(self.current_index)
             if text_file:
                 self.text_files[self.current_index] = new_text_file
             messagebox.showinfo("Success", "The pair has been renamed successfully.")
             self.refresh_file_lists()
             self.update_video_thumbnails()
             self.show_pair()
-            new_index = self.image_files.index(new_image_file)
-            self.jump_to_image(new_index)
+            new_index = self.image_index.index_of(new_image_file)
+            self.jump_to_image(max(0, new_index))
         except PermissionError as e:
             messagebox.showerror("Error: app.manually_rename_single_pair()", f"Permission denied while renaming files: {e}")
         except FileNotFoundError as e:
@@ -3028,6 +3188,7 @@ class ImgTxtViewer:
     def delete_trash_folder(self):
         trash_dir = os.path.join(self.image_dir.get(), 'Trash')
         try:
+            self.file_mover.wait()
             if os.path.exists(trash_dir):
                 files_in_trash = os.listdir(trash_dir)
                 is_empty = not files_in_trash
@@ -3059,23 +3220,23 @@ class ImgTxtViewer:
             elif confirm:  # Yes, Trash
                 if index < len(self.image_files):
                     trash_dir = os.path.join(os.path.dirname(self.image_files[index]), "Trash")
+                    trash_created = not os.path.isdir(trash_dir)
                     os.makedirs(trash_dir, exist_ok=True)
-                    deleted_pair = []
-                    for file_list in [self.image_files, self.text_files]:
-                        if os.path.exists(file_list[index]):
-                            trash_file = os.path.join(trash_dir, os.path.basename(file_list[index]))
-                            try:
-                                shutil.move(file_list[index], trash_file)
-                            except FileExistsError:
-                                if not trash_file.endswith("txt"):
-                                    if messagebox.askokcancel("Warning", "The file already exists in the trash. Do you want to overwrite it?"):
-                                        os.remove(trash_file)
-                                        shutil.move(file_list[index], trash_file)
-                                    else:
-                                        return
-                            deleted_pair.append((file_list, index, trash_file))
-                            del file_list[index]
-                    self.deleted_pairs.append(deleted_pair)
+                    moved = []
+                    for file_path in self._pair_paths(index):
+                        if os.path.exists(file_path):
+                            trash_file = os.path.join(trash_dir, os.path.basename(file_path))
+                            replace = False
+                            if os.path.exists(trash_file) and not trash_file.endswith("txt"):
+                                if not messagebox.askokcancel("Warning", "The file already exists in the trash. Do you want to overwrite it?"):
+                                    return
+                                replace = True
+                            moved.append((file_path, trash_file, replace))
+                    # Files are moved on the I/O thread, the lists are updated now so the next pair shows immediately
+                    for file_path, trash_file, replace in moved:
+                        self.file_mover.move(file_path, trash_file, replace=replace)
+                    image_path, _ = self._remove_pair_from_lists(index, [file_path for file_path, _, _ in moved], trash_created)
+                    self.deleted_pairs.append({"image_file": image_path, "moved": [(file_path, trash_file) for file_path, trash_file, _ in moved]})
                     self._nav_after_delete(index)
                     self.undo_state.set("normal")
                     self.editMenu.entryconfig("Undo Delete", state="normal")
@@ -3083,17 +3244,10 @@ class ImgTxtViewer:
                     pass
             else:  # No, Recycle
                 if index < len(self.image_files):
-                    deleted_pair = []
-                    for file_list in [self.image_files, self.text_files]:
-                        if os.path.exists(file_list[index]):
-                            try:
-                                os.remove(file_list[index])
-                            except (PermissionError, IOError) as e:
-                                messagebox.showerror("Error: app.delete_pair()", f"An error occurred while deleting the img-txt pair.\n\n{e}")
-                                return
-                            deleted_pair.append((file_list, index, None))
-                            del file_list[index]
-                    self.deleted_pairs = [pair for pair in self.deleted_pairs if pair != deleted_pair]
+                    removed = [file_path for file_path in self._pair_paths(index) if os.path.exists(file_path)]
+                    for file_path in removed:
+                        self.file_mover.remove(file_path)
+                    self._remove_pair_from_lists(index, removed)
                     self._nav_after_delete(index)
                 else:
                     pass
@@ -3101,6 +3255,25 @@ class ImgTxtViewer:
             messagebox.showerror("Error: app.delete_pair()", f"An error occurred while deleting the img-txt pair.\n\n{e}")
 
 
+    def _pair_paths(self, index):
+        return [self.image_files[index]] + ([self.text_files[index]] if index < len(self.text_files) else [])
+
+
+    def _remove_pair_from_lists(self, index, removed_files, trash_created=False):
+        """Drop the pair at index from the file lists, and keep the folder watcher's listing in step."""
+        image_path = self.image_files.pop(index)
+        self.image_index.changed(index)
+        text_path = self.text_files.pop(index) if index < len(self.text_files) else None
+        self.image_prefetcher.invalidate(image_path)
+        self.prev_dir_names = (self.prev_dir_names - self._image_dir_names(removed_files)) | ({"Trash"} if trash_created else set())
+        return image_path, text_path
+
+
+    def _image_dir_names(self, file_paths):
+        image_dir = os.path.normcase(os.path.normpath(self.image_dir.get()))
+        return {os.path.basename(file_path) for file_path in file_paths if os.path.normcase(os.path.dirname(os.path.normpath(file_path))) == image_dir}
+
+
     def _nav_after_delete(self, index):
         self.update_total_image_label()
         if index >= len(self.image_files):
@@ -3110,27 +3283,38 @@ class ImgTxtViewer:
             self.show_pair()
 
 
+    def on_file_mover_error(self, message):
+        messagebox.showerror("Error: app.delete_pair()", f"An error occurred while moving or deleting files.\n\n{message}")
+        # The lists were updated before the files were moved, so list the folder again to match the disk
+        self.deleted_pairs.clear()
+        self.undo_state.set("disabled")
+        self.editMenu.entryconfig("Undo Delete", state="disabled")
+        self.refresh_file_lists()
+        self.current_index = min(self.current_index, max(0, len(self.image_files) - 1))
+        self.show_pair()
+
+
     def undo_delete_pair(self):
         if not (self.check_if_directory() and self.deleted_pairs):
             return
         try:
             self.check_working_directory()
             deleted_pair = self.deleted_pairs.pop()
-            files_to_restore = [os.path.basename(trash_file) for _, _, trash_file in deleted_pair]
+            files_to_restore = [os.path.basename(trash_file) for _, trash_file in deleted_pair["moved"]]
             if not messagebox.askyesno("Restore Files", "The following files will be restored:\n\n" + "\n".join(files_to_restore) + "\n\nDo you want to proceed?"):
                 self.deleted_pairs.append(deleted_pair)
                 return
-            for file_list, index, trash_file in deleted_pair:
-                original_path = os.path.join(self.image_dir.get(), os.path.basename(trash_file))
-                shutil.move(trash_file, original_path)
-                file_list.insert(index, original_path)
-                if not original_path.endswith('.txt'):
-                    self.check_image_dir()
-                    index_value = self.image_files.index(original_path)
-                    self.jump_to_image(index_value)
-                else:
-                    self.load_text_file(original_path)
-            self.update_total_image_label()
+            # Queued behind the move that trashed them, so waiting here also waits for that
+            futures = [self.file_mover.move(trash_file, original_path) for original_path, trash_file in deleted_pair["moved"]]
+            self.file_mover.wait()
+            if any(future.exception() for future in futures):
+                # wait() already reported it, on_file_mover_error() clears all undo history on purpose, the trash may be partly restored
+                return
+            # The list may have been sorted, filtered or relisted since the delete, so insert at the sorted position
+            index = self.add_image_file(deleted_pair["image_file"])
+            self.prev_dir_names |= self._image_dir_names([original_path for original_path, _ in deleted_pair["moved"]])
+            if index != -1:
+                self.jump_to_image(index)
             if not self.deleted_pairs:
                 self.undo_state.set("disabled")
                 self.editMenu.entryconfig("Undo Delete", state="disabled")
@@ -3271,6 +3455,12 @@ class ImgTxtViewer:
 # --------------------------------------
 # Mainloop
 # --------------------------------------
-root = Tk()
-app = ImgTxtViewer(root)
-root.mainloop()
+if __name__ == "__main__":
+    # Required for process pools in the frozen executable
+    multiprocessing.freeze_support()
+    # Headless batch mode: app.py batch <command> <folder> [options]
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        sys.exit(batch_cli.main(sys.argv[2:]))
+    root = Tk()
+    app = ImgTxtViewer(root)
+    root.mainloop()
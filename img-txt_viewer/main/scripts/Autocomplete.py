@@ -7,7 +7,9 @@ import re
 import sys
 import csv
 import yaml
+import queue
 import pickle
+import threading
 from functools import partial
 from collections import defaultdict
 
@@ -370,7 +372,10 @@ class SuggestionHandler:
     """Manages suggestion display and interaction in the UI."""
     def __init__(self, app: 'Main') -> None:
         self.app: 'Main' = app
-        self.autocomplete: Autocomplete = None  # Will be initialized later
+        self.autocomplete: Optional[Autocomplete] = None  # Loaded in the background, see update_autocomplete_dictionary()
+        self._load_generation: int = 0
+        self._load_queue: "queue.Queue[Tuple[int, Autocomplete]]" = queue.Queue()
+        self._load_poll_job_id: Optional[str] = None
         self.suggestions: List[Tuple[str, Tuple[str, List[str]]]] = []
         self.selected_suggestion_index: int = 0
         self.suggestion_colors: Dict[int, str] = {}
@@ -420,6 +425,9 @@ class SuggestionHandler:
             self.clear_suggestions()
             return
         # Get and process suggestions
+        if self.autocomplete is None:
+            self.clear_suggestions()
+            return
         suggestions: List[Tuple[str, Tuple[str, List[str]]]] = self.autocomplete.get_suggestion(current_word)
         if not suggestions:
             self.clear_suggestions()
@@ -562,7 +570,12 @@ class SuggestionHandler:
 # Suggestion Settings
 # --------------------------------------
     def update_autocomplete_dictionary(self) -> None:
-        """Update tag database based on selected CSV sources."""
+        """
+        Update tag database based on selected CSV sources.
+
+        The CSV files are read on a background thread. The previous database stays
+        in use until the new one is ready, and only the latest request is applied.
+        """
         csv_vars = {
             'danbooru.csv': self.app.csv_danbooru,
             'danbooru_safe.csv': self.app.csv_danbooru_safe,
@@ -572,13 +585,43 @@ class SuggestionHandler:
             }
         self.selected_csv_files = [csv_file for csv_file, var in csv_vars.items() if var.get()]
         include_my_tags: bool = self.app.use_mytags_var.get()
-        if self.selected_csv_files:
-            self.autocomplete = Autocomplete(self.selected_csv_files, include_my_tags=include_my_tags)
-        else:
-            self.autocomplete = Autocomplete("None", include_my_tags=include_my_tags)
+        data_files: Union[str, List[str]] = list(self.selected_csv_files) if self.selected_csv_files else "None"
+        self._load_generation += 1
+        threading.Thread(target=self._load_autocomplete, args=(self._load_generation, data_files, include_my_tags), daemon=True).start()
+        if self._load_poll_job_id is None:
+            self._load_poll_job_id = self.app.root.after(50, self._poll_autocomplete_load)
         self.clear_suggestions()
         self._set_suggestion_color(self.selected_csv_files[0] if self.selected_csv_files else "None")
-        self.set_suggestion_threshold()
+
+
+    def _load_autocomplete(self, generation: int, data_files: Union[str, List[str]], include_my_tags: bool) -> None:
+        """Worker thread: build the Autocomplete database and hand it to the main thread."""
+        try:
+            autocomplete = Autocomplete(data_files, include_my_tags=include_my_tags)
+        except Exception as e:
+            print(f"Error loading autocomplete data: {e}")
+            autocomplete = Autocomplete("None", include_my_tags=False)
+        self._load_queue.put((generation, autocomplete))
+
+
+    def _poll_autocomplete_load(self) -> None:
+        """Swap in the newest loaded database, or check again shortly."""
+        self._load_poll_job_id = None
+        latest: Optional[Autocomplete] = None
+        pending = True
+        try:
+            while True:
+                generation, autocomplete = self._load_queue.get_nowait()
+                if generation == self._load_generation:
+                    latest, pending = autocomplete, False
+        except queue.Empty:
+            pass
+        if latest is not None:
+            self.autocomplete = latest
+            self.autocomplete.max_suggestions = self.app.suggestion_quantity_var.get()
+            self.set_suggestion_threshold()
+        if pending:
+            self._load_poll_job_id = self.app.root.after(50, self._poll_autocomplete_load)
 
 
     def _set_suggestion_color(self, csv_file: str) -> None:
@@ -597,6 +640,8 @@ class SuggestionHandler:
 
     def set_suggestion_quantity(self, suggestion_quantity: int) -> None:
         """Set maximum number of displayed suggestions."""
+        if self.autocomplete is None:
+            return
         self.autocomplete.max_suggestions = suggestion_quantity
         self.update_suggestions(event=None)
 
@@ -609,6 +654,8 @@ class SuggestionHandler:
             "Fast"  : 10,
             "Faster": 0
         }
+        if self.autocomplete is None:
+            return
         self.autocomplete.suggestion_threshold = thresholds.get(self.app.suggestion_threshold_var.get())
 
 
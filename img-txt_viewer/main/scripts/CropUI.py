@@ -3,6 +3,8 @@
 
 # Standard
 import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
 
 # tkinter
 import tkinter as tk
@@ -15,6 +17,8 @@ from PIL import Image, ImageTk, ImageSequence
 
 # Local
 from main.scripts import HelpText
+from main.scripts.image_pyramid import ImagePyramid, load_pyramid, open_preview
+from main.scripts.gif_frames import GifFrames, THUMB_HEIGHT
 
 # Typing
 from typing import TYPE_CHECKING
@@ -1034,28 +1038,60 @@ class ImageCanvas(tk.Canvas):
         super().__init__(frame, cursor="cross")
         self.crop_interface = crop_interface
         self.img_path = None
-        self.original_img = None
         self.original_img_width = 0
         self.original_img_height = 0
+        self.original_img_mode = ""
         self.img_scale_ratio = 1.0
         self.new_size = (0, 0)
         self.x_off = 0
         self.y_off = 0
         self.img_thumb = None
         self.resize_after_id = None
+        # Display levels are decoded and built in the background, a JPEG preview is shown until then
+        self.pyramid = None
+        self.preview_img = None
+        self.pyramid_future = None
+        self.pyramid_generation = 0
+        self.pyramid_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="CropPyramid")
 
         self.bind("<Configure>", self._resize_img)
         self.bind("<Button-3>", lambda _: self.crop_interface.crop_selection.clear_selection())
 
 
-    def _display_img(self, img_path):
+    @property
+    def original_img(self):
+        """The full-resolution image, waiting for the background decode if it hasn't finished."""
+        if self.pyramid is None and self.pyramid_future is not None:
+            try:
+                self.pyramid = self.pyramid_future.result()
+            except Exception:
+                # The decode failed, _poll_pyramid reports it
+                return None
+        return self.pyramid.image if self.pyramid else None
+
+
+    def _display_img(self, img_path, image=None):
+        """Show img_path, or image in its place if given, such as a GIF frame already in memory."""
         self.img_path = img_path
-        if img_path.lower().endswith('.mp4'):
-            self.original_img = Image.new("RGB", (32, 32), "white")
+        self.pyramid_generation += 1
+        self.pyramid = None
+        self.preview_img = None
+        if self.pyramid_future is not None:
+            # Don't decode an image that's no longer shown ahead of the new one
+            self.pyramid_future.cancel()
+            self.pyramid_future = None
+        if image is not None or img_path.lower().endswith('.mp4'):
+            self.pyramid = ImagePyramid(image if image is not None else Image.new("RGB", (32, 32), "white"))
+            self.original_img_width, self.original_img_height = self.pyramid.image.size
+            self.original_img_mode = self.pyramid.image.mode
         else:
+            # Only the header is read here, the pixels are decoded with the pyramid
             with Image.open(img_path) as img:
-                self.original_img = img.copy()
-        self.original_img_width, self.original_img_height = self.original_img.size
+                self.original_img_width, self.original_img_height = img.size
+                self.original_img_mode = img.mode
+            self.preview_img = open_preview(img_path, (self.winfo_width(), self.winfo_height()))
+            self.pyramid_future = self.pyramid_executor.submit(load_pyramid, img_path)
+            self.after(30, self._poll_pyramid, self.pyramid_generation)
         self.img_scale_ratio = 1.0
         self.new_size = (0, 0)
         self.x_off = 0
@@ -1065,6 +1101,30 @@ class ImageCanvas(tk.Canvas):
         self._resize_img(None)
 
 
+    def _poll_pyramid(self, generation):
+        if generation != self.pyramid_generation or self.pyramid_future is None:
+            return
+        if not self.pyramid_future.done():
+            self.after(30, self._poll_pyramid, generation)
+            return
+        try:
+            self.pyramid = self.pyramid_future.result()
+        except Exception as e:
+            # Cleared so original_img doesn't raise the same error again
+            self.pyramid_future = None
+            messagebox.showerror("Error: CropUI.ImageCanvas._poll_pyramid()", f"Failed to load image: {e}")
+            return
+        self.preview_img = None
+        self.refresh_img()
+
+
+    def _display_source(self, size):
+        """The pyramid level to scale from for size, or the preview while the pyramid is built."""
+        if self.pyramid:
+            return self.pyramid.level_for(size)
+        return self.preview_img
+
+
     def _resize_img(self, event=None):
         _ = event
         if not self.img_path:
@@ -1076,21 +1136,25 @@ class ImageCanvas(tk.Canvas):
         if new_size != self.new_size and new_size[0] > 0 and new_size[1] > 0:
             self.img_scale_ratio = ratio
             self.new_size = new_size
-            max_size = max(self.original_img_width, self.original_img_height)
-            if max_size > 768:
-                filter_type = Image.NEAREST
-            elif 480 < max_size <= 768:
-                filter_type = Image.BILINEAR
-            else:
-                filter_type = Image.LANCZOS
-            self.img_resized = self.original_img.resize(self.new_size, filter_type)
-            self.img_thumb = ImageTk.PhotoImage(self.img_resized)
+            source = self._display_source(new_size)
+            if source is not None:
+                # The filter depends on the level being resampled, not the full image
+                max_size = max(source.size)
+                if max_size > 768:
+                    filter_type = Image.NEAREST
+                elif 480 < max_size <= 768:
+                    filter_type = Image.BILINEAR
+                else:
+                    filter_type = Image.LANCZOS
+                self.img_resized = source.resize(self.new_size, filter_type)
+                self.img_thumb = ImageTk.PhotoImage(self.img_resized)
             percent_scale = self.img_scale_ratio * 100
             self.crop_interface.update_imginfo(int(percent_scale))
         self.delete("all")
         self.x_off = (new_width - self.new_size[0]) // 2
         self.y_off = (new_height - self.new_size[1]) // 2
-        self.create_image(self.x_off, self.y_off, anchor="nw", image=self.img_thumb)
+        if self.img_thumb:
+            self.create_image(self.x_off, self.y_off, anchor="nw", image=self.img_thumb)
         if self.resize_after_id:
             self.after_cancel(self.resize_after_id)
         if filter_type != Image.LANCZOS:
@@ -1100,8 +1164,11 @@ class ImageCanvas(tk.Canvas):
     def refresh_img(self):
         if not self.img_path or not all(self.new_size):
             return
+        source = self._display_source(self.new_size)
+        if source is None:
+            return
         try:
-            self.img_resized = self.original_img.resize(self.new_size, Image.LANCZOS)
+            self.img_resized = source.resize(self.new_size, Image.LANCZOS)
             self.img_thumb = ImageTk.PhotoImage(self.img_resized)
             self.delete("all")
             self.create_image(self.x_off, self.y_off, anchor="nw", image=self.img_thumb)
@@ -1127,7 +1194,19 @@ class CropInterface:
         self.current_source_path = None
 
         # Image Variables
-        self.gif_frames = []
+        self.gif_source: 'GifFrames' = None
+        self.gif_frame_index = -1
+
+        # GIF timeline, thumbnails are made in the background for the frames in view
+        self.thumb_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="GifThumbs")
+        self.thumb_queue = queue.Queue()
+        self.thumb_images = {}
+        self.thumb_slot_width = THUMB_HEIGHT
+        self.thumb_generation = 0
+        self.thumb_request_id = 0
+        self.thumb_future = None
+        self.thumb_poll_id = None
+        self.thumb_window_id = None
         self.img_info_cache = {}
         self.selection_aspect = 0
         self.current_index = 0
@@ -1232,10 +1311,9 @@ class CropInterface:
         self.thumb_canvas.grid(row=0, column=0, columnspan=99, sticky="ew")
         thumb_scroll = ttk.Scrollbar(self.thumb_frame, orient="horizontal", command=self.thumb_canvas.xview)
         thumb_scroll.grid(row=1, column=0, columnspan=99, sticky="ew")
-        self.thumb_canvas.configure(xscrollcommand=thumb_scroll.set)
-        self.thumbnail_frame = tk.Frame(self.thumb_canvas)
-        self.thumb_canvas.create_window((0, 0), window=self.thumbnail_frame, anchor='nw')
-        self.thumbnail_frame.bind("<Configure>", lambda _: self.thumb_canvas.configure(scrollregion=self.thumb_canvas.bbox("all")))
+        self.thumb_canvas.configure(xscrollcommand=lambda first, last: (thumb_scroll.set(first, last), self.schedule_thumbnail_window()))
+        self.thumb_canvas.bind("<Button-1>", self.on_thumbnail_click)
+        self.thumb_canvas.bind("<MouseWheel>", lambda event: self.thumb_canvas.xview_scroll(-1 * (event.delta // 120), "units"))
         thumb_scroll.bind("<MouseWheel>", lambda event: self.thumb_canvas.xview_scroll(-1 * (event.delta // 120), "units"))
         self.thumb_timeline = ttk.Scale(self.thumb_frame, from_=0, to=0, orient="horizontal", command=self.thumbnail_timeline_changed)
         self.thumb_timeline.grid(row=2, column=0, sticky="ew", padx=self.padx)
@@ -1652,10 +1730,14 @@ class CropInterface:
                 self.img_stats_label_var.set("No images found in directory")
 
 
-    def display_img(self, img_path, logical_path=None):
-        self.img_canvas._display_img(img_path)
+    def display_img(self, img_path, logical_path=None, image=None):
+        # GIFs are shown a frame at a time, starting from the first
+        open_gif = logical_path is None and image is None and img_path.lower().endswith('.gif')
+        if open_gif:
+            image = self.open_gif_frames(img_path)
+        self.img_canvas._display_img(img_path, image=image)
         self.crop_selection.clear_selection()
-        original_width, original_height = self.img_canvas.original_img.size
+        original_width = self.img_canvas.original_img_width
         displayed_width = self.img_canvas.winfo_width()
         percent_scale = int((displayed_width / original_width) * 100)
         self.update_imginfo(percent_scale)
@@ -1668,14 +1750,13 @@ class CropInterface:
         else:
             self.current_source_path = logical_path
         self.dir_entry_var.set(self.current_source_path)
-        if logical_path is None and self.current_source_path and self.current_source_path.lower().endswith('.gif'):
-            self.extract_gif_frames()
+        if open_gif and self.gif_source:
+            self.display_gif_timeline()
             self.extract_gif_button.config(state="normal")
-            self.highlight_thumbnail(index=0)
-        else:
-            if not (self.current_source_path and self.current_source_path.lower().endswith('.gif')):
-                self.thumb_frame.grid_remove()
-                self.extract_gif_button.config(state="disabled")
+        elif not (self.current_source_path and self.current_source_path.lower().endswith('.gif')):
+            self.close_gif_frames()
+            self.thumb_frame.grid_remove()
+            self.extract_gif_button.config(state="disabled")
 
 
     def show_previous_img(self):
@@ -1807,7 +1888,6 @@ class CropInterface:
 # ----------------------------
     def transform_img(self, mode):
         path = self.img_files[self.current_index]
-        img = self.img_canvas.original_img
         if mode == "flip_x":
             transform = Image.FLIP_LEFT_RIGHT
         elif mode == "flip_y":
@@ -1817,10 +1897,14 @@ class CropInterface:
         else:
             raise ValueError(f"Unsupported transformation mode: {mode}")
         if path.lower().endswith('.gif'):
-            self.process_gif_frames(img, path, lambda frame: frame.transpose(transform))
-        else:
-            transformed_img = img.transpose(transform)
-            transformed_img.save(path)
+            # The canvas only holds the current frame, every frame is read from the file
+            self.close_gif_frames()
+            with Image.open(path) as img:
+                self.process_gif_frames(img, path, lambda frame: frame.transpose(transform))
+            self.display_img(path)
+            return
+        transformed_img = self.img_canvas.original_img.transpose(transform)
+        transformed_img.save(path)
         self.img_canvas._display_img(self.img_canvas.img_path)
         self.crop_selection.clear_selection()
 
@@ -1849,15 +1933,15 @@ class CropInterface:
             messagebox.showerror("Error: CropUI.save_all_gif_frames()", "No GIF file selected.")
             return
         try:
-            frames = self.extract_gif_frames(display=False)
             base_path, _ = os.path.splitext(self.current_source_path)
             folder_path = f"{base_path}_frames"
             os.makedirs(folder_path, exist_ok=True)
-            for i, frame in enumerate(frames):
-                frame = frame.convert("RGBA")
-                frame_path = os.path.join(folder_path, f"frame_{i:04d}.png")
-                frame.save(frame_path)
-            frame_count = len(frames)
+            # Decode and write one frame at a time
+            frame_count = 0
+            with Image.open(self.current_source_path) as img:
+                for i, frame in enumerate(ImageSequence.Iterator(img)):
+                    frame.convert("RGBA").save(os.path.join(folder_path, f"frame_{i:04d}.png"))
+                    frame_count += 1
             final_confirm = messagebox.askokcancel("Extract GIF Frames",
                 f"All {frame_count} frames extracted and saved to:\n{folder_path}\n\n"
                 "Click 'OK' to open the folder."
@@ -1868,97 +1952,152 @@ class CropInterface:
             messagebox.showerror("Error: CropUI.save_all_gif_frames()", f"An error occurred while extracting GIF frames: {e}")
 
 
-    def extract_gif_frames(self, display=True, event=None):
-        _ = event
-        if not self.current_source_path or not self.current_source_path.lower().endswith('.gif'):
-            return []
+    def open_gif_frames(self, path):
+        """Open path for on-demand frame decoding and return its first frame, or None if it can't be read."""
+        self.close_gif_frames()
         try:
-            with Image.open(self.current_source_path) as img:
-                self.gif_frames = [frame.copy().convert("RGBA") for frame in ImageSequence.Iterator(img)]
-                if display:
-                    self.display_gif_thumbnails(self.gif_frames)
-                    self.thumb_time_label_var.set(f"01/{len(self.gif_frames)}")
-                return self.gif_frames
+            self.gif_source = GifFrames(path)
+            self.gif_frame_index = 0
+            return self.gif_source.frame(0)
         except Exception as e:
-            messagebox.showerror("Error: CropUI.extract_gif_frames()", f"An error occurred while extracting frames: {e}")
-            return []
-
-
-    def display_gif_thumbnails(self, frames):
-        def save_and_display_frame(img, index):
-            try:
-                trash_folder = os.path.join(os.path.dirname(self.current_source_path), "Trash")
-                os.makedirs(trash_folder, exist_ok=True)
-                filename = os.path.basename(self.img_files[self.current_index])
-                save_img_path = os.path.join(trash_folder, f"{filename}.png")
-                img.save(save_img_path)
-                self.display_img(save_img_path, logical_path=self.img_files[self.current_index])
-                self.highlight_thumbnail(index)
-                self.thumb_timeline.set(index)
-            except Exception as e:
-                messagebox.showerror("Error: CropUI.display_gif_thumbnails()", f"An error occurred while saving the image: {e}")
-        for widget in self.thumbnail_frame.winfo_children():
-            widget.destroy()
+            self.close_gif_frames()
+            messagebox.showerror("Error: CropUI.open_gif_frames()", f"An error occurred while reading frames: {e}")
+            return None
+
+
+    def close_gif_frames(self):
+        if self.gif_source:
+            self.gif_source.close()
+        self.gif_source = None
+        self.gif_frame_index = -1
+        self.thumb_generation += 1
+        self.thumb_images = {}
+        self.thumb_canvas.delete("all")
+
+
+    def display_gif_timeline(self):
+        """Size the timeline for every frame, thumbnails are only made for the frames scrolled into view."""
+        count = self.gif_source.count
+        self.thumb_slot_width = self.gif_source.thumb_size()[0] + 4
+        self.thumb_images = {}
+        self.thumb_canvas.delete("all")
+        self.thumb_canvas.configure(scrollregion=(0, 0, count * self.thumb_slot_width, THUMB_HEIGHT + 8))
+        self.thumb_canvas.xview_moveto(0)
         self.thumb_frame.grid()
-        self.thumb_timeline.configure(to=len(frames)-1)
+        self.thumb_timeline.configure(to=count - 1)
         self.thumb_timeline.set(0)
-        fixed_height = 64
-        for i, frame in enumerate(frames):
-            thumb = frame.copy()
-            aspect_ratio = thumb.width / thumb.height
-            new_width = int(fixed_height * aspect_ratio)
-            thumb = thumb.resize((new_width, fixed_height), Image.BILINEAR)
-            thumb_img = ImageTk.PhotoImage(thumb)
-            thumb_btn = ttk.Button(self.thumbnail_frame, image=thumb_img, takefocus=False)
-            thumb_btn.image = thumb_img
-            thumb_btn.bind("<Button-1>", lambda _, img=frame, index=i: save_and_display_frame(img, index))
-            thumb_btn.bind("<MouseWheel>", lambda event: self.thumb_canvas.xview_scroll(-1 * (event.delta // 120), "units"))
-            thumb_btn.pack(side='left')
-        if frames:
-            save_and_display_frame(frames[0], 0)
+        self.highlight_thumbnail(0)
+        self.thumb_time_label_var.set(f"{str(1).zfill(len(str(count)))}/{count}")
+        self.schedule_thumbnail_window()
+
+
+    def schedule_thumbnail_window(self):
+        if self.gif_source and self.thumb_window_id is None:
+            self.thumb_window_id = self.root.after_idle(self.update_thumbnail_window)
+
+
+    def update_thumbnail_window(self):
+        """Request thumbnails for the visible frames (and a few either side), and drop the rest."""
+        self.thumb_window_id = None
+        if not self.gif_source:
+            return
+        start, end = self.visible_thumbnail_range()
+        for index in [index for index in self.thumb_images if not start <= index < end]:
+            self.thumb_canvas.delete(f"thumb_{index}")
+            del self.thumb_images[index]
+        missing = [index for index in range(start, end) if index not in self.thumb_images]
+        if not missing:
+            return
+        self.thumb_request_id += 1
+        self.thumb_future = self.thumb_executor.submit(self.make_thumbnails, self.gif_source, self.thumb_generation, self.thumb_request_id, missing)
+        if self.thumb_poll_id is None:
+            self.thumb_poll_id = self.root.after(30, self.poll_thumbnails)
+
+
+    def visible_thumbnail_range(self, margin=4):
+        count = self.gif_source.count
+        first, last = self.thumb_canvas.xview()
+        start = max(0, int(first * count) - margin)
+        end = min(count, int(last * count) + 1 + margin)
+        return start, end
+
+
+    def make_thumbnails(self, source, generation, request_id, indices):
+        # Worker thread, stops once a newer window was requested
+        for index in indices:
+            if request_id != self.thumb_request_id or generation != self.thumb_generation:
+                return
+            self.thumb_queue.put((generation, index, source.thumbnail(index)))
+
+
+    def poll_thumbnails(self):
+        self.thumb_poll_id = None
+        if not self.gif_source:
+            return
+        start, end = self.visible_thumbnail_range()
+        try:
+            while True:
+                generation, index, thumb = self.thumb_queue.get_nowait()
+                if generation != self.thumb_generation or index in self.thumb_images or not start <= index < end:
+                    continue
+                self.thumb_images[index] = ImageTk.PhotoImage(thumb)
+                self.thumb_canvas.create_image(index * self.thumb_slot_width + 2, 4, anchor="nw", image=self.thumb_images[index], tags=("thumb", f"thumb_{index}"))
+        except queue.Empty:
+            pass
+        self.thumb_canvas.tag_raise("highlight")
+        if (self.thumb_future and not self.thumb_future.done()) or not self.thumb_queue.empty():
+            self.thumb_poll_id = self.root.after(30, self.poll_thumbnails)
+
+
+    def on_thumbnail_click(self, event):
+        if not self.gif_source:
+            return
+        index = int(self.thumb_canvas.canvasx(event.x) // self.thumb_slot_width)
+        if 0 <= index < self.gif_source.count:
+            self.show_gif_frame(index)
+            self.thumb_timeline.set(index)
+
+
+    def show_gif_frame(self, index):
+        """Hand frame index straight to the canvas, it is decoded on demand."""
+        if not self.gif_source or index == self.gif_frame_index:
+            return
+        gif_path = self.gif_source.path
+        self.display_img(gif_path, logical_path=gif_path, image=self.gif_source.frame(index))
+        self.gif_frame_index = index
+        self.highlight_thumbnail(index)
+        self.ensure_thumbnail_visible(index)
+        count = self.gif_source.count
+        padded_index = str(index + 1).zfill(len(str(count)))
+        self.thumb_time_label_var.set(f"{padded_index}/{count}")
 
 
     def highlight_thumbnail(self, index):
-        for i, widget in enumerate(self.thumbnail_frame.winfo_children()):
-            widget.config(style="TButton")
-            if i == index:
-                widget.config(style="Highlighted.TButton")
+        self.thumb_canvas.delete("highlight")
+        x = index * self.thumb_slot_width
+        self.thumb_canvas.create_rectangle(x + 1, 3, x + self.thumb_slot_width - 1, THUMB_HEIGHT + 5, outline="#005dd7", width=2, tags="highlight")
 
 
     def thumbnail_timeline_changed(self, event=None):
-        _ = event
-        if not self.gif_frames:
+        if not self.gif_source:
             return
         try:
-            index = int(float(self.thumb_timeline.get()))
-            frame = self.gif_frames[index]
-            trash_folder = os.path.join(os.path.dirname(self.current_source_path), "Trash")
-            os.makedirs(trash_folder, exist_ok=True)
-            filename = os.path.basename(self.img_files[self.current_index])
-            save_img_path = os.path.join(trash_folder, f"{filename}.png")
-            frame.save(save_img_path)
-            self.display_img(save_img_path, logical_path=self.img_files[self.current_index])
-            self.highlight_thumbnail(index)
-            self.ensure_thumbnail_visible(index)
-            padded_index = str(index + 1).zfill(len(str(len(self.gif_frames))))
-            self.thumb_time_label_var.set(f"{padded_index}/{len(self.gif_frames)}")
-        except (ValueError, IndexError) as e:
+            self.show_gif_frame(int(float(self.thumb_timeline.get())))
+        except (ValueError, IndexError, EOFError) as e:
             messagebox.showerror("Error: CropUI.thumbnail_timeline_changed()", f"An error occurred while changing the frame: {e}")
 
 
     def ensure_thumbnail_visible(self, index):
-        thumbnail_widgets = self.thumbnail_frame.winfo_children()
-        if index < 0 or index >= len(thumbnail_widgets):
+        if not self.gif_source:
             return
-        widget = thumbnail_widgets[index]
-        widget_x = widget.winfo_x()
-        widget_width = widget.winfo_width()
+        total_width = self.gif_source.count * self.thumb_slot_width
+        widget_x = index * self.thumb_slot_width
         canvas_x = self.thumb_canvas.canvasx(0)
         canvas_width = self.thumb_canvas.winfo_width()
         if widget_x < canvas_x:
-            self.thumb_canvas.xview_moveto(widget_x / self.thumb_canvas.bbox("all")[2])
-        elif widget_x + widget_width > canvas_x + canvas_width:
-            self.thumb_canvas.xview_moveto((widget_x + widget_width - canvas_width) / self.thumb_canvas.bbox("all")[2])
+            self.thumb_canvas.xview_moveto(widget_x / total_width)
+        elif widget_x + self.thumb_slot_width > canvas_x + canvas_width:
+            self.thumb_canvas.xview_moveto((widget_x + self.thumb_slot_width - canvas_width) / total_width)
 
 
 # ----------------------------
@@ -1974,9 +2113,8 @@ class CropInterface:
 
 
     def get_img_info(self, img_file):
-        img = self.img_canvas.original_img
-        width, height = img.size
-        color_mode = img.mode
+        width, height = self.img_canvas.original_img_width, self.img_canvas.original_img_height
+        color_mode = self.img_canvas.original_img_mode
         size = os.path.getsize(img_file)
         size_kb = size / 1024
         size_str = f"{round(size_kb)} KB" if size_kb < 1024 else f"{round(size_kb / 1024, 2)} MB"
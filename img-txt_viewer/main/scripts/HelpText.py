@@ -457,7 +457,9 @@ Rename files in bulk using presets and options. Select files, choose a preset, a
 - **Naming Conflicts**: If a target filename already exists, the selected duplicate handling option is applied.
     - For *Rename*, a unique suffix (_1, _2, etc.) is added.
     - Run the tool multiple times to resolve conflicts if needed.
-- **No undo:** This operation cannot be undone. Back up important files before renaming.
+- **Pairs**: With *Respect img-txt pairs* enabled, an image and its text file are always renamed together, even if only one of them is selected.
+- **Safe renaming**: Files are renamed all at once through temporary names, so renumbering (for example *00002* to *00001*) never collides. If a rename fails, every file is returned to its original name. If the app closes mid-rename, you are offered to restore the files the next time the folder is opened.
+- **Undo**: *Actions > Undo Last Rename* returns the files to their previous names. Overwritten files can't be restored.
 
 ## Hotkeys
 
@@ -857,6 +859,8 @@ Use this tool to show only image-text pairs whose caption text matches the filte
     - Use **Clear And Reset Filter** to restore the full image list.
 - Use **Show Empty Text Files Only** (menu) to list images with empty or missing captions.
 - Filtering searches caption text only; image or text filenames are not searched.
+- The count beside the filter shows how many pairs match as you type.
+    - Captions are kept in an index on disk, so only text files changed since the last filter are read again.
 """
 
 
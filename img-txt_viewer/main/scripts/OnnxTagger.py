@@ -11,7 +11,6 @@ from tkinter import BooleanVar, messagebox
 # Third-Party
 import numpy
 from PIL import Image as PILImage
-from onnxruntime import InferenceSession
 
 # Typing
 from typing import TYPE_CHECKING
@@ -23,11 +22,26 @@ if TYPE_CHECKING:
 #region OnnxTagger
 
 
+class _Option:
+    """A setting with the get() and set() of a tkinter variable, for tagging without a Tk root."""
+    def __init__(self, value=None):
+        self._value = value
+
+
+    def get(self):
+        return self._value
+
+
+    def set(self, value):
+        self._value = value
+
+
 class OnnxTagger:
     """This module contains the OnnxTagger class, which is responsible for loading an ONNX vision model and tagging images."""
-    def __init__(self, app: 'Main'):
-        # app class
+    def __init__(self, app: 'Main' = None):
+        # app class, None when tagging from the command line
         self.app = app
+        option = BooleanVar if app is not None else _Option
 
         # Model related variables
         self.model = None
@@ -49,8 +63,8 @@ class OnnxTagger:
         self.keep_tags = []
         self.exclude_tags = []
         self.exclude_tags_set = set()
-        self.keep_underscore = BooleanVar(value=False)
-        self.keep_escape_character = BooleanVar(value=True)
+        self.keep_underscore = option(value=False)
+        self.keep_escape_character = option(value=True)
         self.sort = True
         self.reverse = True
 
@@ -69,6 +83,8 @@ class OnnxTagger:
 
     def _load_model(self):
         if self.model_path != self.last_model_path:
+            # onnxruntime is slow to import, so it is only loaded with the first model
+            from onnxruntime import InferenceSession
             self.model = InferenceSession(self.model_path, providers=['DmlExecutionProvider', 'CPUExecutionProvider'])
             self.model_input = self.model.get_inputs()[0]
             self.model_input_height = self.model_input.shape[1]
@@ -184,25 +200,28 @@ class OnnxTagger:
                 - tag_list (list): A list of tags generated from the image.
                 - tag_dict (dict): A dictionary mapping tags to their confidence scores and categories.
         """
-        self.model_path = model_path
         try:
-            self._load_model()
-            # Check if image_path is already a PIL Image object
-            if isinstance(image_path, PILImage.Image):
-                image = image_path
-                inferred_tags = self._process_tags(image)
-            else:
-                # Handle as a file path (string)
-                with PILImage.open(image_path) as image:
-                    inferred_tags = self._process_tags(image)
+            return self.infer_tags(image_path, model_path)
         except FileNotFoundError as e:
             messagebox.showerror("Error: OnnxTagger.tag_image()", f"The file specified by {image_path} does not exist.\n\n{e}")
             return
         except Exception as e:
             messagebox.showerror("Error: OnnxTagger.tag_image()", f"An error occurred while processing the image: {e}")
             return
-        tag_list, tag_dict = self._format_results(inferred_tags)
-        return tag_list, tag_dict
+
+
+    def infer_tags(self, image_path, model_path):
+        """Same as tag_image(), but errors are raised instead of shown."""
+        self.model_path = model_path
+        self._load_model()
+        # Check if image_path is already a PIL Image object
+        if isinstance(image_path, PILImage.Image):
+            inferred_tags = self._process_tags(image_path)
+        else:
+            # Handle as a file path (string)
+            with PILImage.open(image_path) as image:
+                inferred_tags = self._process_tags(image)
+        return self._format_results(inferred_tags)
 
 
 #endregion
@@ -218,22 +218,15 @@ class ThumbnailPanel(Frame):
 
     def _get_video_pil_thumbnail(self, image_file, thumbnail_width):
         """Generate video thumbnail in background thread.
-        - Thread-safe: May need to call main thread for video thumbnail generation.
+        - Thread-safe: Reads the shared media probe, which waits for a probe that is still running.
         """
         # Check if thumbnail exists in video_thumb_dict
-        if hasattr(self.app, 'video_thumb_dict') and image_file in self.app.video_thumb_dict:
-            img = self.app.video_thumb_dict[image_file]['thumbnail'].copy()
-        else:
-            # Generate video thumbnail - this may need main thread access
-            # Schedule on main thread if not already there
-            if threading.get_ident() != self._main_thread_id:
-                # Can't safely generate video thumbnail from background thread
-                return None
-            self.app.update_video_thumbnails()
-            if hasattr(self.app, 'video_thumb_dict') and image_file in self.app.video_thumb_dict:
-                img = self.app.video_thumb_dict[image_file]['thumbnail'].copy()
-            else:
-                return None
+        video_data = getattr(self.app, 'video_thumb_dict', {}).get(image_file)
+        if video_data is None:
+            video_data = self.app.media_probe.probe(image_file)
+        if not video_data or video_data['thumbnail'] is None:
+            return None
+        img = video_data['thumbnail'].copy()
         img.thumbnail((thumbnail_width, thumbnail_width), self.app.quality_filter)
         img = img.convert("RGBA") if img.mode != "RGBA" else img
         padded_img = ImageOps.pad(img, (thumbnail_width, thumbnail_width), color=(0, 0, 0, 0))
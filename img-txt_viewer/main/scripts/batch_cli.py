@@ -0,0 +1,499 @@
+"""
+Headless batch mode, runs the batch tools on a folder without opening a window.
+
+    python app.py batch <command> <folder> [options]
+    python -m main.scripts.batch_cli <command> <folder> [options]
+
+Commands:
+    resize      Resize or convert images, as Batch Resize.
+    tag         Auto-Tag images with an ONNX model and write the tags to their text files.
+    edit-tags   List, delete or replace tags across the text files, as Batch Tag Edit.
+    dedupe      Find files with identical contents, as Find Duplicates.
+    stats       Dataset statistics, as the Stats tab.
+    archive     Archive the dataset to .zip, .tar or .tar.zst, as Archive Dataset.
+    filter      List the pairs whose captions match a Filter tab string.
+
+With --json, one JSON object per line is printed to stdout: "progress" while the
+command runs, "error" for each file that failed and a final "result". Otherwise
+progress and errors go to stderr and the result to stdout.
+
+Exit codes: 0 done, 1 done but some files failed, 2 invalid arguments,
+3 the command failed, 130 interrupted.
+"""
+
+
+#region Imports
+
+
+# Standard
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Typing
+from typing import Callable, List, Optional, Tuple
+
+
+#endregion
+#region Constants
+
+
+EXIT_OK = 0
+EXIT_FILE_ERRORS = 1
+EXIT_USAGE = 2
+EXIT_FAILED = 3
+EXIT_INTERRUPTED = 130
+
+# Seconds between progress reports
+PROGRESS_INTERVAL = 0.5
+
+# Same media the app lists
+MEDIA_EXTENSIONS = ('.jpg', '.jpeg', '.jpg_large', '.jfif', '.png', '.webp', '.bmp', '.gif', '.mp4')
+
+
+def _app_path() -> str:
+    # Where settings and caches are kept, the same folder as ImgTxtViewer.get_direct_app_path()
+    if getattr(sys, 'frozen', False):
+        return os.getcwd()
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+#endregion
+#region Reporter
+
+
+class Reporter:
+    """Progress, errors and the result of a command, as text or as JSON lines. Safe to call from workers."""
+    def __init__(self, command: str, json_output: bool = False, quiet: bool = False) -> None:
+        self.command = command
+        self.json_output = json_output
+        self.quiet = quiet
+        self.errors = 0
+        self._start = time.perf_counter()
+        self._last_progress = 0.0
+        self._lock = threading.Lock()
+
+
+    def progress(self, done: int, total: int) -> None:
+        now = time.perf_counter()
+        if self.quiet or (done < total and now - self._last_progress < PROGRESS_INTERVAL):
+            return
+        self._last_progress = now
+        rate = done / max(now - self._start, 1e-6)
+        if self.json_output:
+            self._emit({"event": "progress", "command": self.command, "done": done, "total": total, "rate": round(rate, 2)})
+        else:
+            self._write(sys.stderr, f"{self.command}: {done}/{total} ({rate:,.1f}/s)")
+
+
+    def error(self, path: str, message: str) -> None:
+        with self._lock:
+            self.errors += 1
+        if self.json_output:
+            self._emit({"event": "error", "command": self.command, "path": path, "message": message})
+        else:
+            self._write(sys.stderr, f"{self.command}: error: {path}: {message}")
+
+
+    def result(self, text: Optional[str] = None, **fields) -> None:
+        """The command's outcome. text is printed instead of the fields without --json."""
+        fields["errors"] = self.errors
+        fields["seconds"] = round(time.perf_counter() - self._start, 3)
+        if self.json_output:
+            self._emit({"event": "result", "command": self.command, **fields})
+        elif text is not None:
+            self._write(sys.stdout, text)
+        else:
+            self._write(sys.stdout, "\n".join(f"{key}: {value}" for key, value in fields.items()))
+
+
+    def _emit(self, event: dict) -> None:
+        self._write(sys.stdout, json.dumps(event, ensure_ascii=False, default=str))
+
+
+    def _write(self, stream, line: str) -> None:
+        with self._lock:
+            stream.write(line + "\n")
+            stream.flush()
+
+
+#endregion
+#region Helpers
+
+
+def list_pairs(folder: str) -> Tuple[List[str], List[str]]:
+    """(media files, text files) of a folder, paired the way the app pairs them."""
+    names = sorted((name for name in os.listdir(folder) if name.lower().endswith(MEDIA_EXTENSIONS)), key=str.lower)
+    image_files = [os.path.join(folder, name) for name in names]
+    text_files = [os.path.splitext(path)[0] + ".txt" for path in image_files]
+    return image_files, text_files
+
+
+def read_text(path: str) -> str:
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return file.read()
+    except FileNotFoundError:
+        return ""
+
+
+def split_list(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in value.split(',') if item.strip()] if value else []
+
+
+def prefetch(items: List, load: Callable, max_workers: int):
+    """Yield (item, load(item) or the exception it raised) in order, loading up to max_workers ahead."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        items = iter(items)
+
+        def submit_next():
+            for item in items:
+                pending.append((item, executor.submit(_call, load, item)))
+                return
+
+        for _ in range(max_workers * 2):
+            submit_next()
+        while pending:
+            item, future = pending.popleft()
+            submit_next()
+            yield item, future.result()
+
+
+def _call(function: Callable, item):
+    try:
+        return function(item)
+    except Exception as e:
+        return e
+
+
+def _default_workers() -> int:
+    return min(8, os.cpu_count() or 1)
+
+
+#endregion
+#region Commands
+
+
+def run_resize(args: argparse.Namespace, reporter: Reporter) -> None:
+    from main.scripts import batch_resize_images as engine
+    output_folder = args.folder if args.in_place else (args.output or os.path.join(args.folder, "Resize Output"))
+    os.makedirs(output_folder, exist_ok=True)
+    filenames = sorted((name for name in os.listdir(args.folder) if name.lower().endswith(engine.SUPPORTED_FILETYPES)), key=str.lower)
+    # Output names are chosen up front, so workers never race for the same "_#" name
+    reserved = set()
+    jobs = [(name, engine.output_path_for(output_folder, name, args.filetype, args.overwrite, reserved)) for name in filenames]
+    resize_mode = None if args.convert_only else args.mode
+
+    def resize(job):
+        name, dest_path = job
+        engine.resize_file(os.path.join(args.folder, name), dest_path, resize_mode, args.width, args.height, args.condition, args.quality)
+
+    done = 0
+    saved = []
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        for (name, dest_path), error in zip(jobs, executor.map(lambda job: _call(resize, job), jobs)):
+            done += 1
+            if isinstance(error, Exception):
+                reporter.error(os.path.join(args.folder, name), str(error))
+            else:
+                saved.append(dest_path)
+            reporter.progress(done, len(jobs))
+    reporter.result(processed=len(saved), total=len(jobs), output=output_folder)
+
+
+def run_tag(args: argparse.Namespace, reporter: Reporter) -> None:
+    from PIL import Image
+    from main.scripts.OnnxTagger import OnnxTagger
+    from main.scripts.text_controller_auto_tag import merge_tags
+    model_path = resolve_model(args.model)
+    tagger = OnnxTagger()
+    tagger.general_threshold = args.general_threshold
+    tagger.character_threshold = args.character_threshold
+    tagger.keep_underscore.set(args.keep_underscore)
+    tagger.keep_escape_character.set(not args.no_escape)
+    tagger.keep_tags = split_list(args.keep)
+    replace_tags, replace_with = split_list(args.replace), split_list(args.replace_with)
+    tagger.replace_tag_dict = dict(zip(replace_tags, replace_with))
+    excluded = [tag.replace(' ', '_') for tag in split_list(args.exclude)]
+    image_files, text_files = list_pairs(args.folder)
+    # Videos need the app's frame grabber, only images are tagged
+    pairs = [(image, text) for image, text in zip(image_files, text_files) if not image.lower().endswith('.mp4')]
+
+    def load(pair):
+        with Image.open(pair[0]) as img:
+            img.load()
+            return img.copy()
+
+    tagged = 0
+    for index, (pair, image) in enumerate(prefetch(pairs, load, args.workers), start=1):
+        image_path, text_path = pair
+        try:
+            if isinstance(image, Exception):
+                raise image
+            current_text = read_text(text_path).strip()
+            tagger.exclude_tags = excluded + ([tag.replace(' ', '_') for tag in split_list(current_text)] if args.auto_exclude else [])
+            tag_list, _ = tagger.infer_tags(image, model_path)
+            new_text = merge_tags(current_text, tag_list[:args.max_tags], args.mode).strip(', ')
+            with open(text_path, "w", encoding="utf-8") as file:
+                file.write(new_text)
+            tagged += 1
+        except Exception as e:
+            reporter.error(image_path, str(e))
+        reporter.progress(index, len(pairs))
+    reporter.result(tagged=tagged, total=len(pairs), model=model_path)
+
+
+def resolve_model(model: str) -> str:
+    """A model.onnx path from a file, a folder holding one, or a model folder name under models/onnx_models."""
+    from main.scripts.text_controller_auto_tag import find_onnx_models
+    if os.path.isfile(model):
+        return model
+    if os.path.isfile(os.path.join(model, "model.onnx")):
+        return os.path.join(model, "model.onnx")
+    models = find_onnx_models(os.path.join(_app_path(), "models", "onnx_models"))
+    if model in models:
+        return models[model]
+    raise ValueError(f"Model not found: {model}. Installed models: {', '.join(models) or 'none'}")
+
+
+def run_edit_tags(args: argparse.Namespace, reporter: Reporter) -> None:
+    from main.scripts import TagEditor
+    _, text_files = list_pairs(args.folder)
+    text_files = [path for path in text_files if os.path.exists(path)]
+    if args.delete:
+        TagEditor.edit_tags(text_files, args.delete, delete=True)
+    elif args.replace:
+        TagEditor.edit_tags(text_files, [args.replace[0]], edit=args.replace[1])
+    reporter.progress(len(text_files), len(text_files))
+    tags = TagEditor.extract_tags_from_files(text_files)
+    counts = sorted(((tag, len(positions)) for tag, positions in tags.items()), key=lambda item: (-item[1], item[0].lower()))
+    text = "\n".join(f"{count:03}x, {tag}" for tag, count in counts)
+    reporter.result(text=text, files=len(text_files), unique_tags=len(counts), tags=dict(counts))
+
+
+def run_dedupe(args: argparse.Namespace, reporter: Reporter) -> None:
+    from main.scripts import find_dupe_file as engine
+    folders = [args.folder]
+    if args.recursive:
+        folders = [root for root, dirs, files in os.walk(args.folder) if engine.DUPLICATES_FOLDER not in root.split(os.sep)]
+    found = []
+    moved = 0
+    for folder in folders:
+        paths = []
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if not entry.is_file() or entry.name.startswith('.'):
+                    continue
+                if args.all_files or entry.name.lower().endswith(engine.SUPPORTED_FILETYPES):
+                    paths.append(entry.path)
+        paths.sort(key=str.lower)
+        # Like the app, files are compared within their own folder
+        duplicates, errors = engine.find_duplicate_files(paths, args.hash, args.workers, reporter.progress)
+        for path, message in errors:
+            reporter.error(path, message)
+        for duplicate, original in duplicates:
+            found.append({"path": duplicate, "original": original})
+            if args.move:
+                try:
+                    duplicates_folder = os.path.join(folder, engine.DUPLICATES_FOLDER)
+                    os.makedirs(duplicates_folder, exist_ok=True)
+                    engine.move_with_caption(duplicate, duplicates_folder, args.move_captions and not args.all_files)
+                    moved += 1
+                except OSError as e:
+                    reporter.error(duplicate, str(e))
+    text = "\n".join(f"{item['path']} == {item['original']}" for item in found) or "No duplicates found."
+    reporter.result(text=text, duplicates=found, count=len(found), moved=moved)
+
+
+def run_stats(args: argparse.Namespace, reporter: Reporter) -> None:
+    from main.scripts.calculate_file_stats import CalculateFileStats
+    image_files, text_files = list_pairs(args.folder)
+    calculator = CalculateFileStats()
+    calculator.truncate_captions = args.truncate_captions
+    stats = calculator.compute_stats(text_files, image_files, process_images=not args.no_images, directory=args.folder)
+    for message in calculator.errors:
+        reporter.error(args.folder, message)
+    reporter.progress(len(image_files), len(image_files))
+    fields = {}
+    for key, value in stats.items():
+        if key == 'unique_words':
+            fields[key] = len(value)
+        elif isinstance(value, set):
+            fields[key] = sorted(value)
+        elif not key.startswith('formatted_') or key == 'formatted_total_files':
+            fields[key] = value
+    reporter.result(text=calculator.format_stats_text(stats), **fields)
+
+
+def run_archive(args: argparse.Namespace, reporter: Reporter) -> None:
+    from main.scripts import dataset_archiver
+    file_list = dataset_archiver.collect_dataset_files(args.folder)
+    shard_size = int(args.shard_size * 1024 * 1024) if args.shard_size else None
+    written = dataset_archiver.create_archive(
+        args.folder, args.output, file_list=file_list, compression=args.compression, update=args.update,
+        shard_size=shard_size, webdataset=args.webdataset, max_workers=args.workers,
+        progress_callback=lambda done, total, name: reporter.progress(done, total)
+    )
+    reporter.result(files=len(file_list), counts=dataset_archiver.count_file_types(file_list), written=written)
+
+
+def run_filter(args: argparse.Namespace, reporter: Reporter) -> None:
+    import re
+    from main.scripts import caption_index
+    folder = os.path.normpath(args.folder)
+    image_files, text_files = list_pairs(folder)
+    index_dir = args.index_dir or os.path.join(_app_path(), caption_index.INDEX_DIR_NAME)
+    index = caption_index.CaptionIndex(folder, caption_index.index_path(index_dir, folder))
+    try:
+        index.sync(text_files, reporter.progress)
+        # Pairs without a text file match like an empty caption, as in the Filter tab
+        if args.empty:
+            names, missing_matches = index.empty(), True
+        elif args.regex:
+            names, missing_matches = index.regex(args.filter), re.search(args.filter, "") is not None
+        else:
+            names, missing_matches = index.filter(args.filter), caption_index.matches_filter("", args.filter)
+        indexed = index.names() if missing_matches else set()
+    finally:
+        index.close()
+    matches = [image for image, text in zip(image_files, text_files) if os.path.basename(text) in names or (missing_matches and os.path.basename(text) not in indexed)]
+    reporter.result(text="\n".join(matches), count=len(matches), total=len(image_files), matches=matches)
+
+
+#endregion
+#region Arguments
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError("must be greater than 0")
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from main.scripts.batch_resize_images import RESIZE_MODES, RESIZE_CONDITIONS, FILETYPES
+    from main.scripts.find_dupe_file import HASH_MODES
+    parser = argparse.ArgumentParser(prog="img-txt_viewer batch", description="Run the img-txt_viewer batch tools without a window.")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("folder", help="Dataset folder")
+    common.add_argument("--json", action="store_true", help="Print progress, errors and the result as JSON lines")
+    common.add_argument("--quiet", action="store_true", help="Don't report progress")
+    common.add_argument("--workers", type=positive_int, default=_default_workers(), help="Worker threads (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    resize = commands.add_parser("resize", parents=[common], help="Resize or convert images")
+    resize.add_argument("--mode", choices=RESIZE_MODES, default="Resolution")
+    resize.add_argument("--width", type=positive_int, help="Width, or the size for Percentage, Shorter Side and Longer Side")
+    resize.add_argument("--height", type=positive_int)
+    resize.add_argument("--condition", choices=RESIZE_CONDITIONS, default="Upscale and Downscale")
+    resize.add_argument("--filetype", choices=FILETYPES, type=str.upper, default="AUTO")
+    resize.add_argument("--quality", type=int, choices=range(20, 101), metavar="20-100", default=100)
+    resize.add_argument("--output", help="Output folder (default: <folder>/Resize Output)")
+    resize.add_argument("--in-place", action="store_true", help="Save next to the source images")
+    resize.add_argument("--overwrite", action="store_true", help="Overwrite existing files instead of adding '_#'")
+    resize.add_argument("--convert-only", action="store_true", help="Only convert to --filetype, don't resize")
+    resize.set_defaults(run=run_resize)
+
+    tag = commands.add_parser("tag", parents=[common], help="Auto-Tag images with an ONNX model")
+    tag.add_argument("--model", required=True, help="model.onnx, its folder, or a folder name in models/onnx_models")
+    tag.add_argument("--mode", choices=("prefix", "append", "replace"), default="append", help="How tags are inserted (default: %(default)s)")
+    tag.add_argument("--general-threshold", type=float, default=0.35)
+    tag.add_argument("--character-threshold", type=float, default=0.85)
+    tag.add_argument("--max-tags", type=positive_int, default=40)
+    tag.add_argument("--exclude", help="Comma separated tags to leave out")
+    tag.add_argument("--auto-exclude", action="store_true", help="Leave out tags the caption already has")
+    tag.add_argument("--keep", help="Comma separated tags to always add")
+    tag.add_argument("--replace", help="Comma separated tags to replace")
+    tag.add_argument("--replace-with", help="Comma separated replacements, in the order of --replace")
+    tag.add_argument("--keep-underscore", action="store_true")
+    tag.add_argument("--no-escape", action="store_true", help="Don't escape parentheses")
+    tag.set_defaults(run=run_tag)
+
+    edit_tags = commands.add_parser("edit-tags", parents=[common], help="List, delete or replace tags")
+    edit_action = edit_tags.add_mutually_exclusive_group()
+    edit_action.add_argument("--delete", nargs="+", metavar="TAG", help="Delete these tags")
+    edit_action.add_argument("--replace", nargs=2, metavar=("TAG", "NEW"), help="Replace TAG with NEW")
+    edit_tags.set_defaults(run=run_edit_tags)
+
+    dedupe = commands.add_parser("dedupe", parents=[common], help="Find duplicate files")
+    dedupe.add_argument("--hash", choices=HASH_MODES, default="md5")
+    dedupe.add_argument("--recursive", action="store_true", help="Scan every subfolder, each on its own")
+    dedupe.add_argument("--all-files", action="store_true", help="Compare every file, not only images")
+    dedupe.add_argument("--move", action="store_true", help="Move duplicates to a _Duplicate__Files folder, leaving the first copy")
+    dedupe.add_argument("--move-captions", action="store_true", help="Move the text files of moved images")
+    dedupe.set_defaults(run=run_dedupe)
+
+    stats = commands.add_parser("stats", parents=[common], help="Dataset statistics")
+    stats.add_argument("--no-images", action="store_true", help="Only text statistics")
+    stats.add_argument("--truncate-captions", action="store_true", help="Shorten long captions in the caption list")
+    stats.set_defaults(run=run_stats)
+
+    archive = commands.add_parser("archive", parents=[common], help="Archive the dataset")
+    archive.add_argument("output", help=".zip, .tar or .tar.zst file")
+    archive.add_argument("--compression", choices=("auto", "store", "deflate"), default="auto")
+    archive.add_argument("--update", action="store_true", help="Refresh an existing zip")
+    archive.add_argument("--shard-size", type=float, metavar="MB", help="Split a tar into shards of about this size")
+    archive.add_argument("--webdataset", action="store_true", help="Name tar members as WebDataset samples")
+    archive.set_defaults(run=run_archive)
+
+    filter_parser = commands.add_parser("filter", parents=[common], help="List pairs matching a filter")
+    filter_parser.add_argument("filter", nargs="?", default="", help="Filter tab string, e.g. 'dog + !cat'")
+    filter_mode = filter_parser.add_mutually_exclusive_group()
+    filter_mode.add_argument("--regex", action="store_true", help="Treat the filter as a regular expression")
+    filter_mode.add_argument("--empty", action="store_true", help="Pairs with empty or missing text files")
+    filter_parser.add_argument("--index-dir", help="Where caption indexes are kept (default: the app's caption_index folder)")
+    filter_parser.set_defaults(run=run_filter)
+    return parser
+
+
+#endregion
+#region Main
+
+
+def usage_error(args: argparse.Namespace) -> Optional[str]:
+    """What is wrong with arguments argparse accepted, or None."""
+    if not os.path.isdir(args.folder):
+        return f"not a folder: {args.folder}"
+    if args.command == "resize" and not args.convert_only:
+        from main.scripts import batch_resize_images as engine
+        return engine.resize_values_error(args.mode, args.width, args.height)
+    return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return EXIT_USAGE if e.code else EXIT_OK
+    error = usage_error(args)
+    if error:
+        parser.print_usage(sys.stderr)
+        sys.stderr.write(f"{parser.prog}: error: {error}\n")
+        return EXIT_USAGE
+    reporter = Reporter(args.command, json_output=args.json, quiet=args.quiet)
+    try:
+        args.run(args, reporter)
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+    except Exception as e:
+        if args.json:
+            reporter._emit({"event": "failed", "command": args.command, "message": str(e)})
+        else:
+            sys.stderr.write(f"{args.command}: failed: {e}\n")
+        return EXIT_FAILED
+    return EXIT_FILE_ERRORS if reporter.errors else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+
+#endregion
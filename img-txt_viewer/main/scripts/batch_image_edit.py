@@ -3,6 +3,9 @@
 # Standard
 import os
 import time
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 
 # tkinter
 import tkinter as tk
@@ -13,7 +16,7 @@ import nenotk as ntk
 from PIL import Image
 
 # Local
-from main.scripts import HelpText
+from main.scripts import HelpText, image_adjustments
 
 # Typing
 from typing import TYPE_CHECKING
@@ -41,6 +44,12 @@ class BatchImgEdit:
         self._image_preview_update_id = None
         self.image_filelist = []
         self.is_batch_running = False
+        self.batch_max_workers = max(1, (os.cpu_count() or 2) - 1)
+        self.batch_prefetch = 2  # In-flight images per worker
+        self._batch_cancel_event = threading.Event()
+        self._batch_queue = queue.Queue()
+        self._batch_thread = None
+        self._batch_stats = {}
         self._edited_selected_image = None
         self._active_value_entry = None
 
@@ -846,6 +855,8 @@ class BatchImgEdit:
 #region Batch Processing
 
     def process_all_images(self):
+        if self.is_batch_running:
+            return
         self.set_progress(0)
         adjustments = self.get_adjustment_methods()
         if not adjustments:
@@ -855,46 +866,105 @@ class BatchImgEdit:
         if not result:
             return
         _, files, output_dir = result
-        files_to_process = []
+        jobs = []
+        reserved = set()
         for fname in files:
             src = self._resolve_full_src(fname)
             if not self._should_skip_file(src):
-                files_to_process.append(fname)
-        if not files_to_process:
+                jobs.append(self._build_save_job(src, output_dir, reserved))
+        if not jobs:
             messagebox.showinfo("Info", "No valid images to process (all files missing or unsupported).")
             return
-        self.set_progress(10)
         self.button_cancel.config(state="normal")
         exclude = [self.button_cancel, self.info_frame]
         self.set_widget_states(self.app.batch_img_edit_tab, enabled=False, exclude=exclude)
-        saved = 0
-        errors = []
-        processed = 0
-        total_files = len(files_to_process)
+        self._batch_stats = {"saved": 0, "errors": [], "processed": 0, "total": len(jobs)}
+        self._batch_cancel_event.clear()
+        self._batch_queue = queue.Queue()
         self.is_batch_running = True
         self._start_timer()
         self._initialize_timer_display()
+        self._batch_thread = threading.Thread(target=self._run_batch, args=(jobs, adjustments, self._batch_queue), daemon=True)
+        self._batch_thread.start()
+        self._poll_batch_queue()
+
+    def _run_batch(self, jobs, adjustments, result_queue):
+        """Background thread: keep a bounded window of images in flight in a process pool.
+
+        Each worker decodes, adjusts, encodes and writes one image, so only file paths and
+        results cross the process boundary. Results are posted to result_queue for the UI.
+        Does NOT touch any widgets.
+        """
+        cancel_event = self._batch_cancel_event
+        window = self.batch_max_workers * self.batch_prefetch
+        job_iter = iter(jobs)
+        pending = {}
         try:
-            for fname in files_to_process:
-                if not self.is_batch_running:
-                    break
-                src = self._resolve_full_src(fname)
-                ok, err = self._process_and_save(src, output_dir, adjustments)
-                if ok:
-                    saved += 1
-                elif err:
-                    errors.append(err)
-                processed += 1
-                self.processed_var.set(f"Processed: {processed}")
-                self._update_timer_display(processed, total_files)
-                progress_val = int((processed / total_files) * 100) if total_files else 100
-                self.set_progress(progress_val)
+            with ProcessPoolExecutor(max_workers=self.batch_max_workers) as executor:
+                def submit_next():
+                    job = next(job_iter, None)
+                    if job is None:
+                        return False
+                    src, save_path, remove_src = job
+                    future = executor.submit(image_adjustments.edit_file, src, save_path, adjustments, remove_src)
+                    pending[future] = src
+                    return True
+                while len(pending) < window and submit_next():
+                    pass
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        src = pending.pop(future)
+                        if future.cancelled():
+                            continue
+                        error = future.exception()
+                        result_queue.put(("result", None if error is None else f"{src}: {error}"))
+                        if not cancel_event.is_set():
+                            submit_next()
+                    if cancel_event.is_set():
+                        for future in pending:
+                            future.cancel()
+        except Exception as e:
+            result_queue.put(("result", f"Batch worker error: {e}"))
         finally:
-            self._finalize_timer_display(processed, total_files)
-            self.set_widget_states(self.app.batch_img_edit_tab, enabled=True)
-            self.button_cancel.config(state="disabled")
-            self.is_batch_running = False
-        summary = f"Saved: {saved}\nErrors: {len(errors)}"
+            result_queue.put(("done", None))
+
+    def _poll_batch_queue(self):
+        """Main thread: drain worker results and update counters, timer and progress."""
+        stats = self._batch_stats
+        finished = False
+        try:
+            while True:
+                kind, error = self._batch_queue.get_nowait()
+                if kind == "done":
+                    finished = True
+                    break
+                stats["processed"] += 1
+                if error:
+                    stats["errors"].append(error)
+                else:
+                    stats["saved"] += 1
+        except queue.Empty:
+            pass
+        processed, total = stats["processed"], stats["total"]
+        self.processed_var.set(f"Processed: {processed}")
+        self._update_timer_display(processed, total)
+        self.progress_var.set(int((processed / total) * 100) if total else 100)
+        if finished:
+            self._on_batch_finished()
+        else:
+            self.root.after(100, self._poll_batch_queue)
+
+    def _on_batch_finished(self):
+        stats = self._batch_stats
+        self._finalize_timer_display(stats["processed"], stats["total"])
+        self.set_widget_states(self.app.batch_img_edit_tab, enabled=True)
+        self.button_cancel.config(state="disabled")
+        self.is_batch_running = False
+        self._batch_thread = None
+        summary = f"Saved: {stats['saved']}\nErrors: {len(stats['errors'])}"
+        if self._batch_cancel_event.is_set():
+            summary = f"Cancelled after {stats['processed']} of {stats['total']} images.\n\n{summary}"
         messagebox.showinfo("Batch Image Edit - Complete", summary)
 
     def _validate_dir_and_confirm(self):
@@ -929,46 +999,26 @@ class BatchImgEdit:
             return False
         return True, files, output_dir
 
-    def _process_and_save(self, src, output_dir, adjustments):
-        try:
-            img = self.get_pil_image(src)
-            if img is None:
-                return False, f"{src}: failed to open"
-            self.set_progress(50)
-            edited = self.app.edit_panel.public_image_edit(img, adjustments)
-            self.set_progress(75)
-            base = os.path.basename(src)
-            save_path = os.path.join(output_dir, base)
-            ext = os.path.splitext(src)[1].lower()
-            save_format = self.save_format_var.get()
-            if save_format == 2:
-                new_ext = ".jpg"
-            elif save_format == 3:
-                new_ext = ".png"
-            else:
-                new_ext = ext
-            if new_ext != ext:
-                save_path = os.path.splitext(save_path)[0] + new_ext
-            overwrite_mode = self.overwrite_mode_var.get()
-            save_path_var = self.save_path_var.get()
-            if overwrite_mode == 1:
-                if save_path_var == 1 and os.path.exists(src):
-                    os.remove(src)
-            elif overwrite_mode == 3:
-                save_path = self._get_unique_filename(save_path)
-            if new_ext in (".jpg", ".jpeg", ".jfif"):
-                prepared = self.app.edit_panel._prepare_image_for_save(edited, new_ext)
-                prepared.save(save_path, format="JPEG", quality=100)
-            elif new_ext == ".png":
-                prepared = self.app.edit_panel._prepare_image_for_save(edited, new_ext)
-                prepared.save(save_path, format="PNG")
-            else:
-                prepared = self.app.edit_panel._prepare_image_for_save(edited, new_ext)
-                prepared.save(save_path)
-            self.set_progress(90)
-            return True, None
-        except Exception as e:
-            return False, f"{src}: {e}"
+    def _build_save_job(self, src, output_dir, reserved):
+        """Resolve the output path for src on the main thread. Returns (src, save_path, remove_src)."""
+        base = os.path.basename(src)
+        save_path = os.path.join(output_dir, base)
+        ext = os.path.splitext(src)[1].lower()
+        save_format = self.save_format_var.get()
+        if save_format == 2:
+            new_ext = ".jpg"
+        elif save_format == 3:
+            new_ext = ".png"
+        else:
+            new_ext = ext
+        if new_ext != ext:
+            save_path = os.path.splitext(save_path)[0] + new_ext
+        overwrite_mode = self.overwrite_mode_var.get()
+        remove_src = overwrite_mode == 1 and self.save_path_var.get() == 1
+        if overwrite_mode == 3:
+            save_path = self._get_unique_filename(save_path, reserved)
+        reserved.add(os.path.normcase(save_path))
+        return src, save_path, remove_src
 
     def _resolve_full_src(self, fname):
         if os.path.isabs(fname):
@@ -983,8 +1033,11 @@ class BatchImgEdit:
         ext = os.path.splitext(src)[1].lower()
         return ext not in self.supported_filetypes
 
-    def _get_unique_filename(self, filepath):
-        if not os.path.exists(filepath):
+    def _get_unique_filename(self, filepath, reserved=None):
+        reserved = reserved or set()
+        def is_taken(path):
+            return os.path.exists(path) or os.path.normcase(path) in reserved
+        if not is_taken(filepath):
             return filepath
         directory = os.path.dirname(filepath)
         basename = os.path.basename(filepath)
@@ -993,13 +1046,13 @@ class BatchImgEdit:
         while True:
             new_name = f"{name}_{counter}{ext}"
             new_path = os.path.join(directory, new_name)
-            if not os.path.exists(new_path):
+            if not is_taken(new_path):
                 return new_path
             counter += 1
 
     def stop_batch_process(self):
         if self.is_batch_running:
-            self.is_batch_running = False
+            self._batch_cancel_event.set()
             self.button_cancel.config(state="disabled")
 
 #endregion
@@ -13,14 +13,45 @@ from tkinter import ttk, messagebox, filedialog, BooleanVar, StringVar
 import nenotk as ntk
 
 # Local
-from main.scripts import HelpText
+from main.scripts import HelpText, rename_executor
 
 # Typing
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
 if TYPE_CHECKING:
     from app import ImgTxtViewer as Main
 
 
+#endregion
+#region RenameRow
+
+
+class RenameRow:
+    """One file in the rename tree. The model the preview is computed on, the Treeview only displays it."""
+    __slots__ = ("iid", "name", "base", "ext", "size", "mtime", "pair", "new_name", "shown_new_name", "position")
+
+    def __init__(self, iid: str, name: str, size: int, mtime: float) -> None:
+        self.iid = iid
+        self.name = name
+        self.base, self.ext = os.path.splitext(name)
+        self.size = size
+        self.mtime = mtime
+        # Name of the image or text file this one is paired with
+        self.pair: Optional[str] = None
+        self.new_name = name
+        # What the "New Name" cell currently shows, so only changed cells are pushed
+        self.shown_new_name = name
+        self.position = 0
+
+
+    def values(self) -> tuple:
+        if self.size < 1024:
+            size_kb = f"{(self.size/1024):.1f} KB"
+        else:
+            size_kb = f"{int(self.size/1024):,} KB"
+        modified_time = time.strftime("%Y-%m-%d, %I:%M:%S %p", time.localtime(self.mtime))
+        return (self.name, self.new_name, self.ext, size_kb, modified_time)
+
+
 #endregion
 #region BatchRename
 
@@ -37,6 +68,16 @@ class BatchRename:
         self.sort_reverse = False
         self.selected_items = set()
         self.last_preview_count = 0
+        # Row model, in display order
+        self.rows: List[RenameRow] = []
+        self.rows_by_iid: Dict[str, RenameRow] = {}
+        self.rows_by_name: Dict[str, RenameRow] = {}
+        # Every name in the working directory, and the directory's modified time when it was listed
+        self.dir_names: Set[str] = set()
+        self.dir_mtime_ns = None
+        self.sync_job_id = None
+        # The last completed rename, for undo
+        self.last_plan = None
         # Settings
         self.respect_img_txt_pairs_var = BooleanVar(value=True)
         self.handle_duplicates_var = StringVar(value="Rename")
@@ -119,11 +160,11 @@ class BatchRename:
         self.file_treeview.column("Size", width=90, minwidth=0, stretch=False)
         self.file_treeview.column("Modified", width=160, minwidth=0, stretch=False)
         # Add scrollbars
-        v_scrollbar = ttk.Scrollbar(self.frame_control_row, orient="vertical", command=self.file_treeview.yview)
-        self.file_treeview.configure(yscrollcommand=v_scrollbar.set)
+        self.v_scrollbar = ttk.Scrollbar(self.frame_control_row, orient="vertical", command=self.file_treeview.yview)
+        self.file_treeview.configure(yscrollcommand=self.on_treeview_scroll)
         # Grid layout for treeview and scrollbars
         self.file_treeview.grid(column=0, row=0, sticky='nsew')
-        v_scrollbar.grid(column=1, row=0, sticky='ns')
+        self.v_scrollbar.grid(column=1, row=0, sticky='ns')
         # Configure grid weights
         self.frame_control_row.grid_columnconfigure(0, weight=1)
         self.frame_control_row.grid_rowconfigure(0, weight=1)
@@ -162,6 +203,8 @@ class BatchRename:
         self.actions_menu.menu.add_command(label="Deselect All", accelerator="Ctrl+D", command=self.deselect_all_treeview)
         self.actions_menu.menu.add_command(label="Invert Selection", accelerator="Ctrl+I", command=self.invert_selection_treeview)
         self.actions_menu.menu.add_separator()
+        self.actions_menu.menu.add_command(label="Undo Last Rename", command=self.undo_last_rename)
+        self.actions_menu.menu.add_separator()
         self.actions_menu.menu.add_command(label="Refresh Files", accelerator="F5", command=self.update_file_tree_view)
         # Presets
         self.presets_menu = ttk.Menubutton(self.frame_bottom_row, text="Presets")
@@ -207,12 +250,10 @@ class BatchRename:
 
 
     def on_selection_change(self, event=None):
-        # Check if files still exist and refresh if needed
-        for item in self.file_treeview.get_children():
-            filename = self.file_treeview.set(item, "Name")
-            if not os.path.exists(os.path.join(self.working_dir, filename)):
-                self.update_file_tree_view()
-                return
+        # Refresh if files were added, removed or renamed since the directory was listed
+        if self.get_dir_mtime_ns() != self.dir_mtime_ns:
+            self.update_file_tree_view()
+            return
         self.selected_items = set(self.file_treeview.selection())
         self.update_rename_preview()
         self.update_info_label(filecount=True)
@@ -224,46 +265,95 @@ class BatchRename:
         self.last_preview_count = 0
         # Get the sort key from the app
         sort_key = self.app.get_file_sort_key()
-        # List all supported files in the working directory
-        files = [f for f in os.listdir(self.working_dir) if f.lower().endswith(self.supported_filetypes)]
-        # Sort files using the app's sort key; prepend working_dir for full path if needed
-        files = sorted(files, key=lambda f: sort_key(f))
-        # Clear existing treeview items
-        for item in self.file_treeview.get_children():
-            self.file_treeview.delete(item)
-        # Insert file details for each file
-        for file in files:
-            full_path = os.path.join(self.working_dir, file)
-            name, ext = os.path.splitext(file)
-            size = os.path.getsize(full_path)
-            if size < 1024:
-                size_kb = f"{(size/1024):.1f} KB"
-            else:
-                size_kb = f"{int(size/1024):,} KB"
-            modified_time = time.strftime("%Y-%m-%d, %I:%M:%S %p", time.localtime(os.path.getmtime(full_path)))
-            # Insert row with "New Name" matching original name
-            self.file_treeview.insert("", "end", values=(file, file, ext, size_kb, modified_time))
+        # List the working directory once, scandir entries carry their size and modified time
+        self.dir_mtime_ns = self.get_dir_mtime_ns()
+        with os.scandir(self.working_dir) as dir_entries:
+            entries = list(dir_entries)
+        self.dir_names = {entry.name for entry in entries}
+        entries = [entry for entry in entries if entry.name.lower().endswith(self.supported_filetypes)]
+        # Sort files using the app's sort key
+        entries.sort(key=lambda entry: sort_key(entry.name))
+        self.rows = []
+        for index, entry in enumerate(entries):
+            stat = entry.stat()
+            self.rows.append(RenameRow(f"row{index}", entry.name, stat.st_size, stat.st_mtime))
+        self.rows_by_iid = {row.iid: row for row in self.rows}
+        self.rows_by_name = {row.name: row for row in self.rows}
+        self.link_pairs()
+        self.reindex_rows()
+        # Clear existing treeview items and insert a row per file, "New Name" matches the original name
+        self.file_treeview.delete(*self.file_treeview.get_children())
+        for row in self.rows:
+            self.file_treeview.insert("", "end", iid=row.iid, values=row.values())
+
+
+    def link_pairs(self):
+        """Link each image to its text file, and the text file back to the image."""
+        for row in self.rows:
+            if row.ext.lower() == ".txt":
+                continue
+            txt_row = self.rows_by_name.get(f"{row.base}.txt")
+            if txt_row:
+                row.pair = txt_row.name
+                if txt_row.pair is None:
+                    txt_row.pair = row.name
+
+
+    def reindex_rows(self):
+        for position, row in enumerate(self.rows):
+            row.position = position
 
 
     def sort_treeview(self, column):
-        items = [(self.file_treeview.set(item, column), item) for item in self.file_treeview.get_children("")]
         # If clicking the same column, reverse the sort
         if self.sort_column == column:
             self.sort_reverse = not self.sort_reverse
         else:
             self.sort_reverse = False
             self.sort_column = column
-        # Sort based on column type
+        # Sort the model on its raw values
         if column == "Size":
-            items.sort(key=lambda x: float(x[0].replace(' KB', '').replace(',', '')), reverse=self.sort_reverse)
+            sort_key = lambda row: row.size
         elif column == "Modified":
-            items.sort(key=lambda x: time.strptime(x[0], "%Y-%m-%d, %I:%M:%S %p"), reverse=self.sort_reverse)
+            sort_key = lambda row: row.mtime
+        elif column == "Type":
+            sort_key = lambda row: row.ext.lower()
+        elif column == "New Name":
+            sort_key = lambda row: row.new_name.lower()
         else:
-            items.sort(key=lambda x: x[0].lower(), reverse=self.sort_reverse)
+            sort_key = lambda row: row.name.lower()
+        self.rows.sort(key=sort_key, reverse=self.sort_reverse)
+        self.reindex_rows()
         # Rearrange items in sorted order
-        for index, (_, item) in enumerate(items):
-            self.file_treeview.move(item, "", index)
+        for row in self.rows:
+            self.file_treeview.move(row.iid, "", row.position)
         self.update_treeview_column_headings(sorted_column=column)
+        self.schedule_sync_visible_rows()
+
+
+    def on_treeview_scroll(self, first, last):
+        self.v_scrollbar.set(first, last)
+        self.schedule_sync_visible_rows()
+
+
+    def schedule_sync_visible_rows(self):
+        if self.sync_job_id is None:
+            self.sync_job_id = self.root.after_idle(self.sync_visible_rows)
+
+
+    def sync_visible_rows(self):
+        """Push changed "New Name" cells to the Treeview, for the rows on screen only."""
+        self.sync_job_id = None
+        if not self.rows:
+            return
+        first, last = self.file_treeview.yview()
+        count = len(self.rows)
+        start = max(0, int(first * count) - 1)
+        end = min(count, int(last * count) + 2)
+        for row in self.rows[start:end]:
+            if row.shown_new_name != row.new_name:
+                self.file_treeview.set(row.iid, "New Name", row.new_name)
+                row.shown_new_name = row.new_name
 
 
 #endregion
@@ -272,71 +362,59 @@ class BatchRename:
 
     def update_rename_preview(self):
         selected_count = len(self.selected_items)
-        number_preset = True if self.rename_preset_var.get() == "Numbering" else False
-        date_preset = True if self.rename_preset_var.get() == "Auto-Date" else False
         if selected_count == 0:
-            for item in self.file_treeview.get_children():
-                current_name = self.file_treeview.set(item, "Name")
-                self.file_treeview.set(item, "New Name", current_name)
-            self.last_preview_count = 0
-            return
-        pairs = self.get_file_pairs() if self.respect_img_txt_pairs_var.get() else {}
-        processed_pairs = set()
-        existing_files = set(os.listdir(self.working_dir))
-        preview_files = set()  # Track files we're planning to rename to
-        counter = 1
-        self.generate_rename_preview(number_preset, date_preset, pairs, processed_pairs, existing_files, preview_files, counter)
+            for row in self.rows:
+                row.new_name = row.name
+        else:
+            self.generate_rename_preview(self.rename_preset_var.get())
         self.last_preview_count = selected_count
-
-
-    def generate_rename_preview(self, number_preset, date_preset, pairs, processed_pairs, existing_files, preview_files, counter):
-        for item in self.file_treeview.get_children():
-            current_name = self.file_treeview.set(item, "Name")
-            base, ext = os.path.splitext(current_name)
-            if current_name in processed_pairs:
+        self.sync_visible_rows()
+
+
+    def generate_rename_preview(self, preset):
+        """Compute every row's new name in one pass over the model, in display order."""
+        respect_pairs = self.respect_img_txt_pairs_var.get()
+        # Names the selected files give up are free, rename_executor orders swaps and shifted numbering
+        renamed_away = set()
+        for row in self.rows:
+            if row.iid in self.selected_items:
+                renamed_away.add(row.name)
+                if respect_pairs and row.pair:
+                    renamed_away.add(row.pair)
+        # Names on disk that stay, plus the names already planned, for duplicate handling
+        taken_names = set(self.dir_names) - renamed_away
+        processed = set()
+        counter = 1
+        for row in self.rows:
+            if row.name in processed:
+                continue
+            if row.iid not in self.selected_items:
+                row.new_name = row.name
                 continue
-            if item in self.selected_items:
-                if base in pairs and self.respect_img_txt_pairs_var.get():
-                    img_file, txt_file = pairs[base]
-                    new_base = f"{counter:05d}" if number_preset else base
-                    if date_preset:
-                        modified_time = self.file_treeview.set(item, "Modified")
-                        date_str = time.strftime("%Y-%m-%d", time.strptime(modified_time, "%Y-%m-%d, %I:%M:%S %p"))
-                        new_base = f"{date_str}_{counter:05d}"
-                    # Handle both files in the pair
-                    for tree_item in self.file_treeview.get_children():
-                        tree_name = self.file_treeview.set(tree_item, "Name")
-                        if tree_name in (img_file, txt_file):
-                            _, tree_ext = os.path.splitext(tree_name)
-                            new_name = f"{new_base}{tree_ext}"
-                            # Handle potential duplicates
-                            final_name = self.handle_duplicate_filename(new_name, existing_files | preview_files)
-                            if final_name:  # Skip if None (skip option)
-                                self.file_treeview.set(tree_item, "New Name", final_name)
-                                preview_files.add(final_name)
-                            else:
-                                self.file_treeview.set(tree_item, "New Name", tree_name)
-                            processed_pairs.add(tree_name)
-                    counter += 1
-                elif current_name not in processed_pairs:
-                    if number_preset:
-                        new_name = f"{counter:05d}{ext}"
-                    elif date_preset:
-                        modified_time = self.file_treeview.set(item, "Modified")
-                        date_str = time.strftime("%Y-%m-%d", time.strptime(modified_time, "%Y-%m-%d, %I:%M:%S %p"))
-                        new_name = f"{date_str}_{counter:05d}{ext}"
-                    else:
-                        new_name = current_name
-                    # Handle potential duplicates
-                    final_name = self.handle_duplicate_filename(new_name, existing_files | preview_files)
-                    if final_name:  # Skip if None (skip option)
-                        self.file_treeview.set(item, "New Name", final_name)
-                        preview_files.add(final_name)
-                    else:
-                        self.file_treeview.set(item, "New Name", current_name)
-                    counter += 1
+            group = [row]
+            if respect_pairs and row.pair:
+                # Handle both files in the pair, in display order
+                group = sorted((row, self.rows_by_name[row.pair]), key=lambda member: member.position)
+            if preset == "Numbering":
+                new_base = f"{counter:05d}"
+            elif preset == "Auto-Date":
+                date_str = time.strftime("%Y-%m-%d", time.localtime(row.mtime))
+                new_base = f"{date_str}_{counter:05d}"
             else:
-                self.file_treeview.set(item, "New Name", current_name)
+                new_base = None
+            for member in group:
+                new_name = member.name if new_base is None else f"{new_base}{member.ext}"
+                # Handle potential duplicates
+                final_name = self.handle_duplicate_filename(new_name, taken_names)
+                if final_name:  # Skip if None (skip option)
+                    member.new_name = final_name
+                    taken_names.add(final_name)
+                else:
+                    # Skip keeps the file where it is, so its name is taken after all
+                    member.new_name = member.name
+                    taken_names.add(member.name)
+                processed.add(member.name)
+            counter += 1
 
 
     def handle_duplicate_filename(self, new_name, existing_files):
@@ -350,8 +428,6 @@ class BatchRename:
                 counter += 1
             return new_name
         elif duplicate_option == "Move to Folder":
-            renamed_folder = os.path.join(self.working_dir, "Renamed Files")
-            new_path = os.path.join(renamed_folder, new_name)
             return new_name  # Just return the name for preview, actual move happens during rename
         elif duplicate_option == "Overwrite":
             return new_name  # Will be handled during actual rename with confirmation
@@ -361,36 +437,22 @@ class BatchRename:
             return new_name
 
 
-
-    def get_file_pairs(self):
-        """Returns a dictionary of paired files where key is the base name and value is tuple of (img_file, txt_file)"""
-        pairs = {}
-        files = {f for f in os.listdir(self.working_dir)}
-        for file in files:
-            base, ext = os.path.splitext(file)
-            ext = ext.lower()
-            # Skip if not a supported file
-            if ext not in self.supported_filetypes:
-                continue
-            # Check for text pair
-            txt_pair = f"{base}.txt"
-            if ext != '.txt' and txt_pair in files:
-                pairs[base] = (file, txt_pair)
-        return pairs
-
-
 #endregion
 #region  Rename Process
 
 
     def rename_files(self):
-        selected_items = self.file_treeview.selection()
-        if not selected_items:
+        if not self.file_treeview.selection():
             messagebox.showinfo("No Selection", "No files selected for renaming.")
             return
+        # Every row the preview renamed, including the other half of each pair
+        rows = [row for row in self.rows if row.new_name and row.new_name != row.name]
+        if not rows:
+            messagebox.showinfo("Nothing to Rename", "The selected files already have their new names.")
+            return
         # Show warning if enabled
         if self.show_warning_var.get():
-            msg = f"Are you sure you want to rename {len(selected_items)} files?\n\nThere is no undo for this operation."
+            msg = f"Are you sure you want to rename {len(rows)} files?\n\nYou can undo this from Actions > Undo Last Rename."
             if not messagebox.askyesno("Confirm Rename", msg):
                 return
         duplicate_option = self.handle_duplicates_var.get()
@@ -398,26 +460,73 @@ class BatchRename:
             renamed_folder = self.setup_renamed_folder()
         else:
             renamed_folder = None
-        for item in selected_items:
-            old_name = self.file_treeview.set(item, "Name")
-            new_name = self.file_treeview.set(item, "New Name")
-            if not new_name or new_name == old_name:
-                continue
-            old_path = os.path.join(self.working_dir, old_name)
-            if renamed_folder:
-                new_path = os.path.join(renamed_folder, new_name)
-            else:
-                new_path = os.path.join(self.working_dir, new_name)
-            try:
-                os.rename(old_path, new_path)
-            except FileExistsError:
-                # Overwrite or skip handled at preview, so just skip here if it still conflicts
-                continue
-            except Exception as e:
-                messagebox.showerror("Error: batch_rename.rename_files()", f"Failed to rename {old_name}: {e}")
+        target_dir = renamed_folder or self.working_dir
+        renames = [(os.path.join(self.working_dir, row.name), os.path.join(target_dir, row.new_name)) for row in rows]
+        try:
+            plan = rename_executor.plan_renames(self.working_dir, renames, overwrite=duplicate_option == "Overwrite")
+        except ValueError as e:
+            messagebox.showerror("Error: batch_rename.rename_files()", f"Failed to plan the rename: {e}")
+            return
+        overwritten = plan.overwritten
+        if overwritten and not messagebox.askyesno("Confirm Overwrite", f"{len(overwritten)} existing files will be overwritten.\n\nOverwritten files can't be restored by undo. Continue?"):
+            return
+        if self.execute_rename_plan(plan, "Renaming files..."):
+            self.last_plan = plan
         self.update_file_tree_view()
+        self.update_info_label(filecount=True)
+        if plan.skipped:
+            skipped = "\n".join(os.path.basename(src) for src, _ in plan.skipped[:20])
+            messagebox.showinfo("Files Skipped", f"{len(plan.skipped)} files were skipped because their new name already exists:\n\n{skipped}")
 
 
+    def execute_rename_plan(self, plan, message):
+        """Run a rename plan off the UI thread with a progress bar. Returns True if it completed."""
+        def rename_task(progress_callback):
+            def on_progress(done, total, renames_per_second):
+                progress_callback(done, message, f"{done} of {total} ({renames_per_second:,.0f}/s)")
+            return rename_executor.execute_plan(plan, progress_callback=on_progress)
+
+        try:
+            result = ntk.showprogress("Batch Rename", message, rename_task, args=(), max_value=max(1, len(plan.entries) + len(plan.renames)))
+        except Exception as e:
+            messagebox.showerror("Error: batch_rename.execute_rename_plan()", f"Failed to rename files, every file was returned to its original name.\n\n{e}")
+            return False
+        if result:
+            self.update_info_label(text=f"Renamed {result.count} files ({result.renames_per_second:,.0f}/s)")
+        return True
+
+
+    def undo_last_rename(self):
+        if not self.last_plan:
+            messagebox.showinfo("Undo Last Rename", "There is no rename to undo.")
+            return
+        if not messagebox.askyesno("Undo Last Rename", f"Return {len(self.last_plan.renames)} files to their previous names?"):
+            return
+        try:
+            plan = self.last_plan.inverse()
+        except ValueError as e:
+            messagebox.showerror("Error: batch_rename.undo_last_rename()", f"Failed to plan the undo: {e}")
+            return
+        if self.execute_rename_plan(plan, "Undoing rename..."):
+            self.last_plan = None
+        self.update_file_tree_view()
+        if plan.skipped:
+            messagebox.showinfo("Files Skipped", f"{len(plan.skipped)} files were not restored because another file now has their previous name.")
+
+
+    def check_interrupted_rename(self):
+        """Offer to roll back a batch rename that was interrupted in the working directory."""
+        journal = rename_executor.find_journal(self.working_dir)
+        if not journal:
+            return
+        msg = f"A batch rename of {len(journal['entries'])} files in this folder was interrupted.\n\nRestore the files to their original names now?"
+        if not messagebox.askyesno("Interrupted Rename", msg):
+            return
+        try:
+            rename_executor.rollback_journal(journal)
+        except Exception as e:
+            messagebox.showerror("Error: batch_rename.check_interrupted_rename()", f"Failed to restore some files, try again or check the folder.\n\n{e}")
+
 
     def setup_renamed_folder(self):
         renamed_folder = os.path.join(self.working_dir, "Renamed Files")
@@ -440,8 +549,9 @@ class BatchRename:
             self.working_dir = path
         self.entry_directory.delete(0, "end")
         self.entry_directory.insert(0, os.path.normpath(self.working_dir))
-        self.update_info_label(filecount=True)
+        self.check_interrupted_rename()
         self.update_file_tree_view()
+        self.update_info_label(filecount=True)
 
 
     def refresh_files(self):
@@ -451,7 +561,7 @@ class BatchRename:
 
     def update_info_label(self, filecount=None, text=None):
         if filecount:
-            filecount = sum(1 for file in os.listdir(self.working_dir) if file.endswith(self.supported_filetypes))
+            filecount = len(self.rows)
             selection_count = self.last_preview_count
             digits = len(str(filecount))
             selection_str = str(selection_count).zfill(digits)
@@ -460,6 +570,13 @@ class BatchRename:
             self.info_label.config(text=text)
 
 
+    def get_dir_mtime_ns(self):
+        try:
+            return os.stat(self.working_dir).st_mtime_ns
+        except OSError:
+            return None
+
+
     def open_folder(self):
         path = self.working_dir
         try:
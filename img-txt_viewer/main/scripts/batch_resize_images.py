@@ -17,7 +17,7 @@ from nenotk import ToolTip as Tip
 from PIL import Image, PngImagePlugin
 
 # Local
-from main.scripts import HelpText
+from main.scripts import HelpText, tiling
 
 # Typing
 from typing import TYPE_CHECKING
@@ -25,6 +25,111 @@ if TYPE_CHECKING:
     from app import ImgTxtViewer as Main
 
 
+#endregion
+#region Resize Engine
+
+
+RESIZE_MODES = ("Resolution", "Percentage", "Width", "Height", "Shorter Side", "Longer Side")
+RESIZE_CONDITIONS = ("Upscale and Downscale", "Upscale Only", "Downscale Only")
+FILETYPES = ("AUTO", "JPEG", "PNG", "WEBP")
+SUPPORTED_FILETYPES = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff")
+
+
+def resize_values_error(resize_mode, width, height):
+    """The message for missing size values in resize_mode, or None if they are complete."""
+    if resize_mode == "Resolution" and (width is None or height is None):
+        return "Please enter a valid width and height."
+    elif resize_mode == "Percentage" and width is None:
+        return "Please enter a valid percentage."
+    elif resize_mode in ["Width", "Shorter Side", "Longer Side"] and width is None:
+        return "Please enter a valid width."
+    elif resize_mode == "Height" and height is None:
+        return "Please enter a valid height."
+    return None
+
+
+def should_resize(original_size, new_size, condition="Upscale and Downscale"):
+    if original_size == new_size:
+        return False
+    if condition == "Upscale Only":
+        return new_size > original_size
+    elif condition == "Downscale Only":
+        return new_size < original_size
+    else:  # "Upscale and Downscale"
+        return True
+
+
+def resize_for_mode(img, resize_mode, width, height, condition="Upscale and Downscale"):
+    """
+    Resize img as Batch Resize does. Percentage, Shorter Side and Longer Side take
+    their value from width. img is returned as is when condition rules the resize out.
+    """
+    original_width, original_height = original_size = img.size
+    if resize_mode == "Resolution":
+        target_size = (_positive(width), _positive(height))
+        new_size = target_size
+    elif resize_mode == "Percentage":
+        percentage = _positive(width) / 100
+        target_size = (int(original_width * percentage), int(original_height * percentage))
+        new_size = target_size
+    elif resize_mode == "Width":
+        target_size = (_positive(width), int(original_height * (width / float(original_width))))
+        new_size = (width, original_height)
+    elif resize_mode == "Height":
+        target_size = (int(original_width * (_positive(height) / float(original_height))), height)
+        new_size = (original_width, height)
+    elif resize_mode in ("Shorter Side", "Longer Side"):
+        # The chosen side becomes width, the other keeps the aspect ratio
+        if (original_width < original_height) == (resize_mode == "Shorter Side"):
+            target_size = (_positive(width), int(original_height * (width / float(original_width))))
+        else:
+            target_size = (int(original_width * (_positive(width) / float(original_height))), width)
+        new_size = (width, width)
+    else:
+        return img
+    if not should_resize(original_size, new_size, condition):
+        return img
+    return tiling.resize(img, target_size, Image.LANCZOS)
+
+
+def _positive(value):
+    if not isinstance(value, (int, float)) or value <= 0:
+        raise ValueError("Sizes must be numbers greater than 0.")
+    return value
+
+
+def output_path_for(output_folder, filename, filetype, overwrite, reserved=None):
+    """
+    Where filename is saved as filetype ("AUTO" keeps its extension). Without overwrite,
+    "_#" is appended until the name is free. Names in reserved count as taken and the
+    chosen name is added, for workers saving to the same folder.
+    """
+    filetype = filetype.lower()
+    base_filename, original_extension = os.path.splitext(filename)
+    if filetype == "auto":
+        filetype = original_extension[1:]
+    filename_with_new_extension = f"{base_filename}.{filetype}"
+    counter = 1
+    if not overwrite:
+        while os.path.exists(os.path.join(output_folder, filename_with_new_extension)) or (reserved is not None and filename_with_new_extension in reserved):
+            filename_with_new_extension = f"{base_filename}_{counter}.{filetype}"
+            counter += 1
+    if reserved is not None:
+        reserved.add(filename_with_new_extension)
+    return os.path.join(output_folder, filename_with_new_extension)
+
+
+def resize_file(src_path, dest_path, resize_mode=None, width=None, height=None, condition="Upscale and Downscale", quality=100):
+    """Resize one image to dest_path as RGB, or only convert it when resize_mode is None."""
+    with Image.open(src_path) as img:
+        img = img.convert('RGB')
+    if resize_mode is not None:
+        img = resize_for_mode(img, resize_mode, width, height, condition)
+    if 'icc_profile' in img.info:
+        del img.info['icc_profile']
+    img.save(dest_path, quality=quality, optimize=True)
+
+
 #endregion
 #region ResizeImages
 
@@ -34,9 +139,10 @@ class BatchResizeImages:
         self.app: 'Main' = None
         self.root: 'tk.Tk' = None
         self.working_dir = None
+        self.file_probe_job = None
         self.resize_thread = None
         self.files_processed = 0
-        self.supported_filetypes = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff")
+        self.supported_filetypes = SUPPORTED_FILETYPES
 
 
 #endregion
@@ -471,20 +577,27 @@ class BatchResizeImages:
 
 
     def populate_file_tree(self):
+        """List the files now, their dimensions are filled in as the shared image probe reads them."""
+        if self.file_probe_job:
+            self.file_probe_job.cancel()
         self.file_tree.delete(*self.file_tree.get_children())
         if self.working_dir:
             files = self._get_sorted_files()
+            item_by_path = {}
             for file in files:
-                filepath = os.path.join(self.working_dir, file)
-                try:
-                    with Image.open(filepath) as img:
-                        width, height = img.size
-                        dimensions = f"{width}x{height}"
-                        file_ext = os.path.splitext(file)[1].lower()
-                except:
-                    dimensions = "-"
-                    file_ext = "-"
-                self.file_tree.insert("", "end", values=(file, dimensions, "-", file_ext, "-"))
+                item = self.file_tree.insert("", "end", values=(file, "...", "-", os.path.splitext(file)[1].lower(), "-"))
+                item_by_path[os.path.join(self.working_dir, file)] = item
+            self.file_probe_job = self.app.image_probe.probe_async(self.root, list(item_by_path), lambda results: self._fill_file_tree_rows(item_by_path, results), on_done=self.update_file_tree_info)
+
+
+    def _fill_file_tree_rows(self, item_by_path, results):
+        for filepath, header in results:
+            item = item_by_path[filepath]
+            file_values = list(self.file_tree.item(item, "values"))
+            file_values[1] = header.dimensions if header else "-"
+            if not header:
+                file_values[3] = "-"
+            self.file_tree.item(item, values=file_values)
 
 
     def update_file_tree_info(self, event=None):
@@ -503,7 +616,7 @@ class BatchResizeImages:
         for child in self.file_tree.get_children():
             file_values = list(self.file_tree.item(child, "values"))
             orig_dim = file_values[1]
-            if orig_dim == "-":
+            if orig_dim in ("-", "..."):
                 continue
             w_orig, h_orig = [int(i) for i in orig_dim.split("x")]
             img_size = (w_orig, h_orig)
@@ -577,152 +690,11 @@ class BatchResizeImages:
 #region  Resize
 
 
-# --------------------------------------
-# Input Validation
-# --------------------------------------
-    def validate_dimensions(self, width, height):
-        if width is None or height is None:
-            messagebox.showinfo("Error", "Please enter a valid width and height.")
-            return False
-        if not isinstance(width, int) or not isinstance(height, int):
-            raise TypeError("Width and height must be integers.")
-        if width <= 0 or height <= 0:
-            raise ValueError("Width and height must be greater than 0.")
-        return True
-
-
-    def validate_dimension(self, dimension):
-        if dimension is None:
-            messagebox.showinfo("Error", "Please enter a valid size.")
-            return False
-        if not isinstance(dimension, int):
-            raise TypeError("Size must be an integer.")
-        if dimension <= 0:
-            raise ValueError("Size must be greater than 0.")
-        return True
-
-
-    def validate_percentage(self, percentage):
-        if percentage is None:
-            messagebox.showinfo("Error", "Please enter a valid percentage.")
-            return False
-        if not isinstance(percentage, (int, float)):
-            raise TypeError("Percentage must be a number.")
-        if percentage <= 0:
-            raise ValueError("Percentage must be greater than 0.")
-        return True
-
-
-# --------------------------------------
-# Resize Functions
-# --------------------------------------
-    def resize_to_resolution(self, img, width, height):
-        if not self.validate_dimensions(width, height):
-            return
-        img = img.resize((width, height), Image.LANCZOS)
-        return img
-
-
-    def resize_to_percentage(self, img, percentage):
-        if not self.validate_percentage(percentage):
-            return
-        width = int(img.size[0] * percentage)
-        height = int(img.size[1] * percentage)
-        img = img.resize((width, height), Image.LANCZOS)
-        return img
-
-
-    def resize_to_width(self, img, width):
-        if not self.validate_dimension(width):
-            return
-        wpercent = (width / float(img.size[0]))
-        hsize = int((float(img.size[1]) * float(wpercent)))
-        img = img.resize((width, hsize), Image.LANCZOS)
-        return img
-
-
-    def resize_to_height(self, img, height):
-        if not self.validate_dimension(height):
-            return
-        hpercent = (height / float(img.size[1]))
-        wsize = int((float(img.size[0]) * float(hpercent)))
-        img = img.resize((wsize, height), Image.LANCZOS)
-        return img
-
-
-    def resize_to_shorter_side(self, img, size):
-        if not self.validate_dimension(size):
-            return
-        if img.size[0] < img.size[1]:
-            wpercent = (size / float(img.size[0]))
-            hsize = int((float(img.size[1]) * float(wpercent)))
-            img = img.resize((size, hsize), Image.LANCZOS)
-        else:
-            hpercent = (size / float(img.size[1]))
-            wsize = int((float(img.size[0]) * float(hpercent)))
-            img = img.resize((wsize, size), Image.LANCZOS)
-        return img
-
-
-    def resize_to_longer_side(self, img, size):
-        if not self.validate_dimension(size):
-            return
-        if img.size[0] > img.size[1]:
-            wpercent = (size / float(img.size[0]))
-            hsize = int((float(img.size[1]) * float(wpercent)))
-            img = img.resize((size, hsize), Image.LANCZOS)
-        else:
-            hpercent = (size / float(img.size[1]))
-            wsize = int((float(img.size[0]) * float(hpercent)))
-            img = img.resize((wsize, size), Image.LANCZOS)
-        return img
-
-
 # --------------------------------------
 # Resize Conditions
 # --------------------------------------
     def should_resize(self, original_size, new_size):
-        if original_size == new_size:
-            return False
-        resize_condition = self.resize_condition_var.get()
-        if resize_condition == "Upscale Only":
-            return new_size > original_size
-        elif resize_condition == "Downscale Only":
-            return new_size < original_size
-        elif resize_condition == "Percentage":
-            return True
-        else:  # "Upscale and Downscale"
-            return True
-
-
-    def calculate_resize_mode(self, img, resize_mode, width, height):
-        original_size = img.size
-        if resize_mode == "Resolution":
-            new_size = (width, height)
-            if self.should_resize(original_size, new_size):
-                img = self.resize_to_resolution(img, width, height)
-        elif resize_mode == "Percentage":
-            percentage = width / 100
-            new_size = (int(original_size[0] * percentage), int(original_size[1] * percentage))
-            if self.should_resize(original_size, new_size):
-                img = self.resize_to_percentage(img, percentage)
-        elif resize_mode == "Width":
-            new_size = (width, original_size[1])
-            if self.should_resize(original_size, new_size):
-                img = self.resize_to_width(img, width)
-        elif resize_mode == "Height":
-            new_size = (original_size[0], height)
-            if self.should_resize(original_size, new_size):
-                img = self.resize_to_height(img, height)
-        elif resize_mode == "Shorter Side":
-            new_size = (width, width)
-            if self.should_resize(original_size, new_size):
-                img = self.resize_to_shorter_side(img, width)
-        elif resize_mode == "Longer Side":
-            new_size = (height, height)
-            if self.should_resize(original_size, new_size):
-                img = self.resize_to_longer_side(img, width)
-        return img
+        return should_resize(original_size, new_size, self.resize_condition_var.get())
 
 
     def get_resize_confirmation(self, output_folder_path):
@@ -738,21 +710,10 @@ class BatchResizeImages:
         height_entry = self.height_entry.get()
         width = int(width_entry) if width_entry else None
         height = int(height_entry) if height_entry else None
-        if resize_mode == "Resolution" and (width is None or height is None):
-            if not silent:
-                messagebox.showinfo("Error", "Please enter a valid width and height.")
-            return None
-        elif resize_mode == "Percentage" and width is None:
-            if not silent:
-                messagebox.showinfo("Error", "Please enter a valid percentage.")
-            return None
-        elif resize_mode in ["Width", "Shorter Side", "Longer Side"] and width is None:
+        error = resize_values_error(resize_mode, width, height)
+        if error:
             if not silent:
-                messagebox.showinfo("Error", "Please enter a valid width.")
-            return None
-        elif resize_mode == "Height" and height is None:
-            if not silent:
-                messagebox.showinfo("Error", "Please enter a valid height.")
+                messagebox.showinfo("Error", error)
             return None
         return resize_mode, width, height
 
@@ -798,15 +759,9 @@ class BatchResizeImages:
                             self.button_cancel.config(state="disabled")
                             break
                         try:
-                            img = Image.open(os.path.join(self.working_dir, filename))
-                            if img is None:
-                                return
-                            img = img.convert('RGB')
-                            # Only apply resizing if not in convert-only mode.
-                            if not self.convert_only_var.get():
-                                img = self.calculate_resize_mode(img, resize_mode, width, height)
-                            dest_image_path = self.save_image(img, output_folder_path, filename, total_images)
                             src_image_path = os.path.join(self.working_dir, filename)
+                            dest_image_path = output_path_for(output_folder_path, filename, self.filetype_var.get(), self.overwrite_files_var.get())
+                            resize_file(src_image_path, dest_image_path, resize_mode, width, height, self.resize_condition_var.get(), self.quality_var.get())
                             self.handle_metadata(filename, src_image_path, dest_image_path)
                             self.files_processed += 1
                             self.percent_complete.set((image_index + 1) / total_images * 100)
@@ -833,23 +788,6 @@ class BatchResizeImages:
         return self.resize_thread is not None and self.resize_thread.is_alive()
 
 
-    def save_image(self, img, output_folder_path, filename, total_images):
-        if 'icc_profile' in img.info:
-            del img.info['icc_profile']
-        filetype = self.filetype_var.get().lower()
-        base_filename, original_extension = os.path.splitext(filename)
-        if filetype == "auto":
-            filetype = original_extension[1:]
-        filename_with_new_extension = f"{base_filename}.{filetype}"
-        counter = 1
-        if not self.overwrite_files_var.get():
-            while os.path.exists(os.path.join(output_folder_path, filename_with_new_extension)):
-                filename_with_new_extension = f"{base_filename}_{counter}.{filetype}"
-                counter += 1
-        img.save(os.path.join(output_folder_path, filename_with_new_extension), quality=self.quality_var.get(), optimize=True)
-        return os.path.join(output_folder_path, filename_with_new_extension)
-
-
 #endregion
 #region  Handle Metadata
 
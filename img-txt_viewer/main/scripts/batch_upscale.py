@@ -35,6 +35,7 @@ class BatchUpscale:
         self.app: 'Main' = None
         self.root: 'tk.Tk' = None
         self.working_dir = None
+        self.file_probe_job = None
 
         # Other Filepaths
         self.executable_path = None
@@ -268,26 +269,32 @@ class BatchUpscale:
 
 
     def populate_file_tree(self):
+        if self.file_probe_job:
+            self.file_probe_job.cancel()
         self.file_tree.delete(*self.file_tree.get_children())
         scaling_factor = float(self.upscale_factor_value.get())
         input_path = self.input_path_var.get()
         if not os.path.isdir(input_path):
             input_path = os.path.dirname(input_path)
         file_list = self._get_sorted_file_list(input_path)
+        # Rows are listed now, dimensions are filled in as the shared image probe reads them
+        item_by_path = {}
         for file in file_list:
-            filepath = os.path.join(input_path, file)
-            try:
-                with Image.open(filepath) as img:
-                    width, height = img.size
-                    dimensions = f"{width}x{height}"
-                    new_width = int(width * scaling_factor)
-                    new_height = int(height * scaling_factor)
-                    new_dimensions = f"{new_width}x{new_height}"
-            except Exception:
+            item = self.file_tree.insert("", "end", values=(file, "...", "...", os.path.splitext(file)[1]))
+            item_by_path[os.path.join(input_path, file)] = item
+        self.file_probe_job = self.app.image_probe.probe_async(self.root, list(item_by_path), lambda results: self._fill_file_tree_rows(item_by_path, results, scaling_factor))
+
+
+    def _fill_file_tree_rows(self, item_by_path, results, scaling_factor):
+        for filepath, header in results:
+            if header:
+                dimensions = header.dimensions
+                new_dimensions = f"{int(header.width * scaling_factor)}x{int(header.height * scaling_factor)}"
+            else:
                 dimensions = "0x0"
                 new_dimensions = "0x0"
-            ext = os.path.splitext(file)[1]
-            self.file_tree.insert("", "end", values=(file, dimensions, new_dimensions, ext))
+            values = self.file_tree.item(item_by_path[filepath], "values")
+            self.file_tree.item(item_by_path[filepath], values=(values[0], dimensions, new_dimensions, values[3]))
 
 
     def get_selection_details(self):
@@ -697,9 +704,8 @@ class BatchUpscale:
 
 
     def get_image_index(self, directory, filename):
-        filename = os.path.basename(filename)
-        image_files = sorted((file for file in os.listdir(directory) if file.lower().endswith(self.supported_filetypes)), key=self.app.get_file_sort_key(), reverse=self.app.reverse_load_order_var.get())
-        return image_files.index(filename) if filename in image_files else -1
+        # The upscaled copy may be a new file, which is added to the app's lists on its own
+        return self.app.add_image_file(os.path.join(directory, os.path.basename(filename)))
 
 
     def delete_converted_image(self):
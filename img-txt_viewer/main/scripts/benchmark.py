@@ -0,0 +1,430 @@
+"""
+Benchmarks for the headless engines, run on a reproducible synthetic dataset.
+
+    python -m main.scripts.benchmark [--images 500] [--output results.json] [--compare previous.json]
+
+Run from the img-txt_viewer folder. A dataset is generated with synthetic_dataset
+(into a temporary folder, or into --dataset to reuse it between runs), every
+benchmark is timed and the results are written as JSON. Timings are in
+milliseconds. --compare prints the change in each median against an earlier
+results file, and --max-regression makes the run exit with 1 when any median is
+that many percent slower.
+"""
+
+
+#region Imports
+
+
+# Standard
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+# Local
+from main.scripts import synthetic_dataset
+
+# Typing
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+#endregion
+#region Constants
+
+
+# Bump when benchmarks change in a way that makes older results incomparable
+BENCHMARK_VERSION = 1
+
+# Extensions refresh_file_lists() loads
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif", ".mp4")
+
+# Image Grid thumbnail sizes, small/medium/large
+GRID_SIZES = ((45, 45), (80, 80), (170, 170))
+
+# Image sizes each Edit Panel adjustment is timed on
+EDIT_SIZES = ((1024, 768), (2048, 1536))
+
+# Large enough to be processed in strips, only timed with every adjustment at once
+EDIT_TILED_SIZE = (6144, 4096)
+
+# Tags typed one letter at a time for the autocomplete benchmark
+AUTOCOMPLETE_TAGS = 100
+
+
+#endregion
+#region Timing
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency statistics, in milliseconds, of samples in seconds."""
+    ordered = sorted(samples)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "min_ms": _ms(ordered[0]),
+        "median_ms": _ms(statistics.median(ordered)),
+        "p90_ms": _ms(percentile(90)),
+        "p99_ms": _ms(percentile(99)),
+        "max_ms": _ms(ordered[-1]),
+        "mean_ms": _ms(statistics.fmean(ordered)),
+    }
+
+
+def time_call(function: Callable[[], Any], repeat: int) -> Tuple[Dict[str, float], Any]:
+    """Statistics of repeat calls to function, and the last call's result."""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples), result
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+#endregion
+#region Dataset
+
+
+class Dataset:
+    """A generated dataset, listed the way the app lists a folder."""
+    def __init__(self, folder: str, manifest: Dict[str, Any], scratch: str) -> None:
+        self.folder = folder
+        self.manifest = manifest
+        # Caption index and other files the benchmarks write, kept out of the dataset
+        self.scratch = scratch
+        self.image_files, self.text_files, _ = list_pairs(folder)
+        self.existing_text_files = [path for path in self.text_files if os.path.exists(path)]
+
+
+def natural_sort(string: str) -> list:
+    return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', string)]
+
+
+def list_pairs(folder: str) -> Tuple[List[str], List[str], List[str]]:
+    """(image files, text files, new text files) like ImgTxtViewer.refresh_file_lists() with the default load order."""
+    image_files, text_files, new_text_files = [], [], []
+    for filename in sorted(os.listdir(folder), key=natural_sort):
+        if filename.lower().endswith(IMAGE_EXTENSIONS):
+            image_files.append(os.path.join(folder, filename))
+            text_path = os.path.join(folder, os.path.splitext(filename)[0] + ".txt")
+            if not os.path.exists(text_path):
+                new_text_files.append(filename)
+            text_files.append(text_path)
+    return image_files, text_files, new_text_files
+
+
+#endregion
+#region Benchmarks
+
+
+def bench_file_listing(dataset: Dataset, options: argparse.Namespace) -> Dict[str, Any]:
+    """Listing the folder, the file index lookups, and the tag and caption indexes."""
+    from main.scripts.file_index import FileIndex
+    from main.scripts.tag_index import TagIndex
+    from main.scripts import caption_index
+    results = {}
+    results["list_pairs"], _ = time_call(lambda: list_pairs(dataset.folder), options.repeat)
+    files = list(dataset.image_files)
+
+    def lookup_all():
+        file_index = FileIndex(lambda: files)
+        for path in files:
+            file_index.index_of(path)
+
+    results["file_index_lookup_all"], _ = time_call(lookup_all, options.repeat)
+    tag_index = TagIndex(lambda: dataset.text_files)
+    results["tag_index_cold"], _ = time_call(lambda: (tag_index.clear(), tag_index.refresh()), options.repeat)
+    results["tag_index_warm"], _ = time_call(tag_index.refresh, options.repeat)
+    index_path = os.path.join(dataset.scratch, "caption_index.sqlite3")
+
+    def sync_cold():
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(index_path + suffix):
+                os.remove(index_path + suffix)
+        index = caption_index.CaptionIndex(dataset.folder, index_path)
+        index.sync(dataset.text_files)
+        index.close()
+
+    results["caption_index_cold"], _ = time_call(sync_cold, options.repeat)
+    index = caption_index.CaptionIndex(dataset.folder, index_path)
+    try:
+        results["caption_index_warm"], _ = time_call(lambda: index.sync(dataset.text_files), options.repeat)
+        vocabulary = dataset.manifest["vocabulary"]
+        queries = {"common_tag": vocabulary[0], "rare_tag": vocabulary[-1], "and_not": f"{vocabulary[1]} + !{vocabulary[2]}", "or": f"{vocabulary[3]} ~ {vocabulary[4]}"}
+        for name, query in queries.items():
+            results[f"filter_{name}"], _ = time_call(lambda: index.filter(query), options.repeat)
+    finally:
+        index.close()
+    return results
+
+
+def bench_autocomplete(dataset: Dataset, options: argparse.Namespace) -> Dict[str, Any]:
+    """Loading a dictionary, then get_suggestion() for each letter of tags typed one letter at a time."""
+    from main.scripts.Autocomplete import Autocomplete
+    load, autocomplete = time_call(lambda: Autocomplete(options.dictionary, include_my_tags=False), 1)
+    if not autocomplete.autocomplete_dict:
+        raise ValueError(f"Dictionary not found or empty: {options.dictionary}")
+    rng = random.Random(options.seed)
+    names = sorted(autocomplete.autocomplete_dict)
+    tags = rng.sample(names, min(AUTOCOMPLETE_TAGS, len(names)))
+    samples = []
+    for tag in tags:
+        for length in range(1, min(len(tag), 12) + 1):
+            text = tag[:length].replace("_", " ")
+            start = time.perf_counter()
+            autocomplete.get_suggestion(text)
+            samples.append(time.perf_counter() - start)
+    return {"dictionary": options.dictionary, "entries": len(names), "load": load, "get_suggestion": summarize(samples)}
+
+
+def bench_extract_tags(dataset: Dataset, options: argparse.Namespace) -> Dict[str, Any]:
+    """TagEditor.extract_tags_from_files() over every text file."""
+    from main.scripts import TagEditor
+    stats, tags = time_call(lambda: TagEditor.extract_tags_from_files(dataset.existing_text_files), options.repeat)
+    return {"files": len(dataset.existing_text_files), "unique_tags": len(tags), "extract_tags_from_files": stats}
+
+
+def bench_file_stats(dataset: Dataset, options: argparse.Namespace) -> Dict[str, Any]:
+    """CalculateFileStats.compute_stats(), text only and with images."""
+    from main.scripts.calculate_file_stats import CalculateFileStats
+    calculator = CalculateFileStats()
+
+    def compute(process_images):
+        return calculator.compute_stats(dataset.text_files, dataset.image_files, process_images=process_images, directory=dataset.folder)
+
+    text_only, _ = time_call(lambda: compute(False), options.repeat)
+    full, _ = time_call(lambda: compute(True), options.repeat)
+    return {"text_only": text_only, "with_images": full}
+
+
+def bench_dedupe(dataset: Dataset, options: argparse.Namespace) -> Dict[str, Any]:
+    """FindDupeFile: a duplicate scan of the images, and hashing every image outright."""
+    from main.scripts import find_dupe_file
+    files = dataset.image_files
+    scan, (duplicates, _) = time_call(lambda: find_dupe_file.find_duplicate_files(files, "md5", options.workers), options.repeat)
+    total_bytes = sum(os.path.getsize(path) for path in files)
+    results = {"files": len(files), "bytes": total_bytes, "duplicates": len(duplicates), "find_duplicate_files": scan}
+    for mode in find_dupe_file.HASH_MODES:
+        stats, _ = time_call(lambda: [find_dupe_file.file_hash(path, mode) for path in files], options.repeat)
+        stats["mb_per_second"] = round(total_bytes / 1e6 / max(stats["median_ms"] / 1000, 1e-9), 1)
+        results[f"hash_all_{mode}"] = stats
+    return results
+
+
+def bench_thumbnails(dataset: Dataset, options: argparse.Namespace) -> Dict[str, Any]:
+    """Image Grid thumbnails, one at a time at each size and in parallel at the large size, plus video probes."""
+    from main.scripts.image_grid import make_thumbnail
+    images = [path for path in dataset.image_files if not path.lower().endswith(".mp4")]
+    videos = [path for path in dataset.image_files if path.lower().endswith(".mp4")]
+    results = {"images": len(images)}
+    for size in GRID_SIZES:
+        samples = []
+        for path in images:
+            start = time.perf_counter()
+            make_thumbnail(path, size)
+            samples.append(time.perf_counter() - start)
+        results[f"make_thumbnail_{size[0]}"] = summarize(samples)
+    size = GRID_SIZES[-1]
+
+    def parallel():
+        with ThreadPoolExecutor(max_workers=options.workers) as executor:
+            list(executor.map(lambda path: make_thumbnail(path, size), images))
+
+    stats, _ = time_call(parallel, options.repeat)
+    stats["images_per_second"] = round(len(images) / max(stats["median_ms"] / 1000, 1e-9), 1)
+    results[f"parallel_{size[0]}"] = stats
+    if videos:
+        from main.scripts.media_probe import MediaProbe
+
+        def probe():
+            # A new probe each time, so nothing is cached
+            return MediaProbe(max_workers=options.workers).probe_many(videos)
+
+        results["video_probe"], _ = time_call(probe, options.repeat)
+        results["videos"] = len(videos)
+    return results
+
+
+def bench_edit_adjustments(dataset: Dataset, options: argparse.Namespace) -> Dict[str, Any]:
+    """The Edit Panel adjustments, each on its own and all together, at a few image sizes."""
+    from main.scripts import image_adjustments
+    adjustments = {option: {"value": 30} for option in image_adjustments.ADJUSTMENT_OPTIONS}
+    results = {}
+    for size in EDIT_SIZES + (EDIT_TILED_SIZE,):
+        image = synthetic_dataset.make_image(random.Random(options.seed), size)
+        size_results = {}
+        if size != EDIT_TILED_SIZE:
+            for option, args in adjustments.items():
+                size_results[option], _ = time_call(lambda: image_adjustments.apply_adjustments(image, {option: args}), options.repeat)
+        size_results["all"], _ = time_call(lambda: image_adjustments.apply_adjustments(image, adjustments), options.repeat)
+        results[f"{size[0]}x{size[1]}"] = size_results
+    return results
+
+
+BENCHMARKS: Dict[str, Callable[[Dataset, argparse.Namespace], Dict[str, Any]]] = {
+    "file_listing": bench_file_listing,
+    "autocomplete": bench_autocomplete,
+    "extract_tags": bench_extract_tags,
+    "file_stats": bench_file_stats,
+    "dedupe": bench_dedupe,
+    "thumbnails": bench_thumbnails,
+    "edit_adjustments": bench_edit_adjustments,
+}
+
+
+#endregion
+#region Compare
+
+
+def medians(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Flatten results to {"benchmark/metric": median_ms}."""
+    found = {}
+    for key, value in results.items():
+        if not isinstance(value, dict):
+            continue
+        path = f"{prefix}/{key}" if prefix else key
+        if "median_ms" in value:
+            found[path] = value["median_ms"]
+        else:
+            found.update(medians(value, path))
+    return found
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any]) -> List[Tuple[str, float, float, float]]:
+    """(metric, previous ms, current ms, change in percent) for the metrics in both results."""
+    old, new = medians(previous.get("results", {})), medians(current.get("results", {}))
+    rows = []
+    for path in new:
+        if path in old and old[path] > 0:
+            rows.append((path, old[path], new[path], (new[path] - old[path]) / old[path] * 100))
+    return rows
+
+
+def print_comparison(rows: List[Tuple[str, float, float, float]], stream=sys.stderr) -> None:
+    width = max((len(row[0]) for row in rows), default=0)
+    for path, old, new, change in rows:
+        stream.write(f"{path:<{width}}  {old:>11.3f} ms  {new:>11.3f} ms  {change:+7.1f}%\n")
+
+
+#endregion
+#region Main
+
+
+def environment() -> Dict[str, Any]:
+    import PIL
+    import numpy
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "pillow": PIL.__version__,
+        "numpy": numpy.__version__,
+    }
+
+
+def run_benchmarks(dataset: Dataset, names: List[str], options: argparse.Namespace, log=sys.stderr) -> Dict[str, Any]:
+    """Run the named benchmarks, a failing benchmark records its error and the others still run."""
+    results = {}
+    for name in names:
+        log.write(f"{name}...\n")
+        log.flush()
+        start = time.perf_counter()
+        try:
+            results[name] = BENCHMARKS[name](dataset, options)
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+        log.write(f"{name}: {time.perf_counter() - start:.1f}s\n")
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m main.scripts.benchmark", description="Benchmark the img-txt_viewer engines on a synthetic dataset.")
+    parser.add_argument("--images", type=int, default=500, help="Images in the generated dataset (default: %(default)s)")
+    parser.add_argument("--videos", type=int, default=0, help="MP4s in the generated dataset, needs PyAV (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dataset", help="Generate the dataset here and keep it, or reuse it if it was generated with the same options")
+    parser.add_argument("--only", help=f"Comma separated benchmarks to run: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=5, help="Times each timed call is repeated (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1), help="Threads for the parallel benchmarks (default: %(default)s)")
+    parser.add_argument("--dictionary", default="danbooru.csv", help="Autocomplete dictionary in main/dict (default: %(default)s)")
+    parser.add_argument("--output", help="Write the results here instead of stdout")
+    parser.add_argument("--compare", help="Earlier results to compare against")
+    parser.add_argument("--max-regression", type=float, metavar="PERCENT", help="With --compare, exit with 1 if a median is this much slower")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    options = parser.parse_args(argv)
+    names = [name.strip() for name in options.only.split(",")] if options.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(unknown)}")
+    previous = None
+    if options.compare:
+        with open(options.compare, "r", encoding="utf-8") as file:
+            previous = json.load(file)
+    scratch = tempfile.mkdtemp(prefix="img-txt_viewer-benchmark-")
+    try:
+        folder = options.dataset or os.path.join(scratch, "dataset")
+        sys.stderr.write(f"Dataset: {folder}\n")
+        manifest = synthetic_dataset.generate_dataset(
+            folder, images=options.images, videos=options.videos, seed=options.seed,
+            progress_callback=lambda done, total: sys.stderr.write(f"\rGenerating {done}/{total}") if done == total or done % 25 == 0 else None
+        )
+        sys.stderr.write("\n")
+        dataset = Dataset(folder, manifest, os.path.join(scratch, "work"))
+        os.makedirs(dataset.scratch, exist_ok=True)
+        report = {
+            "benchmark_version": BENCHMARK_VERSION,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "environment": environment(),
+            "dataset": {key: value for key, value in manifest.items() if key != "vocabulary"},
+            "options": {"repeat": options.repeat, "workers": options.workers, "dictionary": options.dictionary},
+            "results": run_benchmarks(dataset, names, options),
+        }
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    text = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+    if previous is not None:
+        rows = compare(previous, report)
+        print_comparison(rows)
+        if options.max_regression is not None and any(change > options.max_regression for _, _, _, change in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+
+#endregion
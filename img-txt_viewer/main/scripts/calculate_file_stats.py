@@ -24,11 +24,16 @@ if TYPE_CHECKING:
 
 
 class CalculateFileStats:
-    def __init__(self, app: 'Main', root: 'Tk'):
+    def __init__(self, app: 'Main' = None, root: 'Tk' = None):
+        # app is None when stats are calculated from the command line
         self.app = app
         self.root = root
         self.caption_counter = Counter()
         self.sorted_captions = []
+        self.truncate_captions = False
+        self.directory = ""
+        # Errors are shown in the app, or collected here without one
+        self.errors = []
         # Internal copies for stats calculation
         self._text_files = []
         self._image_files = []
@@ -45,10 +50,25 @@ class CalculateFileStats:
         """
         if text_only and image_only:
             raise ValueError("Cannot set both text_only and image_only to True")
+        self.truncate_captions = self.app.truncate_stat_captions_var.get()
+        process_images = (self.app.process_image_stats_var.get() and not text_only) or image_only
+        stats = self.compute_stats(self.app.text_files, self.app.image_files, process_text=not image_only, process_images=process_images, directory=self.app.image_dir.get())
+        # Format statistics into a text string
+        stats_text = self.format_stats_text(stats)
+        self.update_filestats_textbox(stats_text, manual_refresh)
+        if not image_only:
+            # The text files were just read into the tag index, so this only checks them
+            self.app.text_controller.my_tags.refresh_all_tags_listbox()
+
+
+    def compute_stats(self, text_files, image_files, process_text=True, process_images=True, directory=""):
+        """Calculate the statistics of a set of text and media files, without touching the UI. Returns the stats dict."""
         self.initialize_counters()
+        self.errors = []
+        self.directory = directory
         # Use internal copies, do not modify app
-        self._text_files = [f for f in self.app.text_files if os.path.exists(f)]
-        self._image_files = list(self.app.image_files)
+        self._text_files = [f for f in text_files if os.path.exists(f)]
+        self._image_files = list(image_files)
         self._video_thumb_dict = dict(getattr(self.app, "video_thumb_dict", {}))
         num_txt_files = len(self._text_files)
         num_img_files = sum(1 for f in self._image_files if not f.lower().endswith('.mp4'))
@@ -56,15 +76,18 @@ class CalculateFileStats:
         num_total_files = num_img_files + num_txt_files + num_video_files
         formatted_total_files = f"{num_total_files} (Text: {num_txt_files}, Images: {num_img_files}, Videos: {num_video_files})"
         # Process files based on flags
-        if not image_only:
+        if process_text:
             self.process_text_files()
-        if (self.app.process_image_stats_var.get() and not text_only) or image_only:
+        if process_images:
             self.process_image_files()
-        # Format statistics into a text string
-        stats_text = self.compile_file_statistics(formatted_total_files)
-        self.update_filestats_textbox(stats_text, manual_refresh)
-        if self.sorted_captions:
-            self.app.text_controller.my_tags.refresh_all_tags_listbox(tags=self.sorted_captions)
+        return self.compile_file_statistics(formatted_total_files)
+
+
+    def show_error(self, title, message):
+        if self.app is None:
+            self.errors.append(message)
+        else:
+            messagebox.showerror(title, message)
 
 
     def initialize_counters(self):
@@ -117,6 +140,8 @@ class CalculateFileStats:
         for text_file in self._text_files:
             try:
                 file_content, words, sentences, paragraphs, captions = self.compute_text_file(text_file)
+                if self.app is not None:
+                    self.app.tag_index.update(text_file, file_content)
                 self.total_chars += len(file_content)
                 self.total_words += len(words)
                 self.word_counter.update(words)
@@ -141,7 +166,7 @@ class CalculateFileStats:
             except FileNotFoundError:
                 pass
             except Exception as e:
-                messagebox.showerror("Error: calculate_file_stats.process_text_files()", f"An error occurred while processing {os.path.basename(text_file)}:\n\n{e}")
+                self.show_error("Error: calculate_file_stats.process_text_files()", f"An error occurred while processing {os.path.basename(text_file)}:\n\n{e}")
 
 
     def process_image_files(self):
@@ -170,7 +195,7 @@ class CalculateFileStats:
             except FileNotFoundError:
                 pass
             except Exception as e:
-                messagebox.showerror("Error: calculate_file_stats.process_image_files()", f"An error occurred while processing {os.path.basename(media_file)}:\n\n{e}")
+                self.show_error("Error: calculate_file_stats.process_image_files()", f"An error occurred while processing {os.path.basename(media_file)}:\n\n{e}")
 
 
     def process_video_file(self, video_file):
@@ -178,9 +203,11 @@ class CalculateFileStats:
         try:
             file_size = os.path.getsize(video_file)
             self.total_video_filesize += file_size
-            # Get video information from local copy
-            if video_file in self._video_thumb_dict:
-                video_info = self._video_thumb_dict[video_file]
+            # Get video information from local copy, or the shared probe cache
+            video_info = self._video_thumb_dict.get(video_file)
+            if not video_info and self.app is not None:
+                video_info = self.app.media_probe.probe(video_file)
+            if video_info:
                 width, height = video_info['resolution']
                 framerate = video_info.get('framerate', 0)
                 # Update counters
@@ -202,13 +229,13 @@ class CalculateFileStats:
                 else:
                     self.portrait_videos += 1
             else:
-                # If video is not in thumb dict, just count it
+                # If the video can't be read, just count it
                 self.video_count += 1
                 self.video_formats.add('.mp4')
                 self.video_formats_counter['.mp4'] += 1
 
         except Exception as e:
-            messagebox.showerror("Error: calculate_file_stats.process_video_file()", f"An error occurred while processing {os.path.basename(video_file)}:\n\n{e}")
+            self.show_error("Error: calculate_file_stats.process_video_file()", f"An error occurred while processing {os.path.basename(video_file)}:\n\n{e}")
 
 
 #endregion
@@ -216,7 +243,7 @@ class CalculateFileStats:
 
 
     def compile_file_statistics(self, formatted_total_files):
-        """Compile all calculated statistics into a text string."""
+        """Compile all calculated statistics into a dictionary, see format_stats_text()."""
         # Calculate average statistics
         avg_chars = self.total_chars / len(self._text_files) if self._text_files else 0
         avg_words = self.total_words / len(self._text_files) if self._text_files else 0
@@ -257,7 +284,7 @@ class CalculateFileStats:
         top_5_files_captions = sorted(self.file_caption_counts, key=lambda x: (-x[1], x[0].lower()))[:5]
         formatted_top_5_files_captions = "\n".join([f"{count}x, {file}" for file, count in top_5_files_captions])
         word_page_count = self.total_words / 500 if self.total_words > 0 else 0
-        formatted_filepath = os.path.normpath(self.app.image_dir.get())
+        formatted_filepath = os.path.normpath(self.directory) if self.directory else ""
         formatted_total_filesize = self.format_filesize(self.total_image_filesize + self.total_text_filesize + self.total_video_filesize)
         # Format statistics into a dictionary
         stats = {
@@ -308,8 +335,7 @@ class CalculateFileStats:
             'std_dev_sentence_length': std_dev_sentence_length,
             'avg_caption_length': avg_caption_length,
         }
-        stats_text = self.format_stats_text(stats)
-        return stats_text
+        return stats
 
 
     def format_stats_text(self, stats):
@@ -446,7 +472,7 @@ class CalculateFileStats:
         """Update the caption counter with the captions from a text file."""
         for caption in captions:
             caption_words = caption.split()
-            if self.app.truncate_stat_captions_var.get() and (len(caption_words) > 8 or len(caption) > 50):
+            if self.truncate_captions and (len(caption_words) > 8 or len(caption) > 50):
                 caption = ' '.join(caption_words[:8]) + "..." if len(caption_words) > 8 else caption[:50] + "..."
             self.caption_counter[caption] += 1
 
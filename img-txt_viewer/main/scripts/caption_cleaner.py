@@ -0,0 +1,170 @@
+#region Imports
+
+
+# Standard
+import os
+import re
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+# Typing
+from typing import Dict, List, Tuple, Optional
+
+
+#endregion
+#region Tokenizer
+
+
+# Each pattern matches only the runs that need rewriting; everything else is passed through untouched:
+#   sep   - a separator with its surrounding spaces, including ". " which becomes a separator.
+#           An already clean ", " / newline is skipped by the leading lookahead.
+#   comma - a comma run, or a comma missing its space (list mode only, CSV mode commas are separators)
+#   space - a run of two or more spaces
+#   slash - a run of two or more backslashes
+# The leading lookahead on the first character lets the scanner skip plain caption text quickly.
+_CSV_TOKENS = re.compile(r"(?=[ ,.\\])(?:(?P<sep>(?!, [^\s,.])[ ]*(?:(?:,|\.\s)[ ]*)+)|(?P<space>[ ]{2,})|(?P<slash>\\{2,}))")
+_LIST_TOKENS = re.compile(r"(?=[ \n.,\\])(?:(?P<sep>(?!\n[^ \n.])[ ]*(?:(?:\n|\.\s)[ ]*)+)|(?P<comma>,{2,}|,(?=\S))|(?P<space>[ ]{2,})|(?P<slash>\\{2,}))")
+_LIST_SEP_UNITS = re.compile(r"\.\s|\n")
+
+
+#endregion
+#region Cleaner
+
+
+def remove_duplicate_captions(text: str, list_mode: bool = False) -> str:
+    """Strip every caption and drop repeats, keeping the first occurrence."""
+    delimiter = '\n' if list_mode else ','
+    return delimiter.join(dict.fromkeys(item.strip() for item in text.split(delimiter)))
+
+
+def clean_caption(text: str, list_mode: bool = False) -> str:
+    """
+    Remove duplicate captions and normalize separators and spacing in a single tokenizer pass.
+
+    Example (CSV mode):
+        "dog,solo,  ,happy  ,,"  ->  "dog, solo, happy"
+
+    Rules, in the order the previous regex chain applied them:
+        - ". " becomes a separator (", " in CSV mode, a newline in list mode)
+        - Spaces around separators are removed, other space runs become one space
+        - Comma runs become one comma, followed by a space unless whitespace follows
+        - Backslash runs become one backslash
+        - Leading/trailing commas and whitespace are removed
+    """
+    if list_mode:
+        text = remove_duplicate_captions(text, list_mode)
+        return _strip_edges(_LIST_TOKENS.sub(_rewrite_list_token, text))
+    # Captions are stripped, so joining with ", " is what the separator rule would produce anyway,
+    # and lets the tokenizer skip every already clean separator.
+    text = ', '.join(dict.fromkeys(item.strip() for item in text.split(',')))
+    return _strip_edges(_CSV_TOKENS.sub(_rewrite_csv_token, text))
+
+
+def _rewrite_csv_token(match: 're.Match') -> str:
+    kind = match.lastgroup
+    if kind == "sep":
+        return ',' + _space_after_comma(match.string, match.end(), list_mode=False)
+    if kind == "space":
+        return ' '
+    return '\\'
+
+
+def _rewrite_list_token(match: 're.Match') -> str:
+    kind = match.lastgroup
+    if kind == "sep":
+        return '\n' * len(_LIST_SEP_UNITS.findall(match.group()))
+    if kind == "comma":
+        return ',' + _space_after_comma(match.string, match.end(), list_mode=True)
+    if kind == "space":
+        return ' '
+    return '\\'
+
+
+def _space_after_comma(text: str, end: int, list_mode: bool) -> str:
+    """A comma is followed by a space unless the next output character is whitespace (or there is none)."""
+    if end >= len(text) or text[end].isspace():
+        return ''
+    # In list mode ". " after a comma is rewritten to a newline
+    if list_mode and text[end] == '.' and end + 1 < len(text) and text[end + 1].isspace():
+        return ''
+    return ' '
+
+
+def _strip_edges(text: str) -> str:
+    """Trailing commas, then trailing spaces (before a final newline too), then leading/trailing commas and whitespace."""
+    for char in (',', ' '):
+        if text.endswith('\n'):
+            text = text[:-1].rstrip(char) + '\n'
+        else:
+            text = text.rstrip(char)
+    return text.strip(',').strip()
+
+
+#endregion
+#region Batch
+
+
+# Files with fewer than this many entries are cleaned in-process
+PARALLEL_THRESHOLD = 500
+
+
+def content_digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def clean_file(text_file: str, list_mode: bool = False, clean: bool = True) -> Tuple[str, Optional[str]]:
+    """
+    Clean a single text file in place, only writing it if the content changed.
+    Returns (text_file, digest of the cleaned content), or (text_file, None) if it is missing.
+    """
+    if not os.path.exists(text_file):
+        return text_file, None
+    with open(text_file, "r", encoding="utf-8") as f:
+        original = f.read()
+    text = original.strip()
+    if clean:
+        text = clean_caption(text, list_mode)
+    if text != original:
+        with open(text_file, "w", encoding="utf-8") as f:
+            f.write(text)
+    return text_file, content_digest(text)
+
+
+def _clean_file_args(args: Tuple[str, bool, bool]) -> Tuple[str, Optional[str]]:
+    return clean_file(*args)
+
+
+def clean_files(text_files: List[str], list_mode: bool = False, clean: bool = True, cache: Optional[Dict[str, Tuple[bool, bool, str]]] = None, max_workers: Optional[int] = None) -> int:
+    """
+    Clean many text files, in a process pool when there are enough of them.
+
+    cache maps text_file -> (list_mode, clean, digest of the last cleaned content).
+    Files whose current content still matches that digest are skipped. The cache
+    is updated in place. Returns the number of files that were processed.
+    """
+    cache = cache if cache is not None else {}
+    todo = []
+    for text_file in text_files:
+        entry = cache.get(text_file)
+        if entry and entry[:2] == (list_mode, clean):
+            try:
+                with open(text_file, "r", encoding="utf-8") as f:
+                    if content_digest(f.read()) == entry[2]:
+                        continue
+            except OSError:
+                pass
+        todo.append((text_file, list_mode, clean))
+    if len(todo) >= PARALLEL_THRESHOLD and (max_workers is None or max_workers > 1):
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_clean_file_args, todo, chunksize=64))
+    else:
+        results = [clean_file(*args) for args in todo]
+    for text_file, digest in results:
+        if digest is None:
+            cache.pop(text_file, None)
+        else:
+            cache[text_file] = (list_mode, clean, digest)
+    return len(results)
+
+
+#endregion
@@ -0,0 +1,362 @@
+#region Imports
+
+
+# Standard
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+from functools import lru_cache
+
+# Local
+from main.scripts.tag_index import split_tags
+
+# Typing
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+#endregion
+#region Constants
+
+
+# Bump when the schema changes, older index files are rebuilt
+SCHEMA_VERSION = 1
+
+# Files read between progress reports and commits while syncing
+SYNC_BATCH = 500
+
+# Shortest term the trigram table can look up, shorter terms scan the stored text
+TRIGRAM_LENGTH = 3
+
+# Folder under the app path that holds one index file per text folder
+INDEX_DIR_NAME = "caption_index"
+
+# Pause after the last keystroke before the Filter tab's match count updates
+COUNT_DELAY_MS = 150
+
+# How long filtering waits on a sync before showing a progress bar
+SYNC_WAIT_SECONDS = 0.3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta(key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files(id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, text TEXT NOT NULL);
+CREATE VIRTUAL TABLE IF NOT EXISTS words USING fts5(text, content='files', content_rowid='id');
+CREATE TABLE IF NOT EXISTS tags(file_id INTEGER NOT NULL, tag TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS tags_by_tag ON tags(tag);
+CREATE INDEX IF NOT EXISTS tags_by_file ON tags(file_id);
+"""
+
+# The trigram tokenizer needs SQLite 3.34 or newer
+GRAMS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS grams USING fts5(text, content='files', content_rowid='id', tokenize='trigram case_sensitive 1');
+"""
+
+
+#endregion
+#region Filter Syntax
+
+
+def parse_filter(filter_string: str) -> Tuple[List[str], List[str]]:
+    """Split a Filter tab string into (included, excluded) terms, terms are joined by ' + ' and '!' excludes."""
+    includes, excludes = [], []
+    for term in filter_string.split(' + '):
+        if term.startswith('!'):
+            excludes.append(term[1:])
+        else:
+            includes.append(term)
+    return includes, excludes
+
+
+def matches_filter(text: str, filter_string: str) -> bool:
+    """The Filter tab's case-sensitive substring test on one caption."""
+    includes, excludes = parse_filter(filter_string)
+    return all(term in text for term in includes) and not any(term in text for term in excludes)
+
+
+#endregion
+#region CaptionIndex
+
+
+@lru_cache(maxsize=None)
+def trigram_supported() -> bool:
+    """Whether this SQLite has the FTS5 trigram tokenizer."""
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("CREATE VIRTUAL TABLE grams USING fts5(text, tokenize='trigram case_sensitive 1')")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+
+
+def index_path(index_dir: str, folder: str) -> str:
+    """Where the index for a folder of text files is kept."""
+    key = hashlib.sha1(os.path.normcase(os.path.abspath(folder)).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(index_dir, f"{key}.sqlite3")
+
+
+class CaptionIndex:
+    """
+    A full-text index of every caption in one folder, stored on disk.
+
+    Captions live in SQLite with two FTS5 tables over them: a case-sensitive
+    trigram table that answers the Filter tab's substring terms, and a word
+    table for word, prefix and NEAR queries. Exact tags are kept in their own
+    table. Files are keyed by name and stamped with their modified time and
+    size, so sync() only re-reads what changed since the index was last used.
+    Without the trigram tokenizer, filters scan the stored captions instead.
+    Safe to use from a worker thread and the UI, calls are serialized.
+    """
+    def __init__(self, folder: str, db_path: str) -> None:
+        self.folder = os.path.normpath(folder)
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self.has_grams = trigram_supported()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        try:
+            self._conn = self._connect()
+        except sqlite3.DatabaseError:
+            # Unreadable index, it is only a cache of the text files
+            os.remove(db_path)
+            self._conn = self._connect()
+
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # An index written without the trigram table is rebuilt once it can have one, and the other way around
+        version = str(SCHEMA_VERSION) if self.has_grams else f"{SCHEMA_VERSION}-scan"
+        stored_version = None
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'meta'").fetchone():
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            stored_version = row[0] if row else None
+        if stored_version != version:
+            for table in ("tags", "words", "grams", "files", "meta"):
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.executescript(SCHEMA + GRAMS_SCHEMA if self.has_grams else SCHEMA)
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,))
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('folder', ?)", (self.folder,))
+        return conn
+
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM files").fetchone()[0]
+
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+#endregion
+#region Updates
+
+
+    def changes(self, paths: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """
+        (changed, removed) for the folder's text files at paths: the paths that are
+        new or modified since they were indexed, and the names no longer there.
+        Only stats the files. Missing files are not indexed.
+        """
+        present = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            present[os.path.basename(path)] = (path, (stat.st_mtime_ns, stat.st_size))
+        with self._lock:
+            known = {name: (mtime_ns, size) for name, mtime_ns, size in self._conn.execute("SELECT name, mtime_ns, size FROM files")}
+        changed = [path for name, (path, stamp) in present.items() if known.get(name) != stamp]
+        removed = [name for name in known if name not in present]
+        return changed, removed
+
+
+    def sync(self, paths: Iterable[str], progress_callback: Optional[Callable[[int, int], None]] = None) -> int:
+        """
+        Bring the index up to date with the folder's text files at paths, every
+        other indexed file is dropped. Returns the number of files re-read or dropped.
+        progress_callback(done, total) is called every SYNC_BATCH files.
+        """
+        changed, removed = self.changes(paths)
+        return self.apply(changed, removed, progress_callback)
+
+
+    def apply(self, changed: List[str], removed: List[str], progress_callback: Optional[Callable[[int, int], None]] = None) -> int:
+        """Re-read the changed paths and drop the removed names, as returned by changes()."""
+        total = len(changed) + len(removed)
+        if not total:
+            return 0
+        # Locked a batch at a time, so queries and saves can interleave with a long sync
+        with self._lock, self._conn:
+            for name in removed:
+                self._drop(name)
+        for start in range(0, len(changed), SYNC_BATCH):
+            with self._lock, self._conn:
+                for path in changed[start:start + SYNC_BATCH]:
+                    self._read(path)
+            if progress_callback:
+                progress_callback(len(removed) + min(start + SYNC_BATCH, len(changed)), total)
+        return total
+
+
+    def update(self, path: str, text: Optional[str] = None) -> bool:
+        """Update one file after it was saved, from text if given. Returns True if the index changed."""
+        with self._lock, self._conn:
+            return self._read(path, text)
+
+
+    def _read(self, path: str, text: Optional[str] = None) -> bool:
+        name = os.path.basename(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return self._drop(name)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        row = self._conn.execute("SELECT id, mtime_ns, size, text FROM files WHERE name = ?", (name,)).fetchone()
+        if row is not None and (row[1], row[2]) == stamp:
+            return False
+        if text is None:
+            try:
+                with open(path, 'r', encoding="utf-8") as file:
+                    text = file.read()
+            except (OSError, UnicodeDecodeError):
+                text = ""
+        if row is not None:
+            file_id = row[0]
+            self._unindex(file_id, row[3])
+            self._conn.execute("UPDATE files SET mtime_ns = ?, size = ?, text = ? WHERE id = ?", (*stamp, text, file_id))
+        else:
+            file_id = self._conn.execute("INSERT INTO files(name, mtime_ns, size, text) VALUES (?, ?, ?, ?)", (name, *stamp, text)).lastrowid
+        if self.has_grams:
+            self._conn.execute("INSERT INTO grams(rowid, text) VALUES (?, ?)", (file_id, text))
+        self._conn.execute("INSERT INTO words(rowid, text) VALUES (?, ?)", (file_id, text))
+        self._conn.executemany("INSERT INTO tags VALUES (?, ?)", [(file_id, tag) for tag in set(split_tags(text))])
+        return True
+
+
+    def _drop(self, name: str) -> bool:
+        row = self._conn.execute("SELECT id, text FROM files WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return False
+        self._unindex(*row)
+        self._conn.execute("DELETE FROM files WHERE id = ?", (row[0],))
+        return True
+
+
+    def _unindex(self, file_id: int, text: str) -> None:
+        # External content tables are told the old text to remove its tokens
+        if self.has_grams:
+            self._conn.execute("INSERT INTO grams(grams, rowid, text) VALUES ('delete', ?, ?)", (file_id, text))
+        self._conn.execute("INSERT INTO words(words, rowid, text) VALUES ('delete', ?, ?)", (file_id, text))
+        self._conn.execute("DELETE FROM tags WHERE file_id = ?", (file_id,))
+
+
+#endregion
+#region Queries
+
+
+    def filter(self, filter_string: str) -> Set[str]:
+        """Names of the files matching a Filter tab string, the same matches as matches_filter()."""
+        if not self.has_grams:
+            with self._lock:
+                return {name for name, text in self._conn.execute("SELECT name, text FROM files") if matches_filter(text, filter_string)}
+        query = self._filter_query(filter_string)
+        if query is None:
+            return set()
+        sql, params = query
+        with self._lock:
+            return {name for name, in self._conn.execute(f"SELECT name FROM files WHERE id IN ({sql})", params)}
+
+
+    def count(self, filter_string: str) -> int:
+        """How many files match a Filter tab string."""
+        if not self.has_grams:
+            return len(self.filter(filter_string))
+        query = self._filter_query(filter_string)
+        if query is None:
+            return 0
+        sql, params = query
+        with self._lock:
+            return self._conn.execute(f"SELECT count(*) FROM ({sql})", params).fetchone()[0]
+
+
+    def names(self) -> Set[str]:
+        """Names of every indexed file."""
+        with self._lock:
+            return {name for name, in self._conn.execute("SELECT name FROM files")}
+
+
+    def regex(self, pattern: str) -> Set[str]:
+        """Names of the files with a re.search() match. Scans the stored captions, no file is read."""
+        compiled = re.compile(pattern)
+        with self._lock:
+            return {name for name, text in self._conn.execute("SELECT name, text FROM files") if compiled.search(text)}
+
+
+    def empty(self) -> Set[str]:
+        """Names of the files with no caption text."""
+        with self._lock:
+            return {name for name, text in self._conn.execute("SELECT name, text FROM files") if not text.strip()}
+
+
+    def with_tag(self, tag: str) -> Set[str]:
+        """Names of the files that have tag exactly, as one of their comma separated tags."""
+        with self._lock:
+            rows = self._conn.execute("SELECT name FROM files JOIN tags ON tags.file_id = files.id WHERE tag = ?", (tag,))
+            return {name for name, in rows}
+
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[str]:
+        """
+        Names of the files matching an FTS5 word query, best matches first.
+        Words are case-insensitive, e.g. 'dog', 'red + ball', 'cat*' or 'NEAR(dog ball, 5)'.
+        Raises ValueError for a malformed query.
+        """
+        sql = "SELECT name FROM words JOIN files ON files.id = words.rowid WHERE words MATCH ? ORDER BY rank"
+        params: Tuple = (query,)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        with self._lock:
+            try:
+                return [name for name, in self._conn.execute(sql, params)]
+            except sqlite3.OperationalError as e:
+                raise ValueError(str(e)) from e
+
+
+    def tag_counts(self) -> Dict[str, int]:
+        """Tag -> number of files that have it."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT tag, count(*) FROM tags GROUP BY tag"))
+
+
+    def _filter_query(self, filter_string: str) -> Optional[Tuple[str, Tuple]]:
+        # Included terms intersect, excluded terms are subtracted. None when nothing can match.
+        includes, excludes = parse_filter(filter_string)
+        if '' in excludes:
+            return None
+        parts = [self._term_query(term) for term in includes if term] or [("SELECT id FROM files", ())]
+        parts_sql = [sql for sql, _ in parts]
+        params = [param for _, part_params in parts for param in part_params]
+        sql = " INTERSECT ".join(parts_sql)
+        for term in excludes:
+            term_sql, term_params = self._term_query(term)
+            sql += f" EXCEPT {term_sql}"
+            params.extend(term_params)
+        return sql, tuple(params)
+
+
+    def _term_query(self, term: str) -> Tuple[str, Tuple]:
+        if len(term) >= TRIGRAM_LENGTH:
+            # A quoted phrase of trigrams matches the exact substring
+            return "SELECT rowid FROM grams WHERE grams MATCH ?", ('"' + term.replace('"', '""') + '"',)
+        return "SELECT id FROM files WHERE instr(text, ?) > 0", (term,)
+
+
+#endregion
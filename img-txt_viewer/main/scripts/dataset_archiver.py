@@ -0,0 +1,418 @@
+"""
+Dataset archiver used by "Archive Dataset".
+
+Formats:
+    - zip       Media is stored (it's already compressed), text is deflated.
+                Use compression="deflate" to deflate everything, or "store" for nothing.
+    - tar       Uncompressed tar.
+    - tar.zst   Tar compressed with Zstandard on all cores. Needs Python 3.14+ or the
+                optional "zstandard" package.
+    - Shards    shard_size splits a tar/tar.zst into numbered shards, written in parallel.
+                With webdataset=True, the files of each sample (image + caption) are
+                written next to each other under a shared key, as WebDataset expects.
+
+update=True refreshes an existing zip. Members whose size and modified time
+match the source file have their compressed bytes copied over as they are,
+only new and changed files are read and compressed. If nothing was changed or removed, new files are simply
+appended to a copy of the archive, which then replaces it.
+
+Files are streamed from disk to the archive, so memory use doesn't depend on
+file size. progress_callback(done, total, name) is called after each member and
+setting cancel_event stops the job and removes the partial output.
+"""
+
+
+#region Imports
+
+
+# Standard
+import os
+import time
+import shutil
+import struct
+import tarfile
+import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Typing
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+#endregion
+#region Constants
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif", ".jfif", ".jpg_large")
+VIDEO_EXTENSIONS = (".mp4",)
+TEXT_EXTENSIONS = (".txt",)
+ARCHIVE_EXTENSIONS = IMAGE_EXTENSIONS + VIDEO_EXTENSIONS + TEXT_EXTENSIONS
+
+# Media formats that don't get smaller when deflated
+_PRECOMPRESSED_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".jfif", ".jpg_large", ".mp4")
+
+# Zip member compression, Zstandard is chosen with a .tar.zst output instead
+COMPRESSION_TYPES = ("auto", "store", "deflate")
+
+_COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class ArchiveCancelled(Exception):
+    """Raised when cancel_event is set while an archive is being written."""
+
+
+#endregion
+#region File Collection
+
+
+def collect_dataset_files(folder_path: str) -> List[str]:
+    """Images, videos and text files directly inside folder_path, sorted by name."""
+    with os.scandir(folder_path) as entries:
+        files = [entry.path for entry in entries if entry.name.lower().endswith(ARCHIVE_EXTENSIONS) and entry.is_file()]
+    return sorted(files, key=lambda path: os.path.basename(path).lower())
+
+
+def count_file_types(file_list: List[str]) -> Dict[str, int]:
+    """Number of image, video and text files in file_list."""
+    counts = {"images": 0, "videos": 0, "texts": 0}
+    for file_path in file_list:
+        name = file_path.lower()
+        if name.endswith(IMAGE_EXTENSIONS):
+            counts["images"] += 1
+        elif name.endswith(VIDEO_EXTENSIONS):
+            counts["videos"] += 1
+        elif name.endswith(TEXT_EXTENSIONS):
+            counts["texts"] += 1
+    return counts
+
+
+def archive_format(output_path: str) -> str:
+    """The archive format implied by the output file name: "zip", "tar" or "tar.zst"."""
+    name = output_path.lower()
+    if name.endswith((".tar.zst", ".tzst")):
+        return "tar.zst"
+    if name.endswith(".tar"):
+        return "tar"
+    return "zip"
+
+
+#endregion
+#region Archive
+
+
+def create_archive(
+    folder_path: str,
+    output_path: str,
+    file_list: Optional[List[str]] = None,
+    compression: str = "auto",
+    update: bool = False,
+    shard_size: Optional[int] = None,
+    webdataset: bool = False,
+    max_workers: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int, str], None]] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> List[str]:
+    """
+    Archive the dataset in folder_path to output_path. The format follows the output extension.
+
+    Args:
+        folder_path: Dataset folder, member names are relative to it.
+        output_path: .zip, .tar or .tar.zst file. With shard_size, the shard number is
+            inserted before the extension (dataset-000000.tar, dataset-000001.tar, ...).
+        file_list: Files to archive, defaults to collect_dataset_files(folder_path).
+        compression: Zip member compression, "auto", "store" or "deflate".
+        update: Refresh an existing zip instead of replacing it.
+        shard_size: Start a new tar shard once this many bytes of files have been added.
+        webdataset: Name tar members "<key>.<ext>" with samples kept together.
+        max_workers: Shards written at the same time.
+        progress_callback: Called with (members done, members total, member name).
+        cancel_event: Set it to stop, the partial output is removed.
+
+    Returns:
+        The archive files that were written.
+    """
+    if compression not in COMPRESSION_TYPES:
+        raise ValueError(f"Unknown compression: {compression}")
+    file_list = collect_dataset_files(folder_path) if file_list is None else list(file_list)
+    progress = _Progress(len(file_list), progress_callback, cancel_event)
+    fmt = archive_format(output_path)
+    if fmt == "zip":
+        if shard_size or webdataset:
+            raise ValueError("Sharded and WebDataset output are written as .tar or .tar.zst")
+        _write_zip(folder_path, output_path, file_list, compression, update, progress)
+        return [output_path]
+    members = _tar_members(folder_path, file_list, webdataset)
+    shards = _split_shards(members, shard_size) if shard_size else [members]
+    if len(shards) == 1 and not shard_size:
+        outputs = [output_path]
+    else:
+        outputs = [_shard_path(output_path, fmt, number) for number in range(len(shards))]
+    zstd = fmt == "tar.zst"
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers or min(4, os.cpu_count() or 1)) as executor:
+            futures = [executor.submit(_write_tar, path, shard, zstd, progress) for path, shard in zip(outputs, shards)]
+            for future in futures:
+                future.result()
+    except BaseException:
+        progress.cancel()
+        for path in outputs:
+            _remove_quietly(path)
+        raise
+    return outputs
+
+
+#endregion
+#region Zip
+
+
+def _zip_compress_type(file_path: str, compression: str) -> int:
+    if compression == "store":
+        return zipfile.ZIP_STORED
+    if compression == "deflate":
+        return zipfile.ZIP_DEFLATED
+    return zipfile.ZIP_STORED if file_path.lower().endswith(_PRECOMPRESSED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+
+
+def _zip_info(file_path: str, arcname: str, compress_type: int) -> zipfile.ZipInfo:
+    zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+    zinfo.compress_type = compress_type
+    return zinfo
+
+
+def _is_unchanged(zinfo: zipfile.ZipInfo, file_path: str) -> bool:
+    """Zip stores modified times with 2 second resolution, so compare at that resolution."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return False
+    if zinfo.file_size != stat.st_size:
+        return False
+    stored = time.mktime(zinfo.date_time + (0, 0, -1))
+    return abs(stored - stat.st_mtime) < 2
+
+
+def _write_zip(folder_path: str, output_path: str, file_list: List[str], compression: str, update: bool, progress: "_Progress") -> None:
+    arcnames = [(file_path, os.path.relpath(file_path, folder_path).replace(os.sep, "/")) for file_path in file_list]
+    if update and os.path.isfile(output_path) and zipfile.is_zipfile(output_path):
+        with zipfile.ZipFile(output_path, "r") as existing:
+            old_members = {zinfo.filename: zinfo for zinfo in existing.infolist()}
+        wanted = {arcname for _, arcname in arcnames}
+        unchanged = {arcname for file_path, arcname in arcnames if arcname in old_members and _is_unchanged(old_members[arcname], file_path)}
+        changed = [arcname for _, arcname in arcnames if arcname in old_members and arcname not in unchanged]
+        removed = [name for name in old_members if name not in wanted]
+        if not changed and not removed:
+            # Only additions, so append them to a copy, the original is only replaced once every member is written
+            added = [(file_path, arcname) for file_path, arcname in arcnames if arcname not in old_members]
+            progress.advance(len(arcnames) - len(added))
+            temp_path = output_path + ".partial"
+            try:
+                shutil.copyfile(output_path, temp_path)
+                with zipfile.ZipFile(temp_path, "a", allowZip64=True) as zip_file:
+                    for file_path, arcname in added:
+                        _zip_write_file(zip_file, file_path, arcname, compression, progress)
+                os.replace(temp_path, output_path)
+            except BaseException:
+                _remove_quietly(temp_path)
+                raise
+            return
+        _rewrite_zip(output_path, arcnames, unchanged, compression, progress)
+        return
+    temp_path = output_path + ".partial"
+    try:
+        with zipfile.ZipFile(temp_path, "w", allowZip64=True) as zip_file:
+            for file_path, arcname in arcnames:
+                _zip_write_file(zip_file, file_path, arcname, compression, progress)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        _remove_quietly(temp_path)
+        raise
+
+
+def _rewrite_zip(output_path: str, arcnames: List[Tuple[str, str]], unchanged: set, compression: str, progress: "_Progress") -> None:
+    """Build the updated archive next to the old one. Unchanged members are copied from the old archive without recompressing."""
+    temp_path = output_path + ".partial"
+    try:
+        with zipfile.ZipFile(output_path, "r") as old_zip, zipfile.ZipFile(temp_path, "w", allowZip64=True) as zip_file:
+            for file_path, arcname in arcnames:
+                if arcname in unchanged:
+                    _copy_zip_member(old_zip, old_zip.getinfo(arcname), zip_file, progress)
+                    progress.advance(1, arcname)
+                else:
+                    _zip_write_file(zip_file, file_path, arcname, compression, progress)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        _remove_quietly(temp_path)
+        raise
+
+
+def _copy_zip_member(old_zip: zipfile.ZipFile, old_info: zipfile.ZipInfo, zip_file: zipfile.ZipFile, progress: "_Progress") -> None:
+    """
+    Copy a member's compressed bytes from old_zip into zip_file as they are.
+    zipfile has no public raw copy, so this follows what ZipFile.open(mode="w") does.
+    """
+    # The data starts after the old local header, whose extra field may differ from the central directory's
+    old_zip.fp.seek(old_info.header_offset)
+    header = struct.unpack(zipfile.structFileHeader, old_zip.fp.read(zipfile.sizeFileHeader))
+    data_offset = old_info.header_offset + zipfile.sizeFileHeader + header[zipfile._FH_FILENAME_LENGTH] + header[zipfile._FH_EXTRA_FIELD_LENGTH]
+    zinfo = zipfile.ZipInfo(old_info.filename, old_info.date_time)
+    zinfo.compress_type = old_info.compress_type
+    zinfo.external_attr = old_info.external_attr
+    zinfo.file_size = old_info.file_size
+    zinfo.compress_size = old_info.compress_size
+    zinfo.CRC = old_info.CRC
+    zip64 = zinfo.file_size > zipfile.ZIP64_LIMIT or zinfo.compress_size > zipfile.ZIP64_LIMIT
+    zip_file.fp.seek(zip_file.start_dir)
+    zinfo.header_offset = zip_file.fp.tell()
+    zip_file._writecheck(zinfo)
+    zip_file._didModify = True
+    zip_file.fp.write(zinfo.FileHeader(zip64))
+    old_zip.fp.seek(data_offset)
+    remaining = zinfo.compress_size
+    while remaining:
+        progress.check()
+        chunk = old_zip.fp.read(min(_COPY_BUFFER_SIZE, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated member {old_info.filename}")
+        zip_file.fp.write(chunk)
+        remaining -= len(chunk)
+    zip_file.start_dir = zip_file.fp.tell()
+    zip_file.filelist.append(zinfo)
+    zip_file.NameToInfo[zinfo.filename] = zinfo
+
+
+def _zip_write_file(zip_file: zipfile.ZipFile, file_path: str, arcname: str, compression: str, progress: "_Progress") -> None:
+    zinfo = _zip_info(file_path, arcname, _zip_compress_type(file_path, compression))
+    with open(file_path, "rb") as src, zip_file.open(zinfo, "w", force_zip64=zinfo.file_size > zipfile.ZIP64_LIMIT) as dst:
+        _copy_stream(src, dst, progress)
+    progress.advance(1, arcname)
+
+
+#endregion
+#region Tar
+
+
+def _tar_members(folder_path: str, file_list: List[str], webdataset: bool) -> List[Tuple[str, str]]:
+    """(file path, member name) pairs. WebDataset members are grouped by sample key."""
+    if not webdataset:
+        return [(file_path, os.path.relpath(file_path, folder_path).replace(os.sep, "/")) for file_path in file_list]
+    samples: Dict[str, List[Tuple[str, str]]] = {}
+    for file_path in file_list:
+        stem, ext = os.path.splitext(os.path.basename(file_path))
+        # WebDataset splits the key from the extension at the first dot
+        key = stem.replace(".", "_")
+        samples.setdefault(key, []).append((file_path, f"{key}{ext.lower()}"))
+    return [member for key in sorted(samples) for member in samples[key]]
+
+
+def _split_shards(members: List[Tuple[str, str]], shard_size: int) -> List[List[Tuple[str, str]]]:
+    """Split members into shards of about shard_size bytes, never splitting a sample between shards."""
+    shards: List[List[Tuple[str, str]]] = [[]]
+    current_size = 0
+    previous_key = None
+    for file_path, arcname in members:
+        key = arcname.split(".", 1)[0]
+        size = os.path.getsize(file_path)
+        if shards[-1] and current_size + size > shard_size and key != previous_key:
+            shards.append([])
+            current_size = 0
+        shards[-1].append((file_path, arcname))
+        current_size += size
+        previous_key = key
+    return shards
+
+
+def _shard_path(output_path: str, fmt: str, number: int) -> str:
+    suffix = ".tar.zst" if fmt == "tar.zst" and output_path.lower().endswith(".tar.zst") else os.path.splitext(output_path)[1]
+    base = output_path[:-len(suffix)] if suffix else output_path
+    return f"{base}-{number:06d}{suffix}"
+
+
+def zstd_available() -> bool:
+    """Whether .tar.zst archives can be written, with Python 3.14+ or the 'zstandard' package."""
+    try:
+        from compression import zstd
+        return True
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return True
+    except ImportError:
+        return False
+
+
+def _open_zstd_writer(path: str):
+    """A binary file object that Zstandard-compresses into path using every core."""
+    try:
+        from compression import zstd
+        return zstd.ZstdFile(path, "wb", options={zstd.CompressionParameter.nb_workers: os.cpu_count() or 1})
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError("Zstandard archives need Python 3.14+ or the 'zstandard' package (pip install zstandard).") from e
+    raw = open(path, "wb")
+    return zstandard.ZstdCompressor(threads=-1).stream_writer(raw, closefd=True)
+
+
+def _write_tar(output_path: str, members: List[Tuple[str, str]], zstd: bool, progress: "_Progress") -> None:
+    fileobj = _open_zstd_writer(output_path) if zstd else open(output_path, "wb")
+    with fileobj, tarfile.open(fileobj=fileobj, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+        for file_path, arcname in members:
+            progress.check()
+            tarinfo = tar.gettarinfo(file_path, arcname)
+            with open(file_path, "rb") as src:
+                tar.addfile(tarinfo, src)
+            progress.advance(1, arcname)
+
+
+#endregion
+#region Helpers
+
+
+class _Progress:
+    """Thread-safe member counter that reports progress and checks for cancellation."""
+    def __init__(self, total: int, callback: Optional[Callable[[int, int, str], None]], cancel_event: Optional[threading.Event]) -> None:
+        self.total = total
+        self.done = 0
+        self.callback = callback
+        self.cancel_event = cancel_event or threading.Event()
+        self._lock = threading.Lock()
+
+
+    def check(self) -> None:
+        if self.cancel_event.is_set():
+            raise ArchiveCancelled()
+
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+
+
+    def advance(self, count: int, name: str = "") -> None:
+        self.check()
+        with self._lock:
+            self.done += count
+            done = self.done
+        if self.callback and count:
+            self.callback(done, self.total, name)
+
+
+def _copy_stream(src, dst, progress: _Progress) -> None:
+    while True:
+        progress.check()
+        chunk = src.read(_COPY_BUFFER_SIZE)
+        if not chunk:
+            break
+        dst.write(chunk)
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+#endregion
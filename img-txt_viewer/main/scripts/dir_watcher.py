@@ -0,0 +1,143 @@
+#region Imports
+
+
+# Standard
+import os
+import queue
+import threading
+
+# Typing
+from typing import TYPE_CHECKING, Callable, FrozenSet, Iterable, Optional, Tuple
+if TYPE_CHECKING:
+    from tkinter import Tk
+
+
+#endregion
+#region DirectoryWatcher
+
+
+class DirectoryWatcher:
+    """
+    Watch the image folder from a background thread, so the UI never has to list it.
+
+    Each tick the watcher stats the folder itself. Adding, removing or renaming a
+    file updates the folder's modified time, and only then is the folder listed
+    again. Some network shares don't update that time reliably, so a full
+    listing is also taken every rescan_interval seconds.
+
+    Listings that differ from the last known one are handed to on_change(path, names)
+    on the Tk main thread.
+    """
+    def __init__(self, root: 'Tk', on_change: Callable[[str, FrozenSet[str]], None], interval: float = 1.0, rescan_interval: float = 30.0) -> None:
+        self.root = root
+        self.on_change = on_change
+        self.interval = interval
+        self.rescan_interval = rescan_interval
+        self._lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._queue: "queue.Queue[Tuple[int, str, FrozenSet[str]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._poll_job_id = None
+        self._generation = 0
+        self._path: Optional[str] = None
+        self._names: FrozenSet[str] = frozenset()
+        self._seeded = False
+        self._force_rescan = False
+
+
+    def watch(self, path: str, names: Optional[Iterable[str]] = None) -> None:
+        """Start watching path. names is the listing the caller already has, if any."""
+        with self._lock:
+            self._generation += 1
+            self._path = path
+            self._names = frozenset(names) if names is not None else frozenset()
+            self._seeded = names is not None
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        if self._poll_job_id is None:
+            self._poll_job_id = self.root.after(100, self._poll_queue)
+        self._wake_event.set()
+
+
+    def rescan(self) -> None:
+        """List the folder again now and deliver it even if unchanged. Listings already queued are dropped."""
+        with self._lock:
+            self._generation += 1
+            self._force_rescan = True
+        self._wake_event.set()
+
+
+    def stop(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._path = None
+        if self._poll_job_id is not None:
+            self.root.after_cancel(self._poll_job_id)
+            self._poll_job_id = None
+
+
+    def apply_pending(self) -> bool:
+        """Deliver any queued listing change now. Returns True if on_change was called."""
+        changed = False
+        try:
+            while True:
+                generation, path, names = self._queue.get_nowait()
+                with self._lock:
+                    current = generation == self._generation
+                if current:
+                    self.on_change(path, names)
+                    changed = True
+        except queue.Empty:
+            pass
+        return changed
+
+
+#endregion
+#region Mechanics
+
+
+    def _poll_queue(self) -> None:
+        try:
+            self.apply_pending()
+        finally:
+            self._poll_job_id = self.root.after(100, self._poll_queue)
+
+
+    def _run(self) -> None:
+        last_path = None
+        last_mtime = None
+        since_rescan = 0.0
+        while True:
+            self._wake_event.wait(self.interval)
+            self._wake_event.clear()
+            with self._lock:
+                generation, path, names, seeded = self._generation, self._path, self._names, self._seeded
+                force, self._force_rescan = self._force_rescan, False
+            if path is None:
+                last_path = None
+                continue
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            since_rescan += self.interval
+            if path == last_path and mtime == last_mtime and since_rescan < self.rescan_interval and not force:
+                continue
+            if path != last_path and seeded and not force:
+                # The caller just listed this folder, only remember its modified time
+                last_path, last_mtime = path, mtime
+                continue
+            last_path, last_mtime, since_rescan = path, mtime, 0.0
+            try:
+                listing = frozenset(os.listdir(path))
+            except OSError:
+                continue
+            with self._lock:
+                if generation != self._generation or (listing == names and not force):
+                    continue
+                self._names = listing
+            self._queue.put((generation, path, listing))
+
+
+#endregion
@@ -8,12 +8,14 @@ import os
 from tkinter import ttk, Tk, messagebox, Frame, Label, BooleanVar, TclError
 
 # Third-Party
-import numpy
 from nenotk import ToolTip as Tip
-from PIL import Image, ImageOps, ImageEnhance, ImageFilter
+from PIL import Image
+
+# Local
+from main.scripts import image_adjustments
 
 # Typing
-from typing import TYPE_CHECKING, Optional, Any, Dict, Union, Callable
+from typing import TYPE_CHECKING, Optional, Any, Dict, Union
 if TYPE_CHECKING:
     from app import ImgTxtViewer as Main
 
@@ -45,21 +47,6 @@ class EditPanel:
         self.edit_is_reverted_var: bool = False
         self.edit_cumulative_var: BooleanVar = BooleanVar(value=False)
 
-        # Adjustment methods map
-        self.adjustment_methods = {
-            "Brightness": self.adjust_brightness,
-            "Contrast": self.adjust_contrast,
-            "AutoContrast": self.adjust_autocontrast,
-            "Highlights": self.adjust_highlights,
-            "Shadows": self.adjust_shadows,
-            "Saturation": self.adjust_saturation,
-            "Vibrance": self.adjust_vibrance,
-            "Sharpness": self.adjust_sharpness,
-            "Clarity": self.adjust_clarity,
-            "Hue": self.adjust_hue,
-            "Color Temp": self.adjust_color_temperature,
-        }
-
 
 #endregion
 #region Create Widgets
@@ -87,7 +74,7 @@ class EditPanel:
 
     def create_edit_panel_widgets(self) -> None:
         # Edit Mode Combobox
-        self.edit_combobox = ttk.Combobox(self.app.edit_image_panel, values=["Brightness", "Contrast", "AutoContrast", "Highlights", "Shadows", "Saturation", "Vibrance", "Sharpness", "Clarity", "Hue", "Color Temp"], width=18, state="readonly")
+        self.edit_combobox = ttk.Combobox(self.app.edit_image_panel, values=list(image_adjustments.ADJUSTMENT_OPTIONS), width=18, state="readonly")
         self.edit_combobox.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
         self.edit_combobox.set("Brightness")
         self.edit_combobox.bind("<<ComboboxSelected>>", self.update_slider_value)
@@ -249,44 +236,35 @@ class EditPanel:
 
 
     def _apply_image_edit(self) -> None:
-        self.app.current_image = self.app.original_image.copy()
-        adjustment_methods = self.adjustment_methods
-        if self.edit_cumulative_var.get():
-            for option, value in self.slider_value_dict.items():
-                if option in adjustment_methods and adjustment_methods[option] and value != 0:
-                    adjustment_methods[option](value, image_type="display")
-        else:
-            option = self.edit_combobox.get()
-            value = self.slider_value_dict.get(option)
-            if option in adjustment_methods and adjustment_methods[option] and value != 0:
-                adjustment_methods[option](value, image_type="display")
+        adjustments = self.get_adjustments()
+        self.app.current_image = self.public_image_edit(self.app.original_image, adjustments)
         self.app.primary_display_image.set_image(self.app.current_image, keep_view=True)
 
 
-    def edit_image(self, value: int, enhancer_class: Any, image_type: str = "display", image: Optional[Image.Image] = None) -> Optional[Image.Image]:
-        factor = (value + 100) / 100.0
-        if image_type == "display":
-            enhancer_display = enhancer_class(self.app.current_image)
-            self.app.current_image = enhancer_display.enhance(factor)
-            return self.app.current_image
-        elif image_type == "original" and image is not None:
-            enhancer_original = enhancer_class(image)
-            return enhancer_original.enhance(factor)
-        return image
+    def get_adjustments(self) -> Dict[str, Dict[str, Any]]:
+        """Build an adjustments dict from the slider values and spinboxes for public_image_edit()."""
+        if self.edit_cumulative_var.get():
+            options = list(self.slider_value_dict)
+        else:
+            options = [self.edit_combobox.get()]
+        adjustments = {}
+        for option in options:
+            value = self.slider_value_dict.get(option)
+            if not value:
+                continue
+            adjustments[option] = {"value": value}
+            if option == "Highlights":
+                adjustments[option]["threshold"] = self.validate_spinbox_value(self.highlights_threshold_spinbox, min_value=1, max_value=256, integer=True)
+            elif option == "Shadows":
+                adjustments[option]["threshold"] = self.validate_spinbox_value(self.shadows_threshold_spinbox, min_value=1, max_value=256, integer=True)
+            elif option == "Sharpness":
+                adjustments[option]["boost"] = self.validate_spinbox_value(self.sharpness_boost_spinbox, min_value=1, max_value=5, integer=True)
+        return adjustments
 
 
     def public_image_edit(self, image: Image.Image, adjustment_methods: Dict[str, Dict[str, Any]]) -> Image.Image:
         """Apply adjustments directly to the given image using the provided adjustment_methods dict. Returns the edited image."""
-        result_image = image.copy()
-        for option, args in adjustment_methods.items():
-            if not isinstance(args, dict) or not args.get("value"):
-                continue
-            method = self.adjustment_methods.get(option)
-            if method:
-                method_args = dict(args)
-                value = method_args.pop("value")
-                result_image = method(value, image_type="original", image=result_image, **method_args)
-        return result_image
+        return image_adjustments.apply_adjustments(image, adjustment_methods)
 
 
 #endregion
@@ -300,17 +278,9 @@ class EditPanel:
         if not messagebox.askyesno("Save Image", "Do you want to save the edited image?"):
             return
         original_filepath = self.app.image_files[self.app.current_index]
+        adjustments = self.get_adjustments()
         with Image.open(original_filepath) as original_image:
-            adjustment_methods = self.adjustment_methods
-            if self.edit_cumulative_var.get():
-                for option, value in self.slider_value_dict.items():
-                    if option in adjustment_methods and adjustment_methods[option]:
-                        original_image = adjustment_methods[option](value, image_type="original", image=original_image)
-            else:
-                option = self.edit_combobox.get()
-                value = self.slider_value_dict.get(option)
-                if option in adjustment_methods and adjustment_methods[option]:
-                    original_image = adjustment_methods[option](value, image_type="original", image=original_image)
+            original_image = self.public_image_edit(original_image, adjustments)
             directory, filename = os.path.split(original_filepath)
             name, ext = os.path.splitext(filename)
             new_filename = f"{name}_edit{ext}"
@@ -326,25 +296,7 @@ class EditPanel:
 
     def _prepare_image_for_save(self, image: Image.Image, ext: str) -> Image.Image:
         """Sanitize image and its info before saving."""
-        try:
-            img = image.copy()
-            info = getattr(image, "info", {}) or {}
-            icc = info.get("icc_profile")
-            if icc is not None and isinstance(icc, str):
-                try:
-                    info["icc_profile"] = icc.encode("latin-1")
-                except Exception:
-                    info.pop("icc_profile", None)
-            img.info = info
-            if ext in (".jpg", ".jpeg", ".jfif"):
-                if img.mode in ("RGBA", "LA"):
-                    img = img.convert("RGB")
-            if ext in (".tif", ".tiff"):
-                if img.mode == "RGBA":
-                    img = img.convert("RGB")
-            return img
-        except Exception:
-            return image
+        return image_adjustments.prepare_image_for_save(image, ext)
 
 
 #endregion
@@ -374,233 +326,3 @@ class EditPanel:
 
 
 #endregion
-#region Utility
-
-
-    def _create_gradient_mask(self, image: Image.Image, threshold: int, blur_radius: int, invert: bool = False) -> Image.Image:
-        """Create a gradient mask from the image based on brightness threshold."""
-        def sigmoid(x):
-            return 1 / (1 + numpy.exp(-x))
-        grayscale = ImageOps.grayscale(image)
-        gradient = numpy.asarray(grayscale, dtype=numpy.float32)
-        gradient = (gradient - threshold) / 256.0
-        gradient = sigmoid(gradient * 10)
-        gradient = (gradient * 256).astype(numpy.uint8)
-        if invert:
-            gradient = 255 - gradient
-        mask = Image.fromarray(gradient, mode='L')
-        if blur_radius > 0:
-            mask = mask.filter(ImageFilter.GaussianBlur(radius=blur_radius))
-        return mask
-
-
-    def _apply_rgb_preserve_alpha(self, img: Image.Image, func: Callable[[Image.Image], Image.Image]) -> Image.Image:
-        if img.mode == 'RGBA':
-            *rgb_parts, alpha = img.split()
-            rgb = Image.merge('RGB', rgb_parts)
-            processed = func(rgb)
-            if processed.mode != 'RGB':
-                processed = processed.convert('RGB')
-            processed.putalpha(alpha)
-            return processed
-        else:
-            return func(img)
-
-
-    def _apply_to_image(self, func: Callable[[Image.Image], Image.Image], image_type: str = "display", image: Optional[Image.Image] = None, preserve_alpha: bool = True) -> Optional[Image.Image]:
-        """
-        Apply func to either the display image (mutating self.app.current_image)
-        or to the provided original image and return the result.
-        If preserve_alpha is True, use _apply_rgb_preserve_alpha to avoid
-        corrupting alpha channel when func expects RGB input.
-        """
-        if image_type == "display":
-            if preserve_alpha:
-                self.app.current_image = self._apply_rgb_preserve_alpha(self.app.current_image, func)
-            else:
-                self.app.current_image = func(self.app.current_image)
-            return self.app.current_image
-        elif image_type == "original" and image is not None:
-            if preserve_alpha:
-                return self._apply_rgb_preserve_alpha(image, func)
-            else:
-                return func(image)
-        return image
-
-
-#endregion
-#region Image Functions
-
-
-    def adjust_brightness(self, value: int, image_type: str = "display", image: Optional[Image.Image] = None) -> Optional[Image.Image]:
-        if value == 0:
-            return image
-        factor = (value + 100) / 100.0
-        def _adjust(img_rgb: Image.Image) -> Image.Image:
-            return ImageEnhance.Brightness(img_rgb).enhance(factor)
-        return self._apply_to_image(_adjust, image_type=image_type, image=image, preserve_alpha=True)
-
-
-    def adjust_contrast(self, value: int, image_type: str = "display", image: Optional[Image.Image] = None) -> Optional[Image.Image]:
-        if value == 0:
-            return image
-        factor = (value + 100) / 100.0
-        def _adjust(img_rgb: Image.Image) -> Image.Image:
-            return ImageEnhance.Contrast(img_rgb).enhance(factor)
-        return self._apply_to_image(_adjust, image_type=image_type, image=image, preserve_alpha=True)
-
-
-    def adjust_autocontrast(self, value: Optional[int] = None, image_type: str = "display", image: Optional[Image.Image] = None) -> Optional[Image.Image]:
-        if value is None or value <= 0:
-            return image
-        strength = max(0.0, min(1.0, value / 100.0))
-        contrast_boost = 1.0 + (0.1 * strength)
-        def _adjust(img_rgb: Image.Image) -> Image.Image:
-            processed = ImageOps.autocontrast(img_rgb)
-            return ImageEnhance.Contrast(processed).enhance(contrast_boost)
-        return self._apply_to_image(_adjust, image_type=image_type, image=image, preserve_alpha=True)
-
-
-    def adjust_highlights(self, value: int, image_type: str = "display", image: Optional[Image.Image] = None, threshold: Optional[int] = None) -> Optional[Image.Image]:
-        if value == 0:
-            return image
-        factor = (value + 100) / 100.0
-        if threshold is None:
-            threshold = self.validate_spinbox_value(self.highlights_threshold_spinbox, min_value=1, max_value=256, integer=True)
-        def _adjust(img_rgb: Image.Image) -> Image.Image:
-            mask = self._create_gradient_mask(img_rgb, threshold, 0, invert=False)
-            mask_arr = numpy.asarray(mask, dtype=numpy.float32) / 255.0  # 0..1 where 1 == bright
-            emphasis = numpy.power(mask_arr, 2.2)
-            mult = 1.0 + (factor - 1.0) * emphasis
-            hsv = img_rgb.convert('HSV')
-            arr = numpy.asarray(hsv).astype(numpy.float32)  # H,S,V 0..255
-            v = arr[..., 2]
-            v = v * mult
-            numpy.clip(v, 0, 255, out=v)
-            arr[..., 2] = v
-            out = Image.fromarray(arr.astype(numpy.uint8), mode='HSV').convert('RGB')
-            return out
-        return self._apply_to_image(_adjust, image_type=image_type, image=image, preserve_alpha=True)
-
-
-    def adjust_shadows(self, value: int, image_type: str = "display", image: Optional[Image.Image] = None, threshold: Optional[int] = None) -> Optional[Image.Image]:
-        if value == 0:
-            return image
-        factor = (value + 100) / 100.0
-        if threshold is None:
-            threshold = self.validate_spinbox_value(self.shadows_threshold_spinbox, min_value=1, max_value=256, integer=True)
-        def _adjust(img_rgb: Image.Image) -> Image.Image:
-            mask = self._create_gradient_mask(img_rgb, threshold, 0, invert=False)
-            mask_arr = numpy.asarray(mask, dtype=numpy.float32) / 255.0  # 0..1 where 1==bright
-            shadow_focus = numpy.power(1.0 - mask_arr, 2.0)
-            mult = 1.0 + (factor - 1.0) * shadow_focus
-            hsv = img_rgb.convert('HSV')
-            arr = numpy.asarray(hsv).astype(numpy.float32)  # H,S,V 0..255
-            v = arr[..., 2]
-            v = v * mult
-            numpy.clip(v, 0, 255, out=v)
-            arr[..., 2] = v
-            out = Image.fromarray(arr.astype(numpy.uint8), mode='HSV').convert('RGB')
-            return out
-        return self._apply_to_image(_adjust, image_type=image_type, image=image, preserve_alpha=True)
-
-
-    def adjust_saturation(self, value: int, image_type: str = "display", image: Optional[Image.Image] = None) -> Optional[Image.Image]:
-        if value == 0:
-            return image
-        factor = (value + 100) / 100.0
-        def _adjust(img_rgb: Image.Image) -> Image.Image:
-            return ImageEnhance.Color(img_rgb).enhance(factor)
-        return self._apply_to_image(_adjust, image_type=image_type, image=image, preserve_alpha=True)
-
-
-    def adjust_vibrance(self, value: int, image_type: str = "display", image: Optional[Image.Image] = None) -> Optional[Image.Image]:
-        if value == 0:
-            return image
-        factor = (value + 100) / 100.0
-        def _adjust(img_rgb: Image.Image) -> Image.Image:
-            if img_rgb.mode != 'RGB':
-                img_rgb = img_rgb.convert('RGB')
-            hsv = img_rgb.convert('HSV')
-            h, s, v = hsv.split()
-            s_arr = numpy.asarray(s, dtype=numpy.float32)
-            sat_normalized = s_arr / 255.0
-            weight = numpy.power(1.0 - sat_normalized, 0.5)
-            adjustment = (factor - 1.0) * weight
-            new_s = s_arr * (1.0 + adjustment)
-            numpy.clip(new_s, 0, 255, out=new_s)
-            s_new = Image.fromarray(new_s.astype(numpy.uint8), mode='L')
-            return Image.merge('HSV', (h, s_new, v)).convert('RGB')
-        return self._apply_to_image(_adjust, image_type=image_type, image=image, preserve_alpha=True)
-
-
-    def adjust_sharpness(self, value: int, image_type: str = "display", image: Optional[Image.Image] = None, boost: Optional[int] = None) -> Optional[Image.Image]:
-        if value == 0:
-            return image
-        if boost is None:
-            boost = self.validate_spinbox_value(self.sharpness_boost_spinbox, min_value=1, max_value=5, integer=True)
-        factor = (value + 100) / 100.0
-        def _adjust(img: Image.Image) -> Image.Image:
-            r = img
-            for _ in range(boost):
-                r = ImageEnhance.Sharpness(r).enhance(factor)
-            return r
-        return self._apply_to_image(_adjust, image_type=image_type, image=image, preserve_alpha=True)
-
-
-    def adjust_clarity(self, value: int, image_type: str = "display", image: Optional[Image.Image] = None, radius: Optional[int] = None) -> Optional[Image.Image]:
-        if value == 0:
-            return image
-        amount = float(value) / 100.0
-        if radius is None or radius == 0:
-            radius = max(1, int(1 + abs(value) * 0.05))
-        def _adjust(img: Image.Image) -> Image.Image:
-            has_alpha = img.mode == 'RGBA'
-            alpha = None
-            if has_alpha:
-                *rgb_parts, alpha = img.split()
-                img_rgb = Image.merge('RGB', rgb_parts)
-            else:
-                img_rgb = img.convert('RGB')
-            blurred = img_rgb.filter(ImageFilter.GaussianBlur(radius=radius))
-            arr = numpy.array(img_rgb).astype(numpy.float32)
-            barr = numpy.array(blurred).astype(numpy.float32)
-            result = arr + amount * (arr - barr)
-            numpy.clip(result, 0, 255, out=result)
-            out_img = Image.fromarray(result.astype(numpy.uint8), mode='RGB')
-            if has_alpha and alpha is not None:
-                out_img.putalpha(alpha)
-            return out_img
-        return self._apply_to_image(_adjust, image_type=image_type, image=image, preserve_alpha=False)
-
-
-    def adjust_hue(self, value: int, image_type: str = "display", image: Optional[Image.Image] = None) -> Optional[Image.Image]:
-        if value == 0:
-            return image
-        shift = int(value * 255 / 200)
-        def _adjust(img_rgb: Image.Image) -> Image.Image:
-            hsv = img_rgb.convert('HSV')
-            h, s, v = hsv.split()
-            h = h.point(lambda p: (p + shift) % 256)
-            return Image.merge('HSV', (h, s, v)).convert('RGB')
-        return self._apply_to_image(_adjust, image_type=image_type, image=image, preserve_alpha=True)
-
-
-    def adjust_color_temperature(self, value: int, image_type: str = "display", image: Optional[Image.Image] = None) -> Optional[Image.Image]:
-        if value == 0:
-            return image
-        factor = max(-1.0, min(1.0, value / 100.0))
-        def _adjust(img_rgb: Image.Image) -> Image.Image:
-            if img_rgb.mode != 'RGB':
-                img_rgb = img_rgb.convert('RGB')
-            arr = numpy.array(img_rgb).astype(numpy.float32)
-            red_mult = 1.0 + 0.35 * factor
-            blue_mult = 1.0 - 0.35 * factor
-            arr[..., 0] *= red_mult
-            arr[..., 2] *= blue_mult
-            numpy.clip(arr, 0, 255, out=arr)
-            return Image.fromarray(arr.astype(numpy.uint8), mode='RGB')
-        return self._apply_to_image(_adjust, image_type=image_type, image=image, preserve_alpha=True)
-
-
-#endregion
\ No newline at end of file
@@ -0,0 +1,102 @@
+#region Imports
+
+
+# Standard
+import os
+
+# Typing
+from typing import Callable, Dict, List, Optional
+
+
+#endregion
+#region FileIndex
+
+
+def _path_key(path: str) -> str:
+    return os.path.normcase(os.path.normpath(path))
+
+
+class FileIndex:
+    """
+    Path and filename -> index lookup for a file list, like ImgTxtViewer.image_files.
+
+    The list is replaced all over the app, so a different list object or length
+    rebuilds the maps in O(n). Code that edits the list in place calls changed()
+    with the first index it touched, and only the maps from there on are redone.
+    A hit is checked against the list itself in O(1), a wrong hit rebuilds once,
+    and a miss on an unchanged list is simply -1.
+    """
+    def __init__(self, get_files: Callable[[], List[str]]) -> None:
+        self.get_files = get_files
+        self._files: Optional[List[str]] = None
+        self._length = -1
+        self._by_path: Dict[str, int] = {}
+        self._by_name: Dict[str, int] = {}
+        # Keys of the list as it was when the maps were built, by index
+        self._path_keys: List[str] = []
+        self._names: List[str] = []
+        self._dirty_from: Optional[int] = None
+
+
+    def changed(self, index: int = 0) -> None:
+        """The list was edited in place (insert, pop, replace) from index onward."""
+        self._dirty_from = index if self._dirty_from is None else min(self._dirty_from, index)
+
+
+    def index_of(self, path: str) -> int:
+        """Index of path in the list, or -1. Paths are compared normalized."""
+        return self._lookup(_path_key(path), by_name=False)
+
+
+    def index_of_name(self, filename: str) -> int:
+        """Index of the first file named filename in the list, or -1."""
+        return self._lookup(os.path.basename(filename), by_name=True)
+
+
+    def __contains__(self, path: str) -> bool:
+        return self.index_of(path) != -1
+
+
+#endregion
+#region Mechanics
+
+
+    def _lookup(self, key: str, by_name: bool) -> int:
+        files = self.get_files()
+        key_func = os.path.basename if by_name else _path_key
+        if files is not self._files:
+            self._rebuild(files, 0)
+        elif self._dirty_from is not None:
+            self._rebuild(files, min(self._dirty_from, self._length))
+        elif len(files) != self._length:
+            self._rebuild(files, 0)
+        index = (self._by_name if by_name else self._by_path).get(key, -1)
+        if index == -1 or key_func(files[index]) == key:
+            return index
+        # A wrong hit, the list was edited in place without changed()
+        self._rebuild(files, 0)
+        return (self._by_name if by_name else self._by_path).get(key, -1)
+
+
+    def _rebuild(self, files: List[str], start: int) -> None:
+        """Redo the maps for files[start:], the entries before start are still right."""
+        if start == 0:
+            self._by_path, self._by_name = {}, {}
+        else:
+            for keys, mapping in ((self._path_keys, self._by_path), (self._names, self._by_name)):
+                for key in keys[start:]:
+                    if mapping.get(key, -1) >= start:
+                        del mapping[key]
+        path_keys = [_path_key(path) for path in files[start:]]
+        names = [os.path.basename(path) for path in files[start:]]
+        for offset, (path_key, name) in enumerate(zip(path_keys, names)):
+            self._by_path.setdefault(path_key, start + offset)
+            self._by_name.setdefault(name, start + offset)
+        self._path_keys[start:] = path_keys
+        self._names[start:] = names
+        self._files = files
+        self._length = len(files)
+        self._dirty_from = None
+
+
+#endregion
@@ -0,0 +1,123 @@
+#region Imports
+
+
+# Standard
+import os
+import queue
+import shutil
+from concurrent.futures import ThreadPoolExecutor, Future
+
+# Typing
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+if TYPE_CHECKING:
+    from tkinter import Tk
+
+
+#endregion
+#region FileMover
+
+
+class FileMover:
+    """
+    Move and delete files on a background I/O thread, in the order they were queued.
+
+    The UI updates its file lists right away and carries on, the disk catches up
+    behind it. A single worker keeps operations ordered, so an undo that moves a
+    file back out of the trash always runs after the move that put it there.
+
+    on_error(message) is called on the Tk main thread for every operation that fails.
+    """
+    def __init__(self, root: 'Tk', on_error: Callable[[str], None]) -> None:
+        self.root = root
+        self.on_error = on_error
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="FileMover")
+        self._errors: "queue.Queue[str]" = queue.Queue()
+        self._pending: List[Future] = []
+        self._poll_job_id = None
+
+
+    def move(self, src: str, dst: str, replace: bool = False) -> Future:
+        """Queue moving src to dst. If replace is True, an existing dst is removed first."""
+        return self._submit(self._move, src, dst, replace)
+
+
+    def remove(self, path: str) -> Future:
+        """Queue deleting path permanently."""
+        return self._submit(self._remove, path)
+
+
+    def wait(self) -> None:
+        """Block until every queued operation has finished, then report any errors."""
+        for future in list(self._pending):
+            future.exception()
+        self._pending = [future for future in self._pending if not future.done()]
+        self._report_errors()
+
+
+    @property
+    def busy(self) -> bool:
+        return any(not future.done() for future in self._pending)
+
+
+#endregion
+#region Mechanics
+
+
+    def _submit(self, func: Callable, *args) -> Future:
+        future = self._executor.submit(func, *args)
+        future.add_done_callback(self._on_done)
+        self._pending.append(future)
+        if self._poll_job_id is None:
+            self._poll_job_id = self.root.after(100, self._poll)
+        return future
+
+
+    def _on_done(self, future: Future) -> None:
+        # Worker thread, so only queue the error for the main thread
+        error = future.exception()
+        if error is not None:
+            self._errors.put(str(error))
+
+
+    def _poll(self) -> None:
+        self._poll_job_id = None
+        self._pending = [future for future in self._pending if not future.done()]
+        self._report_errors()
+        if self._pending:
+            self._poll_job_id = self.root.after(100, self._poll)
+
+
+    def _report_errors(self) -> None:
+        messages = []
+        try:
+            while True:
+                messages.append(self._errors.get_nowait())
+        except queue.Empty:
+            pass
+        if messages:
+            self.on_error("\n\n".join(messages))
+
+
+    @staticmethod
+    def _move(src: str, dst: str, replace: bool) -> Tuple[str, str]:
+        if replace and os.path.exists(dst):
+            os.remove(dst)
+        try:
+            shutil.move(src, dst)
+        except OSError as e:
+            raise OSError(f"Could not move {os.path.basename(src)} to {os.path.dirname(dst)}: {e}") from e
+        return src, dst
+
+
+    @staticmethod
+    def _remove(path: str) -> Optional[str]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            raise OSError(f"Could not delete {os.path.basename(path)}: {e}") from e
+        return path
+
+
+#endregion
@@ -6,6 +6,8 @@ import os
 import shutil
 import hashlib
 import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 # tkinter
 from tkinter import ttk, Tk, messagebox, filedialog, StringVar, BooleanVar, Menu, Text
@@ -18,11 +20,99 @@ from nenotk import ToolTip as Tip
 import main.scripts.HelpText as HelpText
 
 # Typing
+from typing import Callable, List, Optional, Tuple
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from app import ImgTxtViewer as Main
 
 
+#endregion
+#region Duplicate Engine
+
+
+HASH_MODES = ("md5", "sha-256")
+DUPLICATES_FOLDER = '_Duplicate__Files'
+HASH_CHUNK_SIZE = 1024 * 1024
+SUPPORTED_FILETYPES = (
+    ".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif",
+    ".jpeg_large", ".tiff", ".tif", ".ico", ".svg", ".eps",
+    ".raw", ".pdf", ".psd", ".xcf", ".kra", ".cdr",
+    ".heic", ".heif", ".avif", ".apng", ".jp2", ".j2k",
+    ".jpf", ".jpx", ".jpm", ".mj2", ".dds", ".exr",
+    ".hdr", ".icns", ".ai", ".indd"
+)
+
+
+def file_hash(file_path: str, mode: str = "md5") -> str:
+    """Hex digest of a file's contents, mode is "md5" or "sha-256". The file is read in chunks."""
+    digest = hashlib.sha256() if mode == "sha-256" else hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_duplicate_files(
+    file_paths: List[str],
+    mode: str = "md5",
+    max_workers: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """
+    Find files with identical contents.
+
+    Only files that share their size with another file are hashed, on max_workers
+    threads. Returns (duplicates, errors): duplicates are (duplicate, original) path
+    pairs, the original being the first of its group in file_paths, and errors are
+    (path, message) for files that couldn't be read. progress_callback(done, total)
+    is called after each file.
+    """
+    by_size = defaultdict(list)
+    errors = []
+    for path in file_paths:
+        try:
+            by_size[os.path.getsize(path)].append(path)
+        except OSError as e:
+            errors.append((path, str(e)))
+    candidates = {path for paths in by_size.values() if len(paths) > 1 for path in paths}
+    total = len(file_paths)
+    done = total - len(candidates)
+    if progress_callback:
+        progress_callback(done, total)
+
+    def hash_or_error(path):
+        try:
+            return file_hash(path, mode), None
+        except OSError as e:
+            return None, str(e)
+
+    ordered = [path for path in file_paths if path in candidates]
+    first_by_hash = {}
+    duplicates = []
+    with ThreadPoolExecutor(max_workers=max_workers or min(8, os.cpu_count() or 1)) as executor:
+        for path, (digest, error) in zip(ordered, executor.map(hash_or_error, ordered)):
+            done += 1
+            if progress_callback:
+                progress_callback(done, total)
+            if error:
+                errors.append((path, error))
+            elif digest in first_by_hash:
+                duplicates.append((path, first_by_hash[digest]))
+            else:
+                first_by_hash[digest] = path
+    return duplicates, errors
+
+
+def move_with_caption(file_path: str, destination_folder: str, move_caption: bool = True) -> None:
+    """Move a file into destination_folder, along with its .txt caption if move_caption."""
+    shutil.move(file_path, destination_folder)
+    if move_caption:
+        base_name, _ = os.path.splitext(os.path.basename(file_path))
+        caption_file = os.path.join(os.path.dirname(file_path), base_name + '.txt')
+        if os.path.exists(caption_file):
+            shutil.move(caption_file, destination_folder)
+
+
 #endregion
 #region FindDupeFile
 
@@ -42,14 +132,7 @@ class FindDupeFile:
         self.max_scan_size = 2048 # in MB
         self.scanned_files = None
         self.startup = True
-        self.supported_filetypes = [
-            ".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif",
-            ".jpeg_large", ".tiff", ".tif", ".ico", ".svg", ".eps",
-            ".raw", ".pdf", ".psd", ".xcf", ".kra", ".cdr",
-            ".heic", ".heif", ".avif", ".apng", ".jp2", ".j2k",
-            ".jpf", ".jpx", ".jpm", ".mj2", ".dds", ".exr",
-            ".hdr", ".icns", ".ai", ".indd"
-        ]
+        self.supported_filetypes = list(SUPPORTED_FILETYPES)
         # Handle process state
         self.process_stopped = BooleanVar(value=True)
         self.process_stopped.trace_add('write', self.toggle_widgets)
@@ -344,7 +427,7 @@ class FindDupeFile:
         displayed_folder_path = folder_path.replace("\\", "/")
         self.insert_to_textlog(f"\n\nScanning... \nFolder Path: {displayed_folder_path}")
         self.tray_label_status.config(text=" Scanning...")
-        duplicates_folder = os.path.join(folder_path, '_Duplicate__Files')
+        duplicates_folder = os.path.join(folder_path, DUPLICATES_FOLDER)
         duplicates_found = False
         self.scanned_files = list(self.get_files(folder_path))
         self.insert_to_textlog(f"\nTotal files to check: {len(self.scanned_files)}")
@@ -390,7 +473,7 @@ class FindDupeFile:
     def get_files(self, folder_path):
         try:
             self.tray_label_status.config(text=" Building Lists...")
-            duplicates_folder = os.path.join(folder_path, '_Duplicate__Files')
+            duplicates_folder = os.path.join(folder_path, DUPLICATES_FOLDER)
             with os.scandir(folder_path) as entries:
                 for entry in entries:
                     if entry.is_file() and entry.stat().st_size <= self.max_scan_size * 1024 * 1024:
@@ -413,11 +496,7 @@ class FindDupeFile:
     def get_file_hash(self, file_path):
         try:
             self.tray_label_status.config(text=" Comparing...")
-            with open(file_path, 'rb') as f:
-                if self.process_mode.get() == "md5":
-                    return hashlib.md5(f.read()).hexdigest()
-                elif self.process_mode.get() == "sha-256":
-                    return hashlib.sha256(f.read()).hexdigest()
+            return file_hash(file_path, self.process_mode.get())
         except IOError:
             self.insert_to_textlog(f"\nERROR - get_file_hash: Cannot open file at {file_path}")
             return None
@@ -432,12 +511,7 @@ class FindDupeFile:
 
 
     def move_file_with_caption(self, file_path, destination_folder):
-        shutil.move(file_path, destination_folder)
-        if self.move_captions.get() and self.scanning_mode.get() == "Images":
-            base_name, _ = os.path.splitext(os.path.basename(file_path))
-            caption_file = os.path.join(os.path.dirname(file_path), base_name + '.txt')
-            if os.path.exists(caption_file):
-                shutil.move(caption_file, destination_folder)
+        move_with_caption(file_path, destination_folder, self.move_captions.get() and self.scanning_mode.get() == "Images")
 
 
     def toggle_move_captions_option(self, *args):
@@ -474,7 +548,7 @@ class FindDupeFile:
     def count_total_files(self):
         try:
             total_files = 0
-            duplicates_folder = os.path.join(self.folder_entry.get(), '_Duplicate__Files')
+            duplicates_folder = os.path.join(self.folder_entry.get(), DUPLICATES_FOLDER)
             if os.path.exists(duplicates_folder):
                 for root, dirs, files in os.walk(duplicates_folder):
                     total_files += len(files)
@@ -486,7 +560,7 @@ class FindDupeFile:
 
     def undo_folder(self, folder_path):
         try:
-            duplicates_folder = os.path.join(folder_path, '_Duplicate__Files')
+            duplicates_folder = os.path.join(folder_path, DUPLICATES_FOLDER)
             if not os.path.exists(duplicates_folder):
                 return
             for filename in os.listdir(duplicates_folder):
@@ -527,7 +601,7 @@ class FindDupeFile:
 
     def delete_folder(self, folder_path):
         try:
-            duplicates_folder = os.path.join(folder_path, '_Duplicate__Files')
+            duplicates_folder = os.path.join(folder_path, DUPLICATES_FOLDER)
             if not os.path.exists(duplicates_folder):
                 return
             self.insert_to_textlog(f"\n\nDeleting duplicates...\nDeleting: {os.path.normpath(duplicates_folder)}")
@@ -550,7 +624,7 @@ class FindDupeFile:
     def move_all_duplicates_to_root(self):
         try:
             root_path = self.folder_entry.get()
-            root_duplicates_folder = os.path.join(root_path, '_Duplicate__Files')
+            root_duplicates_folder = os.path.join(root_path, DUPLICATES_FOLDER)
             if not os.path.exists(root_duplicates_folder):
                 os.makedirs(root_duplicates_folder)
             if not messagebox.askyesno("Confirmation", "Are you sure you want to move all duplicates to the root '_Duplicate__Files' folder?\n\nYou cannot undo this action!"):
@@ -558,7 +632,7 @@ class FindDupeFile:
             for folder_path, dirs, files in os.walk(root_path):
                 if folder_path == root_duplicates_folder:
                     continue
-                duplicates_folder = os.path.join(folder_path, '_Duplicate__Files')
+                duplicates_folder = os.path.join(folder_path, DUPLICATES_FOLDER)
                 if os.path.exists(duplicates_folder):
                     for filename in os.listdir(duplicates_folder):
                         file_path = os.path.join(duplicates_folder, filename)
@@ -0,0 +1,80 @@
+#region Imports
+
+
+# Standard
+import threading
+from collections import OrderedDict
+
+# Third-Party
+from PIL import Image
+
+# Typing
+from typing import Tuple
+
+
+#endregion
+#region Constants
+
+
+# Decoded frames kept in memory
+FRAME_CACHE_SIZE = 16
+
+# Timeline thumbnail height in pixels
+THUMB_HEIGHT = 64
+
+
+#endregion
+#region GifFrames
+
+
+class GifFrames:
+    """
+    Decode the frames of a GIF on demand.
+
+    The file stays open, so stepping forward through the timeline continues
+    decoding from the current frame instead of starting over. The most recently
+    used frames are kept in a small LRU. Safe to use from a worker thread and
+    the UI at the same time.
+    """
+    def __init__(self, path: str, cache_size: int = FRAME_CACHE_SIZE) -> None:
+        self.path = path
+        self.cache_size = cache_size
+        self._img = Image.open(path)
+        # n_frames walks the frame headers without decoding them
+        self.count = getattr(self._img, "n_frames", 1)
+        self.size: Tuple[int, int] = self._img.size
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[int, Image.Image]" = OrderedDict()
+
+
+    def frame(self, index: int) -> Image.Image:
+        """Frame index as an RGBA image. Treat it as read-only, it is shared through the cache."""
+        with self._lock:
+            frame = self._cache.get(index)
+            if frame is not None:
+                self._cache.move_to_end(index)
+                return frame
+            self._img.seek(index)
+            frame = self._img.convert("RGBA")
+            self._cache[index] = frame
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return frame
+
+
+    def thumbnail(self, index: int, height: int = THUMB_HEIGHT) -> Image.Image:
+        return self.frame(index).resize(self.thumb_size(height), Image.BILINEAR)
+
+
+    def thumb_size(self, height: int = THUMB_HEIGHT) -> Tuple[int, int]:
+        width, frame_height = self.size
+        return max(1, int(height * width / frame_height)), height
+
+
+    def close(self) -> None:
+        with self._lock:
+            self._img.close()
+            self._cache.clear()
+
+
+#endregion
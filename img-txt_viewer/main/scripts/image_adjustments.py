@@ -0,0 +1,538 @@
+#region Imports
+
+
+# Standard
+import os
+
+# Third-Party
+import numpy
+from PIL import Image, ImageFilter
+
+# Local
+from main.scripts import tiling
+
+# Typing
+from typing import Dict, Any, List, Tuple, Callable, Optional
+
+
+#endregion
+#region Constants
+
+
+DEFAULT_HIGHLIGHTS_THRESHOLD = 190
+DEFAULT_SHADOWS_THRESHOLD = 64
+DEFAULT_SHARPNESS_BOOST = 1
+
+# A compiled stage: (stage function, keyword arguments)
+Stage = Tuple[Callable[..., None], Dict[str, Any]]
+
+# ITU-R 601-2 luma transform, the same weights PIL uses for convert("L")
+LUMA_WEIGHTS = numpy.array([0.299, 0.587, 0.114], dtype=numpy.float32)
+
+# 16-bit grayscale modes (16-bit PNG and TIFF files open as one of these)
+WIDE_GRAY_MODES = ("I;16", "I;16L", "I;16B", "I")
+
+# Source modes the adjusted RGB(A) result is converted back to
+RESTORED_MODES = ("L", "LA", "CMYK") + WIDE_GRAY_MODES
+
+
+#endregion
+#region AdjustmentBuffer
+
+
+class AdjustmentBuffer:
+    """
+    Float32 RGB working buffer shared by every stage of an AdjustmentGraph.
+
+    Intermediates derived from the pixels (luminance, HSV value) are computed
+    lazily and reused until a stage writes to the buffer and calls commit().
+    """
+    def __init__(self, rgb: numpy.ndarray) -> None:
+        self.rgb = rgb
+        self._luma: Optional[numpy.ndarray] = None
+        self._value: Optional[numpy.ndarray] = None
+
+
+    def luma(self) -> numpy.ndarray:
+        if self._luma is None:
+            self._luma = self.rgb @ LUMA_WEIGHTS
+        return self._luma
+
+
+    def value(self) -> numpy.ndarray:
+        if self._value is None:
+            self._value = self.rgb.max(axis=2)
+        return self._value
+
+
+    def commit(self) -> None:
+        """Clamp the buffer in place and drop the cached intermediates."""
+        numpy.clip(self.rgb, 0, 255, out=self.rgb)
+        self._luma = None
+        self._value = None
+
+
+#endregion
+#region Helpers
+
+
+def _factor(value: int) -> float:
+    return (value + 100) / 100.0
+
+
+def _luminance_mask(luma: numpy.ndarray, threshold: int) -> numpy.ndarray:
+    """Sigmoid mask from 0..1 where 1 == brighter than threshold."""
+    mask = (luma - threshold) * (-10.0 / 256.0)
+    numpy.exp(mask, out=mask)
+    mask += 1.0
+    numpy.divide(256.0 / 255.0, mask, out=mask)
+    numpy.minimum(mask, 1.0, out=mask)
+    return mask
+
+
+def _scale_value(buf: AdjustmentBuffer, mult: numpy.ndarray) -> None:
+    """Scale the HSV value channel by mult while keeping hue and saturation, without an HSV round trip."""
+    v = buf.value()
+    new_v = v * mult
+    numpy.clip(new_v, 0, 255, out=new_v)
+    scale = numpy.ones_like(v)
+    numpy.divide(new_v, v, out=scale, where=v > 0)
+    buf.rgb *= scale[..., None]
+
+
+def _blend_with(buf: AdjustmentBuffer, degenerate: Any, factor: float) -> None:
+    """ImageEnhance-style blend: degenerate + factor * (image - degenerate)."""
+    rgb = buf.rgb
+    rgb -= degenerate
+    rgb *= factor
+    rgb += degenerate
+
+
+#endregion
+#region Global Statistics
+
+
+def _collect_mean(acc: Optional[List[float]], buf: AdjustmentBuffer) -> List[float]:
+    acc = acc or [0.0, 0]
+    luma = buf.luma()
+    acc[0] += float(luma.sum(dtype=numpy.float64))
+    acc[1] += luma.size
+    return acc
+
+
+def _finish_mean(acc: List[float]) -> int:
+    return int(acc[0] / acc[1] + 0.5) if acc[1] else 0
+
+
+def _collect_bounds(acc: Optional[List[numpy.ndarray]], buf: AdjustmentBuffer) -> List[numpy.ndarray]:
+    flat = buf.rgb.reshape(-1, 3)
+    lo, hi = flat.min(axis=0), flat.max(axis=0)
+    if acc is None:
+        return [lo, hi]
+    return [numpy.minimum(acc[0], lo), numpy.maximum(acc[1], hi)]
+
+
+def _finish_bounds(acc: List[numpy.ndarray]) -> List[Tuple[float, float]]:
+    return [(float(lo), float(hi)) for lo, hi in zip(acc[0], acc[1])]
+
+
+#endregion
+#region Stages
+
+
+def _stage_brightness(buf: AdjustmentBuffer, value: int) -> None:
+    buf.rgb *= _factor(value)
+
+
+def _stage_contrast(buf: AdjustmentBuffer, factor: float, mean: Optional[int] = None) -> None:
+    if mean is None:
+        mean = _finish_mean(_collect_mean(None, buf))
+    _blend_with(buf, float(mean), factor)
+
+
+def _stage_stretch(buf: AdjustmentBuffer, bounds: Optional[List[Tuple[float, float]]] = None) -> None:
+    """The per-channel histogram stretch of ImageOps.autocontrast()."""
+    if bounds is None:
+        bounds = _finish_bounds(_collect_bounds(None, buf))
+    for channel, (lo, hi) in enumerate(bounds):
+        if hi > lo:
+            band = buf.rgb[..., channel]
+            band -= lo
+            band *= 255.0 / (hi - lo)
+
+
+def _stage_tone(buf: AdjustmentBuffer, highlights: Optional[Dict[str, Any]] = None, shadows: Optional[Dict[str, Any]] = None) -> None:
+    """Highlights and shadows share one luminance pass and one value scaling."""
+    luma = buf.luma()
+    mult = None
+    if highlights:
+        threshold = highlights.get("threshold") or DEFAULT_HIGHLIGHTS_THRESHOLD
+        emphasis = _luminance_mask(luma, threshold)
+        numpy.power(emphasis, 2.2, out=emphasis)
+        emphasis *= _factor(highlights["value"]) - 1.0
+        emphasis += 1.0
+        mult = emphasis
+    if shadows:
+        threshold = shadows.get("threshold") or DEFAULT_SHADOWS_THRESHOLD
+        focus = _luminance_mask(luma, threshold)
+        numpy.subtract(1.0, focus, out=focus)
+        numpy.square(focus, out=focus)
+        focus *= _factor(shadows["value"]) - 1.0
+        focus += 1.0
+        mult = focus if mult is None else mult * focus
+    if mult is not None:
+        _scale_value(buf, mult)
+
+
+def _stage_saturation(buf: AdjustmentBuffer, value: int) -> None:
+    _blend_with(buf, buf.luma()[..., None], _factor(value))
+
+
+def _stage_vibrance(buf: AdjustmentBuffer, value: int) -> None:
+    rgb = buf.rgb
+    v = buf.value()
+    sat = v - rgb.min(axis=2)
+    numpy.divide(sat, v, out=sat, where=v > 0)
+    weight = numpy.sqrt(1.0 - sat)
+    weight *= _factor(value) - 1.0
+    weight += 1.0
+    new_sat = sat * weight
+    numpy.clip(new_sat, 0, 1, out=new_sat)
+    ratio = numpy.ones_like(sat)
+    numpy.divide(new_sat, sat, out=ratio, where=sat > 0)
+    # With hue and value fixed, every channel sits at v - (v - c), scaled linearly by saturation
+    v3 = v[..., None]
+    rgb -= v3
+    rgb *= ratio[..., None]
+    rgb += v3
+
+
+def _stage_sharpness(buf: AdjustmentBuffer, value: int, boost: Optional[int] = None) -> None:
+    rgb = buf.rgb
+    if rgb.shape[0] < 3 or rgb.shape[1] < 3:
+        return
+    factor = _factor(value)
+    for _ in range(boost or DEFAULT_SHARPNESS_BOOST):
+        # ImageFilter.SMOOTH kernel, the degenerate image used by ImageEnhance.Sharpness
+        smooth = rgb[1:-1, 1:-1] * 5.0
+        for dy in (0, 1, 2):
+            for dx in (0, 1, 2):
+                if dy == 1 and dx == 1:
+                    continue
+                smooth += rgb[dy:dy + rgb.shape[0] - 2, dx:dx + rgb.shape[1] - 2]
+        smooth /= 13.0
+        interior = rgb[1:-1, 1:-1]
+        interior -= smooth
+        interior *= factor
+        interior += smooth
+        numpy.clip(rgb, 0, 255, out=rgb)
+
+
+def _stage_clarity(buf: AdjustmentBuffer, value: int, radius: int) -> None:
+    rgb = buf.rgb
+    source = Image.fromarray(rgb.astype(numpy.uint8))
+    blurred = numpy.asarray(source.filter(ImageFilter.GaussianBlur(radius=radius)), dtype=numpy.float32)
+    _blend_with(buf, blurred, 1.0 + float(value) / 100.0)
+
+
+def _stage_hue(buf: AdjustmentBuffer, value: int) -> None:
+    shift = int(value * 255 / 200) / 256.0
+    rgb = buf.rgb
+    v = buf.value()
+    mn = rgb.min(axis=2)
+    delta = v - mn
+    safe = numpy.where(delta > 0, delta, 1.0)
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    rc = (v - r) / safe
+    gc = (v - g) / safe
+    bc = (v - b) / safe
+    hue = numpy.where(r == v, bc - gc, numpy.where(g == v, 2.0 + rc - bc, 4.0 + gc - rc))
+    hue /= 6.0
+    hue += shift
+    numpy.mod(hue, 1.0, out=hue)
+    hue[delta == 0] = 0.0
+    # Rebuild RGB from the shifted hue; value and the channel minimum are unchanged
+    hue *= 6.0
+    sector = numpy.floor(hue).astype(numpy.int8) % 6
+    frac = hue - numpy.floor(hue)
+    rising = mn + delta * frac
+    falling = v - delta * frac
+    sectors = [sector == i for i in range(6)]
+    rgb[..., 0] = numpy.select(sectors, [v, falling, mn, mn, rising, v])
+    rgb[..., 1] = numpy.select(sectors, [rising, v, v, falling, mn, mn])
+    rgb[..., 2] = numpy.select(sectors, [mn, mn, rising, v, v, falling])
+
+
+def _stage_color_temperature(buf: AdjustmentBuffer, value: int) -> None:
+    factor = max(-1.0, min(1.0, value / 100.0))
+    buf.rgb[..., 0] *= 1.0 + 0.35 * factor
+    buf.rgb[..., 2] *= 1.0 - 0.35 * factor
+
+
+STAGES: Dict[str, Callable[..., None]] = {
+    "Brightness": _stage_brightness,
+    "Saturation": _stage_saturation,
+    "Vibrance": _stage_vibrance,
+    "Sharpness": _stage_sharpness,
+    "Clarity": _stage_clarity,
+    "Hue": _stage_hue,
+    "Color Temp": _stage_color_temperature,
+}
+# Stages that need a statistic of the whole image: stage -> (kwarg, collect, finish)
+GLOBAL_STATS: Dict[Callable[..., None], Tuple[str, Callable, Callable]] = {
+    _stage_contrast: ("mean", _collect_mean, _finish_mean),
+    _stage_stretch: ("bounds", _collect_bounds, _finish_bounds),
+}
+TONE_OPTIONS = ("Highlights", "Shadows")
+ADJUSTMENT_OPTIONS = ("Brightness", "Contrast", "AutoContrast", "Highlights", "Shadows", "Saturation", "Vibrance", "Sharpness", "Clarity", "Hue", "Color Temp")
+
+
+#endregion
+#region AdjustmentGraph
+
+
+class AdjustmentGraph:
+    """
+    A compiled list of adjustment stages.
+
+    The image is converted to a float32 array once, every stage runs in place on
+    that buffer, and the result is converted back to a PIL image once. Alpha is
+    split off before the first stage and merged back after the last.
+
+    run_tiled() evaluates the same stages over horizontal strips so the float
+    buffers never exceed a few strips, whatever the image size.
+    """
+    def __init__(self, stages: List[Stage]) -> None:
+        self.stages = stages
+
+
+    def __bool__(self) -> bool:
+        return bool(self.stages)
+
+
+    def run_array(self, rgb: numpy.ndarray, stages: Optional[List[Stage]] = None) -> numpy.ndarray:
+        """Run every stage on a float32 (H, W, 3) array in place and return it."""
+        buf = AdjustmentBuffer(rgb)
+        for stage, kwargs in self.stages if stages is None else stages:
+            stage(buf, **kwargs)
+            buf.commit()
+        return buf.rgb
+
+
+    def run(self, image: Image.Image) -> Image.Image:
+        if not self.stages:
+            return image.copy()
+        rgb, alpha = split_image(image)
+        self.run_array(rgb)
+        return restore_mode(merge_image(rgb, alpha, image.info), image.mode)
+
+
+    def run_tiled(self, image: Image.Image, strip_height: Optional[int] = None) -> Image.Image:
+        if not self.stages:
+            return image.copy()
+        width, height = image.size
+        strip_height = strip_height or tiling.strip_height_for(width)
+        stages = self._resolve_global_stats(image, strip_height)
+        halo = self.halo(stages)
+        result = Image.new("RGB", image.size)
+        for top, bottom, read_top, read_bottom in tiling.iter_strips(height, strip_height, halo):
+            rgb = rgb_array(image.crop((0, read_top, width, read_bottom)))
+            self.run_array(rgb, stages)
+            result.paste(merge_image(rgb[top - read_top:bottom - read_top]), (0, top))
+        alpha = alpha_band(image)
+        if alpha is not None:
+            result.putalpha(alpha)
+        result.info = dict(image.info)
+        return restore_mode(result, image.mode)
+
+
+    def _resolve_global_stats(self, image: Image.Image, strip_height: int) -> List[Stage]:
+        """Return a copy of the stages with whole-image statistics filled in, one streaming pass per statistic."""
+        width, height = image.size
+        stages = [(stage, dict(kwargs)) for stage, kwargs in self.stages]
+        for index, (stage, kwargs) in enumerate(stages):
+            if stage not in GLOBAL_STATS:
+                continue
+            key, collect, finish = GLOBAL_STATS[stage]
+            if kwargs.get(key) is not None:
+                continue
+            prefix = stages[:index]
+            acc = None
+            for top, bottom, read_top, read_bottom in tiling.iter_strips(height, strip_height, self.halo(prefix)):
+                rgb = rgb_array(image.crop((0, read_top, width, read_bottom)))
+                self.run_array(rgb, prefix)
+                acc = collect(acc, AdjustmentBuffer(rgb[top - read_top:bottom - read_top]))
+            kwargs[key] = finish(acc)
+        return stages
+
+
+    @staticmethod
+    def halo(stages: List[Stage]) -> int:
+        """Rows of overlap the neighbourhood stages (sharpness, clarity) need between strips."""
+        rows = 0
+        for stage, kwargs in stages:
+            if stage is _stage_sharpness:
+                rows += kwargs.get("boost") or DEFAULT_SHARPNESS_BOOST
+            elif stage is _stage_clarity:
+                rows += tiling.halo_for_radius(kwargs["radius"])
+        return rows
+
+
+def compile_adjustments(adjustments: Dict[str, Dict[str, Any]]) -> AdjustmentGraph:
+    """
+    Build an AdjustmentGraph from an adjustments dict, for example:
+        {"Brightness": {"value": 20}, "Highlights": {"value": -30, "threshold": 190}}
+
+    Options run in dict order. Options with a zero value are skipped, and
+    adjacent Highlights/Shadows are fused into a single tone stage.
+    """
+    stages: List[Stage] = []
+    for option, args in adjustments.items():
+        if not isinstance(args, dict) or not args.get("value"):
+            continue
+        params = {key: val for key, val in args.items() if key != "value"}
+        if option in TONE_OPTIONS:
+            key = option.lower()
+            if stages and stages[-1][0] is _stage_tone and key not in stages[-1][1]:
+                stages[-1][1][key] = args
+            else:
+                stages.append((_stage_tone, {key: args}))
+            continue
+        value = args["value"]
+        if option == "Contrast":
+            stages.append((_stage_contrast, {"factor": _factor(value)}))
+        elif option == "AutoContrast":
+            if value > 0:
+                strength = max(0.0, min(1.0, value / 100.0))
+                stages.append((_stage_stretch, {}))
+                stages.append((_stage_contrast, {"factor": 1.0 + (0.1 * strength)}))
+        elif option == "Clarity":
+            radius = params.get("radius") or max(1, int(1 + abs(value) * 0.05))
+            stages.append((_stage_clarity, {"value": value, "radius": radius}))
+        elif option in STAGES:
+            stages.append((STAGES[option], {"value": value, **params}))
+    return AdjustmentGraph(stages)
+
+
+def apply_adjustments(image: Image.Image, adjustments: Dict[str, Dict[str, Any]]) -> Image.Image:
+    """Apply an adjustments dict to image in a single fused pass. Returns a new image."""
+    graph = compile_adjustments(adjustments)
+    if tiling.use_tiling(image.size):
+        return graph.run_tiled(image)
+    return graph.run(image)
+
+
+#endregion
+#region Conversion
+
+
+def alpha_band(image: Image.Image) -> Optional[Image.Image]:
+    if image.mode == "RGBA":
+        return image.getchannel("A")
+    if image.mode in ("LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+        return image.convert("RGBA").getchannel("A")
+    return None
+
+
+def rgb_array(image: Image.Image) -> numpy.ndarray:
+    """Return a writable float32 (H, W, 3) array of the image's color channels."""
+    if image.mode in WIDE_GRAY_MODES:
+        # Scale to 0-255 instead of letting convert("RGB") clip everything above 255
+        gray = numpy.asarray(image, dtype=numpy.float32) / 257.0
+        numpy.clip(gray, 0.0, 255.0, out=gray)
+        return numpy.repeat(gray[:, :, None], 3, axis=2)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return numpy.array(image, dtype=numpy.float32)
+
+
+def split_image(image: Image.Image) -> Tuple[numpy.ndarray, Optional[Image.Image]]:
+    """Return a writable float32 RGB array and the alpha band (or None)."""
+    return rgb_array(image), alpha_band(image)
+
+
+def merge_image(rgb: numpy.ndarray, alpha: Optional[Image.Image] = None, info: Optional[Dict[str, Any]] = None) -> Image.Image:
+    numpy.rint(rgb, out=rgb)
+    result = Image.fromarray(rgb.astype(numpy.uint8))
+    if alpha is not None:
+        result.putalpha(alpha)
+    if info:
+        result.info = dict(info)
+    return result
+
+
+def restore_mode(image: Image.Image, mode: str) -> Image.Image:
+    """Convert an adjusted RGB(A) image back to the source mode, so grayscale and CMYK files stay that way."""
+    if image.mode == mode or mode not in RESTORED_MODES:
+        return image
+    if mode not in WIDE_GRAY_MODES:
+        return image.convert(mode)
+    gray = numpy.asarray(image.convert("L"), dtype=numpy.int32) * 257
+    result = Image.fromarray(gray if mode == "I" else gray.astype(numpy.uint16))
+    if result.mode != mode:
+        try:
+            result = result.convert(mode)
+        except ValueError:
+            pass
+    result.info = dict(image.info)
+    return result
+
+
+#endregion
+#region File IO
+
+
+JPEG_EXTENSIONS = (".jpg", ".jpeg", ".jfif")
+
+
+def prepare_image_for_save(image: Image.Image, ext: str) -> Image.Image:
+    """Sanitize image and its info before saving."""
+    try:
+        img = image.copy()
+        info = getattr(image, "info", {}) or {}
+        icc = info.get("icc_profile")
+        if icc is not None and isinstance(icc, str):
+            try:
+                info["icc_profile"] = icc.encode("latin-1")
+            except Exception:
+                info.pop("icc_profile", None)
+        img.info = info
+        if ext in JPEG_EXTENSIONS:
+            if img.mode in ("RGBA", "LA"):
+                img = img.convert("RGB")
+        if ext in (".tif", ".tiff"):
+            if img.mode == "RGBA":
+                img = img.convert("RGB")
+        return img
+    except Exception:
+        return image
+
+
+def save_image(image: Image.Image, save_path: str) -> None:
+    ext = os.path.splitext(save_path)[1].lower()
+    prepared = prepare_image_for_save(image, ext)
+    if ext in JPEG_EXTENSIONS:
+        prepared.save(save_path, format="JPEG", quality=100)
+    elif ext == ".png":
+        prepared.save(save_path, format="PNG")
+    else:
+        prepared.save(save_path)
+
+
+def edit_file(src: str, save_path: str, adjustments: Dict[str, Dict[str, Any]], remove_src: bool = False) -> str:
+    """
+    Decode, adjust, encode and write a single image. Returns save_path.
+
+    This is a module-level function with no Tk dependencies so it can run
+    inside a worker process; the pixels never leave that process.
+    """
+    with Image.open(src) as img:
+        img.load()
+    edited = apply_adjustments(img, adjustments)
+    if remove_src and os.path.exists(src):
+        os.remove(src)
+    save_image(edited, save_path)
+    return save_path
+
+
+#endregion
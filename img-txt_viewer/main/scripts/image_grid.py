@@ -3,6 +3,9 @@
 
 # Standard
 import os
+import queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 # tkinter
 from tkinter import ttk, IntVar, Frame, Canvas
@@ -13,18 +16,66 @@ from PIL import Image, ImageTk, ImageDraw, ImageFont
 
 
 # Typing
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 if TYPE_CHECKING:
     from app import ImgTxtViewer as Main
 
 
+#endregion
+#region Thumbnails
+
+
+# Max PIL thumbnails kept in memory per grid size
+THUMBNAIL_CACHE_SIZE = 4000
+
+# Max PhotoImages kept for cells that scrolled out of view
+PHOTO_CACHE_SIZE = 600
+
+
+def make_thumbnail(img_path: str, size: Tuple[int, int], video_thumb: Optional[Image.Image] = None) -> Image.Image:
+    """Build a (width, height) RGBA grid thumbnail, centered on a transparent background."""
+    max_width, max_height = size
+    new_img = Image.new("RGBA", size)
+    if img_path.lower().endswith('.mp4'):
+        if video_thumb is not None:
+            new_img.paste(video_thumb.resize(size, Image.LANCZOS), (0, 0))
+        else:
+            draw = ImageDraw.Draw(new_img)
+            draw.rectangle([(0, 0), size], outline="gray", width=2)
+            try:
+                font = ImageFont.truetype("arial", 12)
+            except OSError:
+                font = ImageFont.load_default()
+            draw.text((max_width // 2, max_height // 2), "Video", fill="gray", font=font, anchor="mm")
+    else:
+        with Image.open(img_path) as img:
+            img.thumbnail(size)
+            position = ((max_width - img.width) // 2, (max_height - img.height) // 2)
+            new_img.paste(img, position)
+    return new_img
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
 #endregion
 #region ImageGrid
 
 
 class ImageGrid(ttk.Frame):
-    image_cache = {1: {}, 2: {}, 3: {}}  # Cache for each thumbnail size
-    text_file_cache = {}  # Cache to store text file pairs
+    """
+    Virtual thumbnail grid drawn on a single Canvas.
+
+    Only the rows in view have canvas items, and a fixed pool of cells is reused
+    as the grid scrolls. Thumbnails are built by worker threads and kept in an
+    LRU per grid size. Tooltip metadata is read when a cell is hovered.
+    """
+    image_cache: Dict[int, "OrderedDict[str, Tuple[Tuple[int, int], Image.Image]]"] = {1: OrderedDict(), 2: OrderedDict(), 3: OrderedDict()}  # path -> (file stamp, thumbnail) for each thumbnail size
 
 
     def __init__(self, master: 'Frame', app: 'Main'):
@@ -32,15 +83,30 @@ class ImageGrid(ttk.Frame):
         # Initialize ImgTxtViewer variables and methods
         self.app = app
         self.is_initialized = False
-        self.canvas_window = None
         # Supported file types
         self.supported_filetypes = (".png", ".webp", ".jpg", ".jpeg", ".jpg_large", ".jfif", ".tif", ".tiff", ".bmp", ".gif", ".mp4")
-        # Used keeping track of thumbnail buttons
-        self.thumbnail_buttons = {}
-        # Used for highlighting the selected thumbnail
-        self.initial_selected_thumbnail = None
-        self.prev_selected_thumbnail = None
-        self.selected_thumbnail = None
+        # Pool of reusable cells, and the cell showing each visible index
+        self.cells: List[dict] = []
+        self.cell_by_index: Dict[int, dict] = {}
+        # Used for highlighting the selected thumbnail, drawn as two canvas items moved between cells
+        self.selected_index = None
+        self.selection_frame = None
+        self.selection_overlay = None
+
+        # Background thumbnail loading
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ImageGrid")
+        self._result_queue = queue.Queue()
+        self._poll_job_id = None
+        self._render_job_id = None
+        self._generation = 0
+        self._wanted = frozenset()
+        self._requested = set()
+        self._has_text: Dict[str, bool] = {}
+        self._photo_cache: "OrderedDict[str, ImageTk.PhotoImage]" = OrderedDict()
+        self._tooltip_cache: Dict[int, str] = {}
+        self._hover_index = None
+        self._outstanding = 0
+        self._canvas_width = None
 
         # Track parent size to prevent unnecessary reloads
         self.last_parent_size = (None, None)
@@ -59,20 +125,15 @@ class ImageGrid(ttk.Frame):
         '''Initialize the ImageGrid widget. This must be called before using the widget.'''
         if self.is_initialized:
             return
-        # App variables
-        self.reverse_sort_direction_var = self.app.reverse_load_order_var.get()
-        self.working_folder = self.app.image_dir.get()
-
         # Image grid configuration
         self.max_width = 80  # Thumbnail width
         self.max_height = 80  # Thumbnail height
-        self.images_per_load = 250  # Num of images to load per set
         self.padding = 6  # Default padding between thumbnails
         self.rows = 0  # Num of rows in the grid
-        self.columns = 0  # Num of columns in the grid
+        self.columns = 1  # Num of columns in the grid
+        self.column_width = self.max_width + 2 * self.padding
+        self.row_height = self.max_height + 2 * self.padding
 
-        # Image loading
-        self.loaded_images = 0  # Num of images loaded to the UI
         # Get number of total images from App
         self.num_total_images = len(self.app.image_files)
         # Default thumbnail size. Range=(1,2,3). Set to 3 if total_images is less than 25.
@@ -82,8 +143,8 @@ class ImageGrid(ttk.Frame):
 
         # Interface creation
         self.create_interface()
-        self.load_images()
         self.is_initialized = True
+        self.reload_grid()
 
         # Bind the top-level window to catch maximize/unmaximize (better than relying on master)
         try:
@@ -126,16 +187,15 @@ class ImageGrid(ttk.Frame):
         self.scrollbar = ttk.Scrollbar(self.canvas_container, orient="vertical")
         self.scrollbar.grid(row=0, column=1, sticky="ns", padx=(4, 0))
 
-        self.canvas_thumbnails = Canvas(self.canvas_container, takefocus=False, yscrollcommand=self.scrollbar.set, highlightthickness=0)
+        self.canvas_thumbnails = Canvas(self.canvas_container, takefocus=False, yscrollcommand=self.on_canvas_scroll, highlightthickness=0)
         self.canvas_thumbnails.grid(row=0, column=0, sticky="nsew")
         self.canvas_thumbnails.bind("<MouseWheel>", self.on_mousewheel)
-        self.scrollbar.config(command=self.canvas_thumbnails.yview)
-
-        self.frame_image_grid = ttk.Frame(self.canvas_thumbnails, padding=(self.padding, self.padding))
-        self.frame_image_grid.bind("<MouseWheel>", self.on_mousewheel)
-        self.canvas_window = self.canvas_thumbnails.create_window((0, 0), window=self.frame_image_grid, anchor="nw")
+        self.canvas_thumbnails.bind("<Button-1>", self.on_canvas_click)
+        self.canvas_thumbnails.bind("<Motion>", self.on_canvas_motion)
+        self.canvas_thumbnails.bind("<Leave>", self.on_canvas_leave)
         self.canvas_thumbnails.bind("<Configure>", self.on_canvas_configure)
-        self.frame_image_grid.bind("<Configure>", self.on_frame_configure)
+        self.scrollbar.config(command=self.canvas_thumbnails.yview)
+        self.tooltip = Tip.create(widget=self.canvas_thumbnails, text="", follow_mouse=True)
 
 
     # --- Controls ---
@@ -158,30 +218,27 @@ class ImageGrid(ttk.Frame):
         self.label_size_value.grid(row=0, column=2, padx=(8, 12))
         Tip.create(widget=self.label_size_value, text="Current grid size")
 
-        self.label_image_info = ttk.Label(self.frame_bottom, width=16, anchor="e")
+        self.label_image_info = ttk.Label(self.frame_bottom, width=20, anchor="e")
         self.label_image_info.grid(row=0, column=3, sticky="e")
-        Tip.create(widget=self.label_image_info, text="Loaded images / total images")
-
-        self.button_load_all = ttk.Button(self.frame_bottom, text="Load All", command=self.load_all_images)
-        self.button_load_all.grid(row=0, column=4, padx=(12, 6))
-        Tip.create(widget=self.button_load_all, text="Load all images in the folder (slower)")
+        Tip.create(widget=self.label_image_info, text="Visible images / total images")
 
         self.button_refresh = ttk.Button(self.frame_bottom, text="Refresh", command=self.reload_grid)
-        self.button_refresh.grid(row=0, column=5)
+        self.button_refresh.grid(row=0, column=4, padx=(12, 0))
         Tip.create(widget=self.button_refresh, text="Refresh the image grid")
 
 
     # --- Canvas Events ---
     def on_canvas_configure(self, event):
-        if self.canvas_window is not None:
-            self.canvas_thumbnails.itemconfigure(self.canvas_window, width=event.width)
-            self.configure_scroll_region(reset_view=False)
+        if event.width != self._canvas_width:
+            self._canvas_width = event.width
+            self.relayout()
+        else:
+            self.schedule_render()
 
 
-    # --- Grid Events ---
-    def on_frame_configure(self, *args):
-        # ignore the passed event argument, use *args to avoid unused-parameter warnings
-        self.configure_scroll_region(reset_view=False)
+    def on_canvas_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.schedule_render()
 
 
 #endregion
@@ -190,180 +247,255 @@ class ImageGrid(ttk.Frame):
 
     def reload_grid(self, *args):
         # accept optional args (e.g., events) but ignore them
-        self.clear_frame(self.frame_image_grid)
+        if not self.is_initialized:
+            return
+        self._generation += 1
+        self._requested.clear()
+        self._has_text.clear()
+        self._tooltip_cache.clear()
+        self._photo_cache.clear()
+        self.num_total_images = len(self.app.image_files)
         self.set_size_settings()
-        self.update_image_info_label()
-        self.update_cache_and_grid()
+        for cell in self.cells:
+            self.canvas_thumbnails.itemconfigure(cell["flag"], image=self.image_flag_photo)
+        self.create_selection_items()
+        self.relayout()
         self.highlight_thumbnail(self.app.current_index)
 
 
-    def update_cache_and_grid(self):
-        self.update_image_cache()
-        self.create_image_grid()
-
-
-    def update_image_cache(self):
-        image_size_key = self.image_size.get()
-        filtered_sorted_files = sorted(self.app.image_files, key=self.app.get_file_sort_key(), reverse=self.reverse_sort_direction_var)
-        current_text_file_sizes = {
-            os.path.splitext(os.path.join(self.working_folder, filename))[0] + '.txt': os.path.getsize(os.path.splitext(os.path.join(self.working_folder, filename))[0] + '.txt') if os.path.exists(os.path.splitext(os.path.join(self.working_folder, filename))[0] + '.txt') else 0
-            for filename in filtered_sorted_files}
-        for filename in filtered_sorted_files:
-            img_path, txt_path = self.get_image_and_text_paths(filename)
-            current_text_file_size = current_text_file_sizes[txt_path]
-            cached_text_file_size = self.text_file_cache.get(txt_path, -1)
-            if img_path not in self.image_cache[image_size_key] or current_text_file_size != cached_text_file_size:
-                self.create_new_image(img_path, txt_path)
-                self.text_file_cache[txt_path] = current_text_file_size
+    def refresh_file_list(self):
+        """Lay the grid out again after the app's file list changed. Thumbnails are cached by path, so they're kept."""
+        if not self.is_initialized or not self.winfo_ismapped():
+            return
+        # Results from workers still carry the old indexes
+        self._generation += 1
+        self._requested.clear()
+        self._tooltip_cache.clear()
+        self.num_total_images = len(self.app.image_files)
+        self.relayout()
+        self.highlight_thumbnail(self.app.current_index)
 
 
-    def update_image_info_label(self):
-        self.label_image_info.config(text=f"{self.loaded_images} / {self.num_total_images}")
-        self.button_load_all.config(state="disabled" if self.loaded_images == self.num_total_images else "normal")
+    def relayout(self):
+        """Recompute columns and place the cell pool again. Cached thumbnails are kept."""
+        self.columns = self.calculate_columns()
+        self.configure_scroll_region()
+        for cell in self.cells:
+            cell["index"] = None
+        self.cell_by_index.clear()
+        self.render_visible()
+        self.place_selection()
 
 
-    def clear_frame(self, frame):
-        for widget in frame.winfo_children():
-            widget.destroy()
+    def update_image_info_label(self, first=0, last=0):
+        if self.num_total_images:
+            self.label_image_info.config(text=f"{first + 1}-{last} / {self.num_total_images}")
+        else:
+            self.label_image_info.config(text="0 / 0")
 
 
-    def calculate_columns(self):
-        frame_width = self.canvas_container.winfo_width()
+    def calculate_columns(self, frame_width=None):
+        if frame_width is None:
+            frame_width = self.canvas_thumbnails.winfo_width()
         if frame_width <= 1:
             frame_width = self.canvas_container.winfo_reqwidth()
         available_width = frame_width - (2 * self.padding)
         thumbnail_width_with_padding = self.max_width + (2 * self.padding)
         columns = max(1, available_width // thumbnail_width_with_padding)
-        self.columns = columns
+        self.column_width = max(thumbnail_width_with_padding, available_width / columns)
         return int(columns)
 
 
     def set_size_settings(self):
         size_settings = {
-            1: (45, 45, 13),
-            2: (80, 80, 8),
-            3: (170, 170, 4)
+            1: (45, 45),
+            2: (80, 80),
+            3: (170, 170)
         }
-        self.max_width, self.max_height, self.cols = size_settings.get(self.image_size.get(), (80, 80, 8))
+        self.max_width, self.max_height = size_settings.get(self.image_size.get(), (80, 80))
+        self.row_height = self.max_height + 2 * self.padding
         self.image_flag = self.create_image_flag()
-        self.cols = self.calculate_columns()
-
-
-    def create_image_grid(self):
-        self.images = self.load_image_set()
-        self.populate_image_grid()
-        self.configure_scroll_region(reset_view=True)
-        self.add_load_more_button()
-
-
-    def populate_image_grid(self):
-        self.thumbnail_buttons.clear()
-        self.prev_selected_thumbnail = None
-        self.initial_selected_thumbnail = None
-        for column in range(self.cols):
-            self.frame_image_grid.columnconfigure(column, weight=1)
-        for index, (image, filepath, image_index) in enumerate(self.images):
-            row, col = divmod(index, self.cols)
-            button_style = "Highlighted.TButton" if index == self.app.current_index else "TButton"
-            thumbnail = ttk.Button(self.frame_image_grid, image=image, takefocus=False, style=button_style)
-            thumbnail.configure(command=lambda idx=image_index: self.on_mouse_click(idx))
-            thumbnail.image = image
-            thumbnail.grid(row=row, column=col, sticky="nsew")
-            thumbnail.bind("<MouseWheel>", self.on_mousewheel)
-            self.thumbnail_buttons[image_index] = thumbnail
-            if index == self.app.current_index:
-                self.initial_selected_thumbnail = thumbnail
-            # Get file info (different approach for videos)
-            filesize = os.path.getsize(filepath)
-            filesize = f"{filesize / 1024:.2f} KB" if filesize < 1024 * 1024 else f"{filesize / 1024 / 1024:.2f} MB"
-            if self._is_video_file(filepath):
-                video_info = self.app.update_videoinfo(filepath)
-                resolution = f"({video_info['resolution']})" if 'resolution' in video_info else "(Video)"
-                tooltip_text = f"#{image_index + 1}, {os.path.basename(filepath)}, {filesize}, {resolution}"
-            else:
-                with Image.open(filepath) as img:
-                    width, height = img.size
-                resolution = f"({width} x {height})"
-                tooltip_text = f"#{image_index + 1}, {os.path.basename(filepath)}, {filesize}, {resolution}"
-            Tip.create(widget=thumbnail, text=tooltip_text, follow_mouse=True)
-
-
-    def load_images(self, all_images=False):
-        self.loaded_images = self.num_total_images if all_images else min(self.loaded_images + self.images_per_load, self.num_total_images)
-        self.update_image_info_label()
-        self.reload_grid()
+        self.image_flag_photo = ImageTk.PhotoImage(self.image_flag)
+        self.highlight_photo = ImageTk.PhotoImage(self.create_highlight_overlay())
+        self.columns = self.calculate_columns()
 
 
-    def load_all_images(self):
-        self.load_images(all_images=True)
+    def configure_scroll_region(self):
+        self.rows = -(-self.num_total_images // self.columns)
+        width = self.canvas_thumbnails.winfo_width()
+        self.canvas_thumbnails.config(scrollregion=(0, 0, width, self.rows * self.row_height + 2 * self.padding))
 
 
-    def load_image_set(self):
-        images = []
-        image_size_key = self.image_size.get()
-        image_files = self.app.image_files
-        text_files = self.app.text_files
-        current_text_file_sizes = {
-            text_file: os.path.getsize(text_file) if os.path.exists(text_file) else 0
-            for text_file in text_files
-        }
-        for image_index, img_path in enumerate(image_files):
-            if len(images) >= self.loaded_images:
-                break
-            if image_index < len(text_files):
-                txt_path = text_files[image_index]
-            else:
-                txt_path = os.path.splitext(img_path)[0] + '.txt'
-            current_text_file_size = current_text_file_sizes.get(txt_path, 0)
-            if current_text_file_size == 0 and not os.path.exists(txt_path):
-                current_text_file_size = 0
-            cached_text_file_size = self.text_file_cache.get(txt_path, -1)
-            if img_path not in self.image_cache[image_size_key] or current_text_file_size != cached_text_file_size:
-                new_img = self.create_new_image(img_path, txt_path)
-            else:
-                new_img = self.image_cache[image_size_key][img_path]
-            images.append((ImageTk.PhotoImage(new_img), img_path, image_index))
-        return images
-
-
-    def create_new_image(self, img_path, txt_path):
-        new_img = Image.new("RGBA", (self.max_width, self.max_height))
-        # Handle video files
-        if self._is_video_file(img_path):
-            # Check if we have a thumbnail in the video_thumb_dict
-            if hasattr(self.app, 'video_thumb_dict') and img_path in self.app.video_thumb_dict:
-                # Access the thumbnail from the nested dictionary
-                thumb_data = self.app.video_thumb_dict[img_path]['thumbnail']
-                # Ensure thumbnail is the correct size
-                thumb = thumb_data.copy()
-                thumb = thumb.resize((self.max_width, self.max_height), Image.LANCZOS)
-                position = (0, 0)
-                new_img.paste(thumb, position)
-            else:
-                # Request thumbnail generation
-                self.app.update_video_thumbnails()
-                # Create a temporary placeholder
-                draw = ImageDraw.Draw(new_img)
-                draw.rectangle([(0, 0), (self.max_width, self.max_height)], outline="gray", width=2)
-                font = ImageFont.truetype("arial", 12)
-                draw.text((self.max_width//2, self.max_height//2), "Video", fill="gray", font=font, anchor="mm")
+    def schedule_render(self):
+        if self._render_job_id is None:
+            self._render_job_id = self.after_idle(self.render_visible)
+
+
+    def render_visible(self):
+        """Assign the cell pool to the rows currently in view."""
+        self._render_job_id = None
+        if not self.is_initialized:
+            return
+        if self.num_total_images != len(self.app.image_files):
+            self.refresh_file_list()
+            return
+        first, last = self.visible_range()
+        self._wanted = frozenset(self.app.image_files[first:last])
+        needed = last - first
+        while len(self.cells) < needed:
+            self.cells.append(self.create_cell())
+        visible = {}
+        free = [cell for cell in self.cells if cell["index"] is None or not first <= cell["index"] < last]
+        for cell in self.cells:
+            if cell["index"] is not None and first <= cell["index"] < last:
+                visible[cell["index"]] = cell
+        for index in range(first, last):
+            if index not in visible:
+                cell = free.pop()
+                visible[index] = cell
+                self.assign_cell(cell, index)
+        for cell in free:
+            cell["index"] = None
+            self.canvas_thumbnails.itemconfigure(cell["tag"], state="hidden")
+        self.cell_by_index = visible
+        if self.selection_overlay is not None:
+            # Newly created cells are stacked above the overlay
+            self.canvas_thumbnails.tag_raise(self.selection_overlay)
+        self.update_image_info_label(first, last)
+
+
+    def visible_range(self) -> Tuple[int, int]:
+        height = self.canvas_thumbnails.winfo_height()
+        top = self.canvas_thumbnails.canvasy(0)
+        first_row = max(0, int((top - self.padding) // self.row_height))
+        last_row = int((top + height - self.padding) // self.row_height) + 1
+        first = min(self.num_total_images, first_row * self.columns)
+        last = min(self.num_total_images, last_row * self.columns)
+        return first, last
+
+
+    def create_cell(self) -> dict:
+        tag = f"cell{len(self.cells)}"
+        canvas = self.canvas_thumbnails
+        cell = {"tag": tag, "index": None, "photo": None}
+        cell["frame"] = canvas.create_rectangle(0, 0, 0, 0, outline="", tags=(tag,))
+        cell["image"] = canvas.create_image(0, 0, anchor="center", tags=(tag,))
+        cell["flag"] = canvas.create_image(0, 0, anchor="center", image=self.image_flag_photo, tags=(tag,))
+        return cell
+
+
+    def cell_origin(self, index: int) -> Tuple[float, float]:
+        row, column = divmod(index, self.columns)
+        return self.padding + column * self.column_width, self.padding + row * self.row_height
+
+
+    def cell_box(self, index: int) -> Tuple[float, float, float, float]:
+        """Return (center_x, center_y, half_width, half_height) of the frame around a cell's thumbnail."""
+        x, y = self.cell_origin(index)
+        return x + self.column_width / 2, y + self.row_height / 2, self.max_width / 2 + self.padding / 2, self.max_height / 2 + self.padding / 2
+
+
+    def assign_cell(self, cell: dict, index: int):
+        canvas = self.canvas_thumbnails
+        center_x, center_y, half_w, half_h = self.cell_box(index)
+        cell["index"] = index
+        canvas.coords(cell["frame"], center_x - half_w, center_y - half_h, center_x + half_w, center_y + half_h)
+        canvas.coords(cell["image"], center_x, center_y)
+        canvas.coords(cell["flag"], center_x, center_y)
+        canvas.itemconfigure(cell["tag"], state="normal")
+        self.update_cell(cell)
+
+
+    def update_cell(self, cell: dict):
+        """Show the cached thumbnail for the cell's index, and request it if it isn't current."""
+        canvas = self.canvas_thumbnails
+        index = cell["index"]
+        img_path = self.app.image_files[index]
+        cached = self.image_cache[self.image_size.get()].get(img_path)
+        photo = self.get_photo(img_path, cached[1]) if cached else None
+        cell["photo"] = photo
+        canvas.itemconfigure(cell["image"], image=photo or "")
+        canvas.itemconfigure(cell["frame"], outline="" if photo else "gray")
+        has_text = self._has_text.get(img_path, True)
+        canvas.itemconfigure(cell["flag"], state="hidden" if has_text else "normal")
+        if img_path not in self._requested:
+            self.request_thumbnail(index, img_path, cached[0] if cached else None)
+
+
+    def get_photo(self, img_path: str, thumbnail: Image.Image) -> ImageTk.PhotoImage:
+        photo = self._photo_cache.get(img_path)
+        if photo is None:
+            photo = ImageTk.PhotoImage(thumbnail)
+            self._photo_cache[img_path] = photo
+            while len(self._photo_cache) > PHOTO_CACHE_SIZE:
+                self._photo_cache.popitem(last=False)
         else:
-            # Regular image handling
-            with Image.open(img_path) as img:
-                img.thumbnail((self.max_width, self.max_height))
-                position = ((self.max_width - img.width) // 2, (self.max_height - img.height) // 2)
-                new_img.paste(img, position)
-        if txt_path is None or not os.path.exists(txt_path) or os.path.getsize(txt_path) == 0:
-            flag_position = (self.max_width - self.image_flag.width, self.max_height - self.image_flag.height)
-            new_img.paste(self.image_flag, flag_position, mask=self.image_flag)
-        self.image_cache[self.image_size.get()][img_path] = new_img
-        return new_img
+            self._photo_cache.move_to_end(img_path)
+        return photo
+
+
+    def request_thumbnail(self, index: int, img_path: str, stamp: Optional[Tuple[int, int]]):
+        """Check the file (and its text pair) in the background, rebuilding the thumbnail if it changed."""
+        self._requested.add(img_path)
+        txt_path = self.app.text_files[index] if index < len(self.app.text_files) else os.path.splitext(img_path)[0] + '.txt'
+        video_data = self.app.video_thumb_dict.get(img_path) if self._is_video_file(img_path) else None
+        video_thumb = video_data['thumbnail'] if video_data else None
+        size = (self.max_width, self.max_height)
+        self._executor.submit(self._load_thumbnail, self._generation, self.image_size.get(), index, img_path, txt_path, size, stamp, video_thumb)
+        self._outstanding += 1
+        if self._poll_job_id is None:
+            self._poll_job_id = self.after(50, self._process_result_queue)
+
+
+    def _load_thumbnail(self, generation, size_key, index, img_path, txt_path, size, stamp, video_thumb):
+        """Worker thread: return a new thumbnail only if the cached one is missing or out of date."""
+        if generation != self._generation or img_path not in self._wanted:
+            self._result_queue.put((generation, size_key, index, img_path, None, None, None))
+            return
+        txt_stamp = _file_stamp(txt_path) if txt_path else None
+        has_text = bool(txt_stamp and txt_stamp[1] > 0)
+        new_stamp = _file_stamp(img_path)
+        thumbnail = None
+        if new_stamp is not None and new_stamp != stamp:
+            try:
+                thumbnail = make_thumbnail(img_path, size, video_thumb)
+            except Exception:
+                # Unreadable file, shown with the flag until the file changes
+                thumbnail = self.image_flag.copy()
+            if self._is_video_file(img_path) and video_thumb is None:
+                # Placeholder, build it again once the video thumbnail exists
+                new_stamp = None
+        self._result_queue.put((generation, size_key, index, img_path, new_stamp, thumbnail, has_text))
 
 
-    def get_image_and_text_paths(self, filename):
-        img_path = os.path.join(self.working_folder, filename)
-        txt_path = os.path.splitext(img_path)[0] + '.txt'
-        return img_path, txt_path
+    def _process_result_queue(self):
+        self._poll_job_id = None
+        try:
+            while True:
+                generation, size_key, index, img_path, stamp, thumbnail, has_text = self._result_queue.get_nowait()
+                self._outstanding -= 1
+                if generation != self._generation:
+                    continue
+                if has_text is None:
+                    # Skipped because it scrolled out of view before the worker got to it
+                    self._requested.discard(img_path)
+                    continue
+                self._has_text[img_path] = has_text
+                if thumbnail is not None:
+                    cache = self.image_cache[size_key]
+                    cache[img_path] = (stamp, thumbnail)
+                    while len(cache) > THUMBNAIL_CACHE_SIZE:
+                        cache.popitem(last=False)
+                    self._photo_cache.pop(img_path, None)
+                elif img_path in self.image_cache[size_key]:
+                    self.image_cache[size_key].move_to_end(img_path)
+                cell = self.cell_by_index.get(index)
+                if cell is not None and cell["index"] == index:
+                    self.update_cell(cell)
+        except queue.Empty:
+            pass
+        if self._outstanding > 0:
+            self._poll_job_id = self.after(50, self._process_result_queue)
 
 
     def create_image_flag(self):
@@ -402,114 +534,126 @@ class ImageGrid(ttk.Frame):
 
 
     def get_image_index(self, directory, filename):
-        filename = os.path.basename(filename)
-        try:
-            return self.app.image_files.index(os.path.join(directory, filename))
-        except ValueError:
-            return -1
+        return self.app.image_index.index_of(os.path.join(directory, os.path.basename(filename)))
 
 
 #endregion
 #region Interface Logic
 
 
-    def configure_scroll_region(self, reset_view=True):
-        if self.canvas_window is None:
-            return
-        self.frame_image_grid.update_idletasks()
-        bbox = self.canvas_thumbnails.bbox(self.canvas_window)
-        if bbox is None:
+    def highlight_thumbnail(self, index):
+        if not self.is_initialized:
             return
-        x0, y0, x1, y1 = bbox
-        extra_height = self.max_height + (2 * self.padding) if self.loaded_images < self.num_total_images else 0
-        self.canvas_thumbnails.config(scrollregion=(x0, y0, x1, y1 + extra_height))
-        if reset_view:
-            self.canvas_thumbnails.yview_moveto(0)
+        self.selected_index = index
+        self.place_selection()
+        self.ensure_thumbnail_visible(index)
+        self.app.update_imageinfo()
 
 
-    def add_load_more_button(self):
-        if self.loaded_images < self.num_total_images:
-            total_items = len(self.thumbnail_buttons)
-            final_row = (total_items - 1) // self.columns if total_items else 0
-            self.load_more_button = ttk.Button(self.frame_image_grid, text="Load More", command=self.load_images)
-            self.load_more_button.grid(row=final_row + 1, column=0, columnspan=self.columns, pady=(self.padding * 2), padx=self.padding, sticky="ew")
-            Tip.create(widget=self.load_more_button, text=f"Load the next {self.images_per_load} images")
+    def create_highlight_overlay(self):
+        mask_color = (0, 93, 215, 96)
+        return Image.new("RGBA", (self.max_width, self.max_height), mask_color)
 
 
-    def highlight_thumbnail(self, index):
-        if self.prev_selected_thumbnail:
-            self._reset_thumbnail(self.prev_selected_thumbnail)
-        button = self.thumbnail_buttons.get(index)
-        if not button:
+    def create_selection_items(self):
+        """(Re)create the selection frame, drawn below all thumbnails, and the tinted overlay drawn above them."""
+        canvas = self.canvas_thumbnails
+        if self.selection_frame is not None:
+            canvas.delete(self.selection_frame, self.selection_overlay)
+        self.selection_frame = canvas.create_rectangle(0, 0, 0, 0, fill="#005dd7", outline="", state="hidden")
+        self.selection_overlay = canvas.create_image(0, 0, anchor="center", image=self.highlight_photo, state="hidden")
+        canvas.tag_lower(self.selection_frame)
+
+
+    def place_selection(self):
+        """Move the selection items onto the selected index, without any image work or disk reads."""
+        if self.selection_frame is None:
             return
-        img_path = None
-        for _, path, idx in self.images:
-            if idx == index:
-                img_path = path
-                break
-        if not img_path:
+        canvas = self.canvas_thumbnails
+        index = self.selected_index
+        if index is None or not 0 <= index < self.num_total_images:
+            canvas.itemconfigure(self.selection_frame, state="hidden")
+            canvas.itemconfigure(self.selection_overlay, state="hidden")
             return
-        self.prev_selected_thumbnail = button
-        # Handle video files differently
-        if self._is_video_file(img_path):
-            if hasattr(self.app, 'video_thumb_dict') and img_path in self.app.video_thumb_dict:
-                # Access the thumbnail from the nested dictionary
-                img = self.app.video_thumb_dict[img_path]['thumbnail'].copy()
-                img = img.resize((self.max_width, self.max_height), Image.LANCZOS)
-                highlighted_thumbnail = self.apply_highlight(img)
-                bordered_thumb = ImageTk.PhotoImage(highlighted_thumbnail)
-                button.configure(image=bordered_thumb, style="Highlighted.TButton")
-                button.image = bordered_thumb
-        else:
-            with Image.open(img_path) as img:
-                img.thumbnail((self.max_width, self.max_height))
-                highlighted_thumbnail = self.apply_highlight(img)
-                bordered_thumb = ImageTk.PhotoImage(highlighted_thumbnail)
-                button.configure(image=bordered_thumb, style="Highlighted.TButton")
-                button.image = bordered_thumb
-        self.ensure_thumbnail_visible(button)
-        self.app.update_imageinfo()
+        center_x, center_y, half_w, half_h = self.cell_box(index)
+        canvas.coords(self.selection_frame, center_x - half_w, center_y - half_h, center_x + half_w, center_y + half_h)
+        canvas.coords(self.selection_overlay, center_x, center_y)
+        canvas.itemconfigure(self.selection_frame, state="normal")
+        canvas.itemconfigure(self.selection_overlay, state="normal")
 
 
-    def _reset_thumbnail(self, button):
-        if not button:
+    def ensure_thumbnail_visible(self, index):
+        if index is None or not 0 <= index < self.num_total_images:
             return
-        for index, btn in self.thumbnail_buttons.items():
-            if btn == button:
-                for img_tk, _, idx in self.images:
-                    if idx == index:
-                        button.configure(image=img_tk, style="TButton")
-                        button.image = img_tk
-                        return
-                break
+        _, cell_y = self.cell_origin(index)
+        canvas_height = self.canvas_thumbnails.winfo_height()
+        total_height = self.rows * self.row_height + 2 * self.padding
+        top = self.canvas_thumbnails.canvasy(0)
+        if top <= cell_y and cell_y + self.row_height <= top + canvas_height:
+            return
+        center_pos = (cell_y + self.row_height / 2) - (canvas_height / 2)
+        center_pos = max(0, min(center_pos, total_height - canvas_height))
+        self.canvas_thumbnails.yview_moveto(center_pos / total_height if total_height else 0)
+        self.render_visible()
 
 
-    def apply_highlight(self, img):
-        mask_color = (0, 93, 215, 96)
-        base = img.copy().convert("RGBA")
-        overlay = Image.new("RGBA", base.size, mask_color)
-        return Image.alpha_composite(base, overlay)
+    def index_at(self, x, y) -> Optional[int]:
+        """Image index under a point in widget coordinates, or None."""
+        canvas_x = self.canvas_thumbnails.canvasx(x) - self.padding
+        canvas_y = self.canvas_thumbnails.canvasy(y) - self.padding
+        if canvas_x < 0 or canvas_y < 0:
+            return None
+        column = int(canvas_x // self.column_width)
+        row = int(canvas_y // self.row_height)
+        if column >= self.columns:
+            return None
+        index = row * self.columns + column
+        return index if index < self.num_total_images else None
 
 
-    def reset_initial_thumbnail(self):
-        if self.initial_selected_thumbnail:
-            self.initial_selected_thumbnail.configure(style="TButton")
-            self.initial_selected_thumbnail = None
+    def on_canvas_click(self, event):
+        index = self.index_at(event.x, event.y)
+        if index is not None:
+            self.on_mouse_click(index)
 
 
-    def ensure_thumbnail_visible(self, button):
-        if not button:
+    def on_canvas_motion(self, event):
+        index = self.index_at(event.x, event.y)
+        if index == self._hover_index:
             return
-        button_index = list(self.thumbnail_buttons.values()).index(button)
-        row, _ = divmod(button_index, self.cols)
-        cell_height = self.max_height + 2 * self.padding
-        button_y = row * cell_height
-        canvas_height = self.canvas_thumbnails.winfo_height()
-        total_height = self.frame_image_grid.winfo_height()
-        center_pos = (button_y + cell_height / 2) - (canvas_height / 2)
-        center_pos = max(0, min(center_pos, total_height - canvas_height))
-        target_scroll = center_pos / total_height
-        self.canvas_thumbnails.yview_moveto(target_scroll)
+        self._hover_index = index
+        self.canvas_thumbnails.config(cursor="hand2" if index is not None else "")
+        if index is None:
+            self.tooltip.hide()
+            self.tooltip.config(text="")
+            return
+        self.tooltip.config(text=self.get_tooltip_text(index))
+
+
+    def on_canvas_leave(self, event):
+        self._hover_index = None
+        self.tooltip.config(text="")
+
+
+    def get_tooltip_text(self, index) -> str:
+        """Build a cell's tooltip the first time it is hovered."""
+        if index in self._tooltip_cache:
+            return self._tooltip_cache[index]
+        filepath = self.app.image_files[index]
+        try:
+            filesize = os.path.getsize(filepath)
+            filesize = f"{filesize / 1024:.2f} KB" if filesize < 1024 * 1024 else f"{filesize / 1024 / 1024:.2f} MB"
+        except OSError:
+            filesize = "?"
+        if self._is_video_file(filepath):
+            video_data = self.app.video_thumb_dict.get(filepath)
+            resolution = "({} x {})".format(*video_data['resolution']) if video_data and video_data.get('resolution') else "(Video)"
+        else:
+            header = self.app.image_probe.get(filepath)
+            resolution = f"({header.width} x {header.height})" if header else ""
+        tooltip_text = f"#{index + 1}, {os.path.basename(filepath)}, {filesize}, {resolution}"
+        self._tooltip_cache[index] = tooltip_text
+        return tooltip_text
 
 
     def on_mouse_click(self, index):
@@ -562,11 +706,4 @@ class ImageGrid(ttk.Frame):
             return
         self.last_parent_size = new_size
         if getattr(self, "is_initialized", False):
-            try:
-                # call reload directly (short tasks) or schedule if needed
-                self.reload_grid()
-            except Exception:
-                try:
-                    self.after_idle(self.reload_grid)
-                except Exception:
-                    pass
+            self.relayout()
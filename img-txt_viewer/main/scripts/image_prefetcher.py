@@ -0,0 +1,195 @@
+#region Imports
+
+
+# Standard
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+
+# Third-Party
+from PIL import Image
+
+# Typing
+from typing import Dict, Iterable, Optional, Tuple
+
+
+#endregion
+#region Constants
+
+
+# Decoded pixels kept in memory across all cached images
+DEFAULT_MEMORY_BUDGET = 768 * 1024 * 1024
+
+# Images decoded ahead of / behind the current index, in the navigation direction
+DEFAULT_AHEAD = 3
+DEFAULT_BEHIND = 1
+
+
+#endregion
+#region Entry
+
+
+class _Entry:
+    __slots__ = ("image", "info", "stamp", "nbytes")
+
+    def __init__(self, image: Image.Image, info: dict, stamp: Tuple[int, int]) -> None:
+        self.image = image
+        self.info = info
+        self.stamp = stamp
+        self.nbytes = image.width * image.height * len(image.getbands())
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def image_info(path: str, image: Image.Image, file_size: int) -> dict:
+    """Status bar info for an image, in the format used by ImgTxtViewer.get_image_info()."""
+    size_kb = file_size / 1024
+    size_str = f"{round(size_kb)} KB" if size_kb < 1024 else f"{round(size_kb / 1024, 2)} MB"
+    filename = os.path.basename(path)
+    filename = (filename[:40] + '(...)') if len(filename) > 45 else filename
+    return {"filename": filename, "resolution": f"{image.width} x {image.height}", "size": size_str, "color_mode": image.mode}
+
+
+#endregion
+#region ImagePrefetcher
+
+
+class ImagePrefetcher:
+    """
+    Memory-budgeted LRU of decoded images for the primary display, filled ahead of navigation.
+
+    Worker threads decode the next few images in the direction the user is moving,
+    so showing them is a cache hit. Entries are checked against the file's
+    modified time and size, so images edited on disk are decoded again.
+    """
+    def __init__(self, memory_budget: int = DEFAULT_MEMORY_BUDGET, ahead: int = DEFAULT_AHEAD, behind: int = DEFAULT_BEHIND, max_workers: int = 2) -> None:
+        self.memory_budget = memory_budget
+        self.ahead = ahead
+        self.behind = behind
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ImagePrefetch")
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._cached_bytes = 0
+
+
+    def load(self, path: str) -> Image.Image:
+        """Return the decoded image for path, from the cache, an in-flight prefetch, or by decoding it now."""
+        entry = self._get_entry(path)
+        if entry is None:
+            with self._lock:
+                future = self._pending.pop(path, None)
+            # A prefetch that already started is faster to wait for than to repeat
+            if future is not None and not future.cancel():
+                entry = future.result()
+            if entry is None:
+                entry = self._decode(path)
+        return entry.image
+
+
+    def info(self, path: str) -> Optional[dict]:
+        """Return cached status bar info for path without opening it, or None."""
+        with self._lock:
+            entry = self._entries.get(path)
+        return entry.info if entry is not None else None
+
+
+    def prefetch(self, paths: Iterable[str]) -> None:
+        """Decode paths in the background, in order. Pending prefetches for other paths are cancelled."""
+        wanted = [path for path in paths if path]
+        with self._lock:
+            for path, future in list(self._pending.items()):
+                if path not in wanted and future.cancel():
+                    del self._pending[path]
+            for path in wanted:
+                if path not in self._entries and path not in self._pending:
+                    self._pending[path] = self._executor.submit(self._prefetch_worker, path)
+
+
+    def neighbours(self, files: list, index: int, direction: int = 1) -> list:
+        """Paths to prefetch around index, favouring the navigation direction. Wraps like next/prev."""
+        count = len(files)
+        if count < 2:
+            return []
+        direction = 1 if direction >= 0 else -1
+        steps = [direction * step for step in range(1, self.ahead + 1)] + [-direction * step for step in range(1, self.behind + 1)]
+        seen = {index}
+        paths = []
+        for step in steps:
+            i = (index + step) % count
+            if i not in seen:
+                seen.add(i)
+                paths.append(files[i])
+        return paths
+
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Drop path from the cache, or everything if path is None."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._cached_bytes = 0
+                return
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self._cached_bytes -= entry.nbytes
+
+
+#endregion
+#region Mechanics
+
+
+    def _get_entry(self, path: str) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                self._entries.move_to_end(path)
+        if entry is not None and entry.stamp != _file_stamp(path):
+            self.invalidate(path)
+            return None
+        return entry
+
+
+    def _prefetch_worker(self, path: str) -> Optional[_Entry]:
+        try:
+            return self._decode(path)
+        except Exception:
+            # Errors are reported when the image is actually shown
+            return None
+        finally:
+            with self._lock:
+                self._pending.pop(path, None)
+
+
+    def _decode(self, path: str) -> _Entry:
+        stamp = _file_stamp(path)
+        if stamp is None:
+            raise FileNotFoundError(path)
+        with Image.open(path) as image:
+            image.load()
+        entry = _Entry(image, image_info(path, image, stamp[1]), stamp)
+        self._store(path, entry)
+        return entry
+
+
+    def _store(self, path: str, entry: _Entry) -> None:
+        with self._lock:
+            previous = self._entries.pop(path, None)
+            if previous is not None:
+                self._cached_bytes -= previous.nbytes
+            self._entries[path] = entry
+            self._cached_bytes += entry.nbytes
+            # Evict least recently used images, but always keep the newest one
+            while self._cached_bytes > self.memory_budget and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._cached_bytes -= evicted.nbytes
+
+
+#endregion
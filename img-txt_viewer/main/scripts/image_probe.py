@@ -0,0 +1,184 @@
+#region Imports
+
+
+# Standard
+import os
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# tkinter
+from tkinter import TclError
+
+# Third-Party
+from PIL import Image
+
+# Typing
+from typing import TYPE_CHECKING, Callable, List, NamedTuple, Optional, Sequence, Tuple
+if TYPE_CHECKING:
+    from tkinter import Tk
+
+
+#endregion
+#region Constants
+
+
+# Headers kept in memory, they are small
+MAX_ENTRIES = 100000
+
+# Paths handed to a worker at a time, and results delivered to the UI per poll
+CHUNK_SIZE = 64
+RESULTS_PER_POLL = 500
+
+
+#endregion
+#region ImageHeader
+
+
+class ImageHeader(NamedTuple):
+    width: int
+    height: int
+    format: Optional[str]
+    mode: str
+    dpi: Optional[Tuple[float, float]]
+    file_size: int
+    mtime: float
+
+
+    @property
+    def dimensions(self) -> str:
+        return f"{self.width}x{self.height}"
+
+
+def read_header(path: str, stat: Optional[os.stat_result] = None) -> Optional[ImageHeader]:
+    """Read an image's header without decoding its pixels. Returns None if it isn't a readable image."""
+    try:
+        stat = stat or os.stat(path)
+        # Image.open only parses the header, pixels are decoded on load()
+        with Image.open(path) as img:
+            width, height = img.size
+            return ImageHeader(width, height, img.format, img.mode, img.info.get("dpi"), stat.st_size, stat.st_mtime)
+    except Exception:
+        return None
+
+
+#endregion
+#region ImageProbe
+
+
+class ImageProbe:
+    """
+    Shared cache of image headers (dimensions, format, mode, DPI, size) for every tab.
+
+    Headers are cached by path and checked against the file's modified time and
+    size, so a folder is only read once no matter how many file trees show it.
+    probe_async() reads headers in a thread pool and hands them to the UI in
+    batches, so trees can show every row at once and fill in the details as they arrive.
+    """
+    def __init__(self, max_workers: int = 4, max_entries: int = MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ImageProbe")
+        self._lock = threading.Lock()
+        # path -> (mtime_ns, size, header or None if the file isn't a readable image)
+        self._entries: "OrderedDict[str, Tuple[int, int, Optional[ImageHeader]]]" = OrderedDict()
+
+
+    def get(self, path: str) -> Optional[ImageHeader]:
+        """The header for path, read now if it isn't cached or the file changed."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._entries.move_to_end(path)
+                return entry[2]
+        header = read_header(path, stat)
+        with self._lock:
+            self._entries[path] = (stat.st_mtime_ns, stat.st_size, header)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return header
+
+
+    def probe_async(self, root: 'Tk', paths: Sequence[str], on_results: Callable[[List[Tuple[str, Optional[ImageHeader]]]], None], on_done: Optional[Callable[[], None]] = None) -> "ProbeJob":
+        """
+        Read headers for paths in the background.
+
+        on_results receives lists of (path, header) on the Tk main thread as they
+        arrive, then on_done is called once. Cancel the returned job to stop
+        delivering results, for example when the tree is repopulated.
+        """
+        job = ProbeJob(self, root, list(paths), on_results, on_done)
+        job.start()
+        return job
+
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
+
+
+#endregion
+#region ProbeJob
+
+
+class ProbeJob:
+    """One probe_async() request. Results are queued by the workers and delivered by polling."""
+    def __init__(self, probe: ImageProbe, root: 'Tk', paths: List[str], on_results: Callable, on_done: Optional[Callable]) -> None:
+        self.probe = probe
+        self.root = root
+        self.paths = paths
+        self.on_results = on_results
+        self.on_done = on_done
+        self.cancelled = False
+        self._remaining = len(paths)
+        self._queue: "queue.Queue[Tuple[str, Optional[ImageHeader]]]" = queue.Queue()
+
+
+    def start(self) -> None:
+        for start in range(0, len(self.paths), CHUNK_SIZE):
+            self.probe._executor.submit(self._worker, self.paths[start:start + CHUNK_SIZE])
+        self.root.after(0, self._poll)
+
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+    def _worker(self, paths: List[str]) -> None:
+        for path in paths:
+            if self.cancelled:
+                return
+            self._queue.put((path, self.probe.get(path)))
+
+
+    def _poll(self) -> None:
+        if self.cancelled:
+            return
+        results = []
+        try:
+            while len(results) < RESULTS_PER_POLL:
+                results.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        if results:
+            self._remaining -= len(results)
+            try:
+                self.on_results(results)
+            except TclError:
+                # The tree was destroyed, stop delivering
+                self.cancelled = True
+                return
+        if self._remaining > 0:
+            self.root.after(30, self._poll)
+        elif self.on_done:
+            self.on_done()
+
+
+#endregion
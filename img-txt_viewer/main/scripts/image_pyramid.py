@@ -0,0 +1,84 @@
+#region Imports
+
+
+# Third-Party
+from PIL import Image
+
+# Typing
+from typing import List, Optional, Tuple
+
+
+#endregion
+#region Constants
+
+
+# Full resolution plus 1/2, 1/4 and 1/8
+MAX_LEVELS = 4
+
+# Stop halving once the longer side would drop under this
+MIN_LEVEL_SIZE = 256
+
+# Modes that Image.reduce() and ImageTk.PhotoImage both handle directly
+DISPLAY_MODES = ("RGB", "RGBA", "L")
+
+
+#endregion
+#region ImagePyramid
+
+
+def _display_copy(image: Image.Image) -> Image.Image:
+    if image.mode in DISPLAY_MODES:
+        return image
+    has_alpha = "A" in image.getbands() or "transparency" in image.info
+    return image.convert("RGBA" if has_alpha else "RGB")
+
+
+class ImagePyramid:
+    """
+    A full-resolution image and successively halved copies of it, for display.
+
+    Scaling an image for the screen starts from the smallest level that is still
+    at least as large as the target, so resizing a view of a 50 MP photo only
+    ever resamples a few megapixels. The full-resolution image is kept as is
+    for cropping and saving.
+    """
+    def __init__(self, image: Image.Image) -> None:
+        self.image = image
+        level = _display_copy(image)
+        self.levels: List[Image.Image] = [level]
+        while len(self.levels) < MAX_LEVELS and max(level.size) // 2 >= MIN_LEVEL_SIZE:
+            level = level.reduce(2)
+            self.levels.append(level)
+
+
+    def level_for(self, size: Tuple[int, int]) -> Image.Image:
+        """The smallest level at least size in both dimensions, or the full-resolution level."""
+        for level in reversed(self.levels):
+            if level.width >= size[0] and level.height >= size[1]:
+                return level
+        return self.levels[0]
+
+
+def load_pyramid(path: str) -> ImagePyramid:
+    """Decode an image and build its pyramid. Slow for large images, meant for a worker thread."""
+    with Image.open(path) as img:
+        return ImagePyramid(img.copy())
+
+
+def open_preview(path: str, size: Tuple[int, int]) -> Optional[Image.Image]:
+    """
+    A quick, reduced decode of a JPEG, at least size, to show while the pyramid is built.
+    Returns None for other formats, they have no reduced decode.
+    """
+    try:
+        with Image.open(path) as img:
+            if img.format != "JPEG" or not all(size):
+                return None
+            img.draft("RGB", size)
+            img.load()
+            return _display_copy(img.copy())
+    except Exception:
+        return None
+
+
+#endregion
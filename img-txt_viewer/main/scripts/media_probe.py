@@ -0,0 +1,157 @@
+#region Imports
+
+
+# Standard
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+
+# Third-Party
+from PIL import Image
+
+# Local
+import main.scripts.video_thumbnail_generator as vtg
+
+# Typing
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+#endregion
+#region Constants
+
+
+# Where the representative frame (thumbnail, auto-tag input) is taken from
+FRAME_TIMESTAMP_SECONDS = 2.0
+
+# Probed videos kept in memory
+MAX_ENTRIES = 1000
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+#endregion
+#region MediaProbe
+
+
+class MediaProbe:
+    """
+    Shared cache of video metadata and representative frames.
+
+    Each video is opened once, in a background pool, and its resolution,
+    framerate, duration, frame count and the frame at FRAME_TIMESTAMP_SECONDS
+    are kept until the file's modified time or size changes. The display,
+    Image Grid, file stats, Auto-Tag and frame extractor all read from here
+    instead of opening the file again.
+
+    Probe results are dictionaries in the video_thumb_dict format, see vtg.probe_video().
+    """
+    def __init__(self, max_workers: int = 4, max_entries: int = MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="MediaProbe")
+        self._lock = threading.Lock()
+        # path -> (file stamp, probe result or None if the file couldn't be read)
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], Optional[Dict[str, Any]]]]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+
+
+    def probe(self, path: str) -> Optional[Dict[str, Any]]:
+        """Return the probe result for path, probing it now (or waiting for a background probe) if needed."""
+        stamp = _file_stamp(path)
+        if stamp is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(path)
+                return entry[1]
+            future = self._pending.get(path)
+        if future is not None:
+            data = future.result()
+            # The file may have changed while it was being probed
+            if _file_stamp(path) == stamp:
+                return data
+        return self._probe_now(path, stamp)
+
+
+    def probe_many(self, paths: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Probe paths in parallel and return {path: result} for the videos that could be read."""
+        paths = list(paths)
+        self.prefetch(paths)
+        results = {}
+        for path in paths:
+            data = self.probe(path)
+            if data is not None:
+                results[path] = data
+        return results
+
+
+    def prefetch(self, paths: Iterable[str]) -> None:
+        """Probe paths in the background pool, skipping those that are cached or already queued."""
+        with self._lock:
+            for path in paths:
+                if path in self._pending:
+                    continue
+                entry = self._entries.get(path)
+                if entry is not None and entry[0] == _file_stamp(path):
+                    continue
+                self._pending[path] = self._executor.submit(self._probe_worker, path)
+
+
+    def is_pending(self, path: str) -> bool:
+        """Whether path is queued or being probed in the background pool."""
+        with self._lock:
+            return path in self._pending
+
+
+    def frame(self, path: str) -> Optional[Image.Image]:
+        """The representative frame of the video, or None if it couldn't be decoded."""
+        data = self.probe(path)
+        return data['thumbnail'] if data else None
+
+
+    def frame_count(self, path: str) -> Optional[int]:
+        """Number of frames from the container metadata, or an estimate from duration and framerate."""
+        data = self.probe(path)
+        return data['frame_count'] if data else None
+
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Forget path, or every video if path is None."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
+
+
+#endregion
+#region Mechanics
+
+
+    def _probe_worker(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            stamp = _file_stamp(path)
+            return self._probe_now(path, stamp) if stamp is not None else None
+        finally:
+            with self._lock:
+                self._pending.pop(path, None)
+
+
+    def _probe_now(self, path: str, stamp: Tuple[int, int]) -> Optional[Dict[str, Any]]:
+        data = vtg.probe_video(path, timestamp_seconds=FRAME_TIMESTAMP_SECONDS)
+        with self._lock:
+            self._entries[path] = (stamp, data)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data
+
+
+#endregion
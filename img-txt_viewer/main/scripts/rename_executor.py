@@ -0,0 +1,256 @@
+#region Imports
+
+
+# Standard
+import os
+import json
+import errno
+import time
+import uuid
+
+# Typing
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+#endregion
+#region Constants
+
+
+# Written to the folder being renamed while a batch is in progress
+JOURNAL_NAME = ".batch_rename_journal.json"
+
+# Renames between progress reports
+PROGRESS_EVERY = 100
+
+# Journal phases
+PHASE_STAGING = 1     # Sources (and files to be overwritten) are moving to temporary names
+PHASE_COMMITTING = 2  # Temporary names are moving to their destinations
+PHASE_COMMITTED = 3   # Every file is in place, only the overwritten files are left to delete
+
+
+#endregion
+#region RenamePlan
+
+
+class RenamePlan:
+    """
+    A full batch of renames, resolved before anything touches the disk.
+
+    entries are (source, temporary, destination) paths. Overwritten files are
+    entries with no destination, they are moved aside with the rest and only
+    deleted once every rename has succeeded, so a rollback can restore them.
+    skipped are (source, destination) pairs dropped because the destination
+    exists and overwrite was off.
+    """
+    def __init__(self, directory: str, entries: List[Dict[str, Optional[str]]], skipped: List[Tuple[str, str]]) -> None:
+        self.directory = directory
+        self.entries = entries
+        self.skipped = skipped
+
+
+    @property
+    def journal_path(self) -> str:
+        return os.path.join(self.directory, JOURNAL_NAME)
+
+
+    @property
+    def renames(self) -> List[Tuple[str, str]]:
+        return [(entry["src"], entry["dst"]) for entry in self.entries if entry["dst"]]
+
+
+    @property
+    def overwritten(self) -> List[str]:
+        return [entry["src"] for entry in self.entries if not entry["dst"]]
+
+
+    def inverse(self) -> "RenamePlan":
+        """A plan that moves every renamed file back. Overwritten files are not restored."""
+        return plan_renames(self.directory, [(dst, src) for src, dst in self.renames])
+
+
+def _path_key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def plan_renames(directory: str, renames: Iterable[Tuple[str, str]], overwrite: bool = False) -> RenamePlan:
+    """
+    Plan renaming each (source, destination) path, as one permutation.
+
+    Destinations may be other sources (swaps, cycles, shifted numbering), every
+    file goes through a temporary name first so the order doesn't matter.
+    Raises ValueError if two files would get the same destination.
+    """
+    renames = [(src, dst) for src, dst in renames if src != dst]
+    destinations = set()
+    for _, dst in renames:
+        dst_key = _path_key(dst)
+        if dst_key in destinations:
+            raise ValueError(f"More than one file would be renamed to {os.path.basename(dst)}")
+        destinations.add(dst_key)
+    # A skipped file stays where it is, so a rename onto its name is skipped too, until nothing changes
+    skipped = []
+    while True:
+        sources = {_path_key(src) for src, _ in renames}
+        blocked = [(src, dst) for src, dst in renames if _overwrites(src, dst, sources)] if not overwrite else []
+        if not blocked:
+            break
+        skipped.extend(blocked)
+        renames = [rename for rename in renames if rename not in blocked]
+    token = uuid.uuid4().hex[:8]
+    entries = []
+    for src, dst in renames:
+        if _overwrites(src, dst, sources):
+            entries.append({"src": dst, "tmp": _temp_path(dst, token, len(entries)), "dst": None})
+        entries.append({"src": src, "tmp": _temp_path(src, token, len(entries)), "dst": dst})
+    return RenamePlan(directory, entries, skipped)
+
+
+def _overwrites(src: str, dst: str, sources: Set[str]) -> bool:
+    # A destination that exists and isn't moving away itself would be overwritten
+    return os.path.lexists(dst) and _path_key(dst) not in sources and not _same_file(src, dst)
+
+
+def _same_file(src: str, dst: str) -> bool:
+    # A case-only rename on a case-insensitive file system
+    try:
+        return os.path.samefile(src, dst)
+    except OSError:
+        return False
+
+
+def _temp_path(path: str, token: str, index: int) -> str:
+    return os.path.join(os.path.dirname(path), f".{token}_{index}.renaming")
+
+
+#endregion
+#region Execute
+
+
+class RenameResult:
+    def __init__(self, count: int, seconds: float) -> None:
+        self.count = count
+        self.seconds = seconds
+
+
+    @property
+    def renames_per_second(self) -> float:
+        return self.count / self.seconds if self.seconds > 0 else float(self.count)
+
+
+def execute_plan(plan: RenamePlan, progress_callback: Optional[Callable[[int, int, float], None]] = None) -> RenameResult:
+    """
+    Carry out a plan in two phases, with a journal in the plan's folder.
+
+    Phase one moves every source to its temporary name, phase two moves the
+    temporary names to their destinations. If anything fails the finished
+    renames are rolled back and the error is raised. If the process dies, the
+    journal is left behind for rollback_journal().
+
+    progress_callback(done, total, renames_per_second) is called every PROGRESS_EVERY
+    renames, from the calling thread. Every file is renamed twice, total counts both.
+    """
+    entries = plan.entries
+    if not entries:
+        return RenameResult(0, 0.0)
+    total = len(entries) + len(plan.renames)
+    start = time.perf_counter()
+    done = 0
+
+    def step():
+        nonlocal done
+        done += 1
+        if progress_callback and (done % PROGRESS_EVERY == 0 or done == total):
+            progress_callback(done, total, done / max(time.perf_counter() - start, 1e-6))
+
+    phase = PHASE_STAGING
+    _write_journal(plan.journal_path, plan.directory, phase, entries)
+    try:
+        for entry in entries:
+            os.rename(entry["src"], entry["tmp"])
+            step()
+        phase = PHASE_COMMITTING
+        _write_journal(plan.journal_path, plan.directory, phase, entries)
+        for entry in entries:
+            if entry["dst"]:
+                # os.rename() replaces an existing file on POSIX, the plan only ever targets free names
+                if os.path.lexists(entry["dst"]):
+                    raise FileExistsError(errno.EEXIST, "Destination already exists", entry["dst"])
+                os.rename(entry["tmp"], entry["dst"])
+                step()
+    except BaseException:
+        _rollback(entries, phase)
+        _remove_journal(plan.journal_path)
+        raise
+    phase = PHASE_COMMITTED
+    _write_journal(plan.journal_path, plan.directory, phase, entries)
+    _delete_overwritten(entries)
+    _remove_journal(plan.journal_path)
+    return RenameResult(len(plan.renames), time.perf_counter() - start)
+
+
+#endregion
+#region Journal
+
+
+def find_journal(directory: str) -> Optional[dict]:
+    """The journal of an interrupted batch rename in directory, or None."""
+    path = os.path.join(directory, JOURNAL_NAME)
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            journal = json.load(file)
+    except (OSError, ValueError):
+        return None
+    journal["path"] = path
+    return journal
+
+
+def rollback_journal(journal: dict) -> None:
+    """
+    Recover from an interrupted batch rename.
+
+    A batch that was still renaming is rolled back, every file returns to its
+    original name. A batch that had already committed is finished instead.
+    """
+    entries = journal["entries"]
+    if journal["phase"] >= PHASE_COMMITTED:
+        _delete_overwritten(entries)
+    else:
+        _rollback(entries, journal["phase"])
+    _remove_journal(journal["path"])
+
+
+def _rollback(entries: List[Dict[str, Optional[str]]], phase: int) -> None:
+    # Destinations first move back to their temporary names, freeing any name that was also a source
+    if phase >= PHASE_COMMITTING:
+        for entry in entries:
+            if entry["dst"] and not os.path.lexists(entry["tmp"]) and os.path.lexists(entry["dst"]):
+                os.rename(entry["dst"], entry["tmp"])
+    for entry in entries:
+        if os.path.lexists(entry["tmp"]):
+            os.rename(entry["tmp"], entry["src"])
+
+
+def _delete_overwritten(entries: List[Dict[str, Optional[str]]]) -> None:
+    for entry in entries:
+        if not entry["dst"] and os.path.lexists(entry["tmp"]):
+            os.remove(entry["tmp"])
+
+
+def _write_journal(path: str, directory: str, phase: int, entries: List[Dict[str, Optional[str]]]) -> None:
+    # Write and flush a new file, then swap it in, so the journal on disk is always complete
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump({"directory": directory, "phase": phase, "entries": entries}, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+def _remove_journal(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+#endregion
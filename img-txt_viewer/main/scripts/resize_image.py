@@ -3,7 +3,7 @@
 
 # Standard
 import os
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 
 # tkinter
 from tkinter import ttk, Tk, Toplevel, messagebox, IntVar, StringVar, BooleanVar, Frame, Label, Button
@@ -12,6 +12,9 @@ from tkinter import ttk, Tk, Toplevel, messagebox, IntVar, StringVar, BooleanVar
 import nenotk as ntk
 from PIL import Image, ImageSequence
 
+# Local
+from main.scripts import tiling, size_estimator
+
 # Typing
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
@@ -37,8 +40,6 @@ class ResizeTool:
         self.supported_filetypes = (".png", ".webp", ".jpg", ".jpeg", ".jpg_large", ".jfif", ".tif", ".tiff", ".bmp", ".gif")
 
         self.app = app
-        self.sort_key = self.app.get_file_sort_key()
-        self.reverse_sort_direction_var = self.app.reverse_load_order_var.get()
         self.ImgTxt_update_pair = update_pair
         self.ImgTxt_jump_to_image = jump_to_image
 
@@ -59,6 +60,11 @@ class ResizeTool:
         self.combobox_filetype_var = StringVar(value="JPG")
         self.combobox_filter_var = StringVar(value="Lanczos")
 
+        # Exact file sizes are encoded in the background, a newer request makes older ones stale
+        self.size_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ResizeEstimate")
+        self.size_generation = 0
+        self.size_after_id = None
+
         self.entry_width_var.trace_add("write", lambda name, index, mode, string=self.entry_width_var: self.validate_entry(string))
         self.entry_height_var.trace_add("write", lambda name, index, mode, string=self.entry_height_var: self.validate_entry(string))
 
@@ -206,10 +212,10 @@ class ResizeTool:
         frame_size = Frame(frame_info)
         frame_size.pack(side="left", expand=True, fill="x", padx=10, pady=10)
         # Current Filesize
-        self.label_current_size = Label(frame_size, text="00.0 KB", width=9)
+        self.label_current_size = Label(frame_size, text="00.0 KB", width=10)
         self.label_current_size.pack(anchor="w", side="top", padx=5, pady=5)
         # New Filesize
-        self.label_new_size = Label(frame_size, text="00.0 KB", width=9)
+        self.label_new_size = Label(frame_size, text="00.0 KB", width=10)
         self.label_new_size.pack(anchor="w", side="top", padx=5, pady=5)
         # Filetype
         frame_filetype = Frame(frame_info)
@@ -394,13 +400,8 @@ class ResizeTool:
 
 
     def get_image_index(self, directory, filename):
-        filename = os.path.basename(filename)
-        image_files = sorted(
-            (file for file in os.listdir(directory) if file.lower().endswith(self.supported_filetypes)),
-            key=self.sort_key,
-            reverse=self.reverse_sort_direction_var
-        )
-        return image_files.index(filename) if filename in image_files else -1
+        # The resized copy may be a new file, which is added to the app's lists on its own
+        return self.app.add_image_file(os.path.join(directory, os.path.basename(filename)))
 
 
     def get_current_image_details(self):
@@ -420,6 +421,8 @@ class ResizeTool:
 
 
     def close_window(self, index=None, event=None):
+        self.cancel_exact_size()
+        self.size_executor.shutdown(wait=False)
         self.ImgTxt_update_pair()
         self.ImgTxt_jump_to_image(index)
         self.top.destroy()
@@ -512,36 +515,64 @@ class ResizeTool:
 
 
     def calculate_image_size(self, event=None):
-        if self.new_image_width > 12000 or self.new_image_height > 12000:
-            self.label_new_size.config(text="???")
-            return
+        """Show an estimated output size right away, and the exact size once the settings stop changing."""
+        self.cancel_exact_size()
         try:
-            file_type = self.combobox_filetype_var.get().lower()
-            file_type = 'jpeg' if file_type == 'jpg' else file_type
-            filter_method = str(self.combobox_filter_var.get()).upper()
-            temp_file = BytesIO()
-            if file_type == 'gif':
-                frames = []
-                durations = []
-                for frame in ImageSequence.Iterator(self.image):
-                    frame = frame.convert('RGBA').resize((self.new_image_width, self.new_image_height), getattr(Image, filter_method))
-                    frames.append(frame)
-                    durations.append(frame.info['duration'])
-                frames[0].save(temp_file, format=file_type, save_all=True, append_images=frames[1:], duration=durations, loop=0)
-            else:
-                resized_image = self.image.resize((self.new_image_width, self.new_image_height), getattr(Image, filter_method))
-                if file_type in ['jpeg', 'webp']:
-                    resized_image.save(temp_file, format=file_type, quality=self.scale_quality_var.get())
-                else:
-                    resized_image.save(temp_file, format=file_type)
-            image_size = temp_file.tell()
-            temp_file.close()
-            converted_size = self.convert_filesize(image_size)
-            self.label_new_size.config(text=converted_size)
+            params = self.get_size_params()
+            estimate = size_estimator.estimate_size(self.image, **params)
         except TypeError:
             messagebox.showerror("Error: resize_image.calculate_image_size()", "Something went wrong while processing this image.\n\nPlease try a different file type.")
+            return
         except (ValueError, PermissionError, IOError,):
             return
+        self.label_new_size.config(text=f"~{self.convert_filesize(estimate)}")
+        # Very large outputs only get the estimate
+        if self.new_image_width > 12000 or self.new_image_height > 12000:
+            return
+        self.size_after_id = self.top.after(size_estimator.EXACT_DELAY_MS, self.start_exact_size, self.size_generation)
+
+
+    def get_size_params(self):
+        file_type = self.combobox_filetype_var.get().lower()
+        file_type = 'jpeg' if file_type == 'jpg' else file_type
+        filter_method = str(self.combobox_filter_var.get()).upper()
+        size = (self.new_image_width, self.new_image_height)
+        return {"size": size, "file_type": file_type, "quality": self.scale_quality_var.get(), "resample": getattr(Image, filter_method)}
+
+
+    def cancel_exact_size(self):
+        self.size_generation += 1
+        if self.size_after_id:
+            self.top.after_cancel(self.size_after_id)
+            self.size_after_id = None
+
+
+    def start_exact_size(self, generation):
+        self.size_after_id = None
+        future = self.size_executor.submit(self.exact_size_job, generation, self.get_size_params())
+        self.top.after(50, self.poll_exact_size, generation, future)
+
+
+    def exact_size_job(self, generation, params):
+        # Worker thread, skipped if the settings changed while it was queued
+        if generation != self.size_generation:
+            return None
+        # Its own copy, the UI thread keeps reading (and for GIFs, seeking) self.image for the next estimate
+        return size_estimator.exact_size(self.image.copy(), **params)
+
+
+    def poll_exact_size(self, generation, future):
+        if generation != self.size_generation:
+            return
+        if not future.done():
+            self.top.after(50, self.poll_exact_size, generation, future)
+            return
+        try:
+            image_size = future.result()
+        except Exception:
+            return
+        if image_size is not None:
+            self.label_new_size.config(text=self.convert_filesize(image_size))
 
 
     def save_image(self):
@@ -574,7 +605,7 @@ class ResizeTool:
 
 
     def _save_image(self, file_type, filter_method, new_filepath):
-        resized_image = self.image.resize((self.new_image_width, self.new_image_height), getattr(Image, filter_method))
+        resized_image = tiling.resize(self.image, (self.new_image_width, self.new_image_height), getattr(Image, filter_method))
         if file_type in ['jpeg', 'webp']:
             resized_image.save(new_filepath, quality=self.scale_quality_var.get())
         else:
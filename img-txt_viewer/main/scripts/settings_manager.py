@@ -254,7 +254,7 @@ class SettingsManager:
         self.app.set_working_directory(silent=True)
         self.app.set_text_file_path(str(self.config.get("Path", "last_txt_directory", fallback=last_img_directory)), silent=True)
         last_index = int(self.config.get("Path", "last_index", fallback=1))
-        num_files = len([name for name in os.listdir(last_img_directory) if os.path.isfile(os.path.join(last_img_directory, name))])
+        num_files = len(self.app.image_files)
         self.app.jump_to_image(min(last_index, num_files))
         self.restore_path_confirm = True
 
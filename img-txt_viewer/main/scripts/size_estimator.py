@@ -0,0 +1,124 @@
+#region Imports
+
+
+# Standard
+from io import BytesIO
+from functools import lru_cache
+
+# Third-Party
+from PIL import Image, ImageSequence
+
+# Local
+from main.scripts import tiling
+
+# Typing
+from typing import List, Optional, Tuple
+
+
+#endregion
+#region Constants
+
+
+# Sample tiles are cut from the resized output, in a 2x2 grid
+SAMPLE_TILE = 256
+SAMPLE_GRID = 2
+
+# Outputs up to this many pixels are simply encoded in full
+EXACT_PIXEL_LIMIT = SAMPLE_TILE * SAMPLE_TILE * SAMPLE_GRID * SAMPLE_GRID
+
+# GIF frames encoded for an estimate
+GIF_SAMPLE_FRAMES = 8
+
+# Pause after the last change before the exact size is encoded
+EXACT_DELAY_MS = 600
+
+
+#endregion
+#region Encoding
+
+
+def encoded_size(image: Image.Image, file_type: str, quality: Optional[int] = None) -> int:
+    """Bytes image takes when saved as file_type ('jpeg', 'png', 'webp'), quality applies to jpeg and webp."""
+    buffer = BytesIO()
+    if file_type in ("jpeg", "webp") and quality is not None:
+        image.save(buffer, format=file_type, quality=quality)
+    else:
+        image.save(buffer, format=file_type)
+    return buffer.tell()
+
+
+@lru_cache(maxsize=64)
+def header_size(mode: str, file_type: str, quality: Optional[int] = None) -> int:
+    """Fixed cost of a file (headers, tables), measured once on a tiny blank image of the same mode."""
+    return encoded_size(Image.new(mode, (8, 8)), file_type, quality)
+
+
+def _gif_size(frames: List[Image.Image]) -> int:
+    buffer = BytesIO()
+    durations = [frame.info.get("duration", 100) for frame in frames]
+    frames[0].save(buffer, format="gif", save_all=True, append_images=frames[1:], duration=durations, loop=0)
+    return buffer.tell()
+
+
+#endregion
+#region Estimate
+
+
+def exact_size(image: Image.Image, size: Tuple[int, int], file_type: str, quality: Optional[int] = None, resample: int = Image.LANCZOS) -> int:
+    """Resize and encode the whole image, the size the saved file will have."""
+    if file_type == "gif":
+        frames = [frame.convert("RGBA").resize(size, resample) for frame in ImageSequence.Iterator(image)]
+        return _gif_size(frames)
+    return encoded_size(tiling.resize(image, size, resample), file_type, quality)
+
+
+def estimate_size(image: Image.Image, size: Tuple[int, int], file_type: str, quality: Optional[int] = None, resample: int = Image.LANCZOS) -> int:
+    """
+    Estimate the saved size of image resized to size, in milliseconds for any size.
+
+    A few tiles of the output are resampled straight from the matching region of
+    the source (the full image is never resized) and encoded. Their bytes per
+    pixel, less the format's fixed header cost, are scaled up to the output's
+    pixel count. Small outputs are encoded in full. GIFs encode the first few
+    frames, downscaled if large, and scale up by frame count and pixels.
+    """
+    width, height = size
+    if width <= 0 or height <= 0:
+        return 0
+    if file_type == "gif":
+        return _estimate_gif_size(image, size, resample)
+    if width * height <= EXACT_PIXEL_LIMIT:
+        return exact_size(image, size, file_type, quality, resample)
+    tile_width, tile_height = min(SAMPLE_TILE, width), min(SAMPLE_TILE, height)
+    scale_x, scale_y = image.width / width, image.height / height
+    overhead = header_size(image.mode, file_type, quality)
+    payload_per_pixel = 0.0
+    for row in range(SAMPLE_GRID):
+        for column in range(SAMPLE_GRID):
+            # Tile centered in its cell of the output
+            left = int((column + 0.5) * width / SAMPLE_GRID - tile_width / 2)
+            top = int((row + 0.5) * height / SAMPLE_GRID - tile_height / 2)
+            box = (left * scale_x, top * scale_y, (left + tile_width) * scale_x, (top + tile_height) * scale_y)
+            tile = image.resize((tile_width, tile_height), resample, box=box)
+            payload = max(0, encoded_size(tile, file_type, quality) - overhead)
+            payload_per_pixel += payload / (tile_width * tile_height)
+    payload_per_pixel /= SAMPLE_GRID * SAMPLE_GRID
+    return int(overhead + payload_per_pixel * width * height)
+
+
+def _estimate_gif_size(image: Image.Image, size: Tuple[int, int], resample: int) -> int:
+    width, height = size
+    # Sample frames are scaled to at most EXACT_PIXEL_LIMIT pixels
+    scale = min(1.0, (EXACT_PIXEL_LIMIT / (width * height)) ** 0.5)
+    sample_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+    frames = []
+    for frame in ImageSequence.Iterator(image):
+        frames.append(frame.convert("RGBA").resize(sample_size, resample))
+        if len(frames) == GIF_SAMPLE_FRAMES:
+            break
+    frame_count = getattr(image, "n_frames", len(frames))
+    sample_pixels = sample_size[0] * sample_size[1]
+    return int(_gif_size(frames) * (frame_count / len(frames)) * (width * height / sample_pixels))
+
+
+#endregion
@@ -0,0 +1,129 @@
+"""
+Startup timing report.
+
+Enable with the IMGTXT_STARTUP_TIMING=1 environment variable, or the
+--startup-timing command line flag. Once the window is idle, the report is
+printed to stderr:
+
+    - Every module imported during startup, in the "-X importtime" format
+      (self / cumulative microseconds, nested imports indented).
+    - The time spent in each startup phase marked with mark().
+
+Set IMGTXT_STARTUP_TIMING=all to list imports faster than MIN_IMPORT_US too.
+"""
+
+
+#region Imports
+
+
+# Standard
+import os
+import sys
+import time
+import builtins
+
+# Typing
+from typing import List, Tuple
+
+
+#endregion
+#region Constants
+
+
+ENV_VAR = "IMGTXT_STARTUP_TIMING"
+CLI_FLAG = "--startup-timing"
+
+# Imports faster than this are left out of the report, unless IMGTXT_STARTUP_TIMING=all
+MIN_IMPORT_US = 1000
+
+
+#endregion
+#region State
+
+
+_start = time.perf_counter()
+_enabled = False
+_show_all = False
+_original_import = builtins.__import__
+_depth = 0
+_child_us: List[int] = [0]
+# (depth, module name, self us, cumulative us), in the order imports finished
+_imports: List[Tuple[int, str, int, int]] = []
+# (phase name, seconds since start)
+_marks: List[Tuple[str, float]] = []
+
+
+#endregion
+#region Import Hook
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    global _depth
+    module_name = name
+    if level and globals:
+        package = globals.get("__package__") or ""
+        base = package.rsplit(".", level - 1)[0] if level > 1 else package
+        module_name = f"{base}.{name}" if name else base
+    if module_name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    _depth += 1
+    _child_us.append(0)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        cumulative = int((time.perf_counter() - start) * 1_000_000)
+        children = _child_us.pop()
+        _depth -= 1
+        _child_us[-1] += cumulative
+        _imports.append((_depth, module_name, cumulative - children, cumulative))
+
+
+#endregion
+#region Public
+
+
+def is_requested() -> bool:
+    return bool(os.environ.get(ENV_VAR)) or CLI_FLAG in sys.argv
+
+
+def install() -> None:
+    """Start recording imports and phases, if requested. Call this before any other import."""
+    global _enabled, _show_all
+    if _enabled or not is_requested():
+        return
+    _enabled = True
+    _show_all = os.environ.get(ENV_VAR, "").lower() == "all"
+    if CLI_FLAG in sys.argv:
+        sys.argv.remove(CLI_FLAG)
+    builtins.__import__ = _timed_import
+
+
+def mark(phase: str) -> None:
+    """Record the end of a startup phase."""
+    if _enabled:
+        _marks.append((phase, time.perf_counter() - _start))
+
+
+def report() -> None:
+    """Stop recording and print the report to stderr."""
+    global _enabled
+    if not _enabled:
+        return
+    mark("first idle")
+    builtins.__import__ = _original_import
+    _enabled = False
+    out = sys.stderr
+    print("import time: self [us] | cumulative | imported package", file=out)
+    for depth, module_name, self_us, cumulative_us in _imports:
+        if _show_all or cumulative_us >= MIN_IMPORT_US:
+            print(f"import time: {self_us:>9} | {cumulative_us:>10} | {'  ' * depth}{module_name}", file=out)
+    print("\nstartup phase                       ms", file=out)
+    previous = 0.0
+    for phase, elapsed in _marks:
+        print(f"  {phase:<30} {(elapsed - previous) * 1000:>7.1f}", file=out)
+        previous = elapsed
+    print(f"  {'total':<30} {previous * 1000:>7.1f}", file=out)
+
+
+#endregion
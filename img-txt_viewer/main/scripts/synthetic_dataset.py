@@ -0,0 +1,258 @@
+#region Imports
+
+
+# Standard
+import os
+import json
+import random
+from itertools import accumulate
+from concurrent.futures import ThreadPoolExecutor
+
+# Third-Party
+from PIL import Image, ImageDraw
+
+# Typing
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+#endregion
+#region Constants
+
+
+# Written into the dataset folder, describes how it was generated
+MANIFEST_NAME = "_synthetic_dataset.json"
+
+# Bump when the output for the same options changes
+GENERATOR_VERSION = 1
+
+# Share of images per format
+FORMAT_WEIGHTS = {".jpg": 0.45, ".png": 0.3, ".webp": 0.15, ".gif": 0.05, ".bmp": 0.05}
+
+# Longer side of the images, picked at random
+IMAGE_SIZES = (512, 768, 1024, 1536, 2048)
+ASPECT_RATIOS = (1.0, 0.75, 1.333, 0.5625, 1.777)
+
+# GIFs are kept to a typical animation size
+GIF_MAX_SIZE = 512
+
+# Tag vocabulary, combined into "<modifier> <subject>" tags
+MODIFIERS = (
+    "long", "short", "blue", "red", "black", "white", "blonde", "green", "open", "closed",
+    "looking", "holding", "standing", "sitting", "smiling", "wet", "large", "small", "striped", "floral",
+)
+SUBJECTS = (
+    "hair", "eyes", "dress", "shirt", "skirt", "sky", "background", "mouth", "hat", "jacket",
+    "flower", "cloud", "tree", "water", "window", "sword", "cat", "dog", "gloves", "boots",
+)
+SINGLE_TAGS = (
+    "1girl", "1boy", "solo", "outdoors", "indoors", "day", "night", "smile", "blush", "simple background",
+    "full body", "upper body", "portrait", "from side", "from behind", "monochrome", "greyscale", "sketch", "highres", "absurdres",
+)
+
+
+#endregion
+#region Captions
+
+
+def tag_vocabulary(size: int) -> List[str]:
+    """size distinct tags, most common first. The common tags are the usual booru ones."""
+    tags = list(SINGLE_TAGS) + [f"{modifier} {subject}" for subject in SUBJECTS for modifier in MODIFIERS]
+    number = 0
+    while len(tags) < size:
+        # Rare tags, like character and artist names
+        tags.append(f"{SUBJECTS[number % len(SUBJECTS)]}_{number:05}")
+        number += 1
+    return tags[:size]
+
+
+def zipf_weights(count: int, exponent: float) -> List[float]:
+    """Cumulative weights where rank r is chosen in proportion to 1 / r**exponent."""
+    return list(accumulate(1.0 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def make_caption(rng: random.Random, vocabulary: List[str], cum_weights: List[float], mean_tags: int) -> str:
+    """A caption of distinct tags drawn from a Zipf distribution, about mean_tags long."""
+    count = max(1, min(len(vocabulary), int(rng.gauss(mean_tags, mean_tags / 3))))
+    tags = {}
+    # Common tags come up again and again, so draw in rounds until there are enough distinct ones
+    while len(tags) < count:
+        for tag in rng.choices(vocabulary, cum_weights=cum_weights, k=count - len(tags)):
+            tags[tag] = None
+    return ", ".join(tags)
+
+
+#endregion
+#region Media
+
+
+def image_size(rng: random.Random) -> Tuple[int, int]:
+    longer = rng.choice(IMAGE_SIZES)
+    ratio = rng.choice(ASPECT_RATIOS)
+    if ratio >= 1:
+        return longer, max(1, int(longer / ratio))
+    return max(1, int(longer * ratio)), longer
+
+
+def make_image(rng: random.Random, size: Tuple[int, int]) -> Image.Image:
+    """A gradient with a few shapes and some noise, so it compresses like a picture rather than a flat color."""
+    width, height = size
+    gradient = Image.linear_gradient("L").rotate(rng.uniform(0, 360)).resize(size)
+    low = tuple(rng.randrange(256) for _ in range(3))
+    high = tuple(rng.randrange(256) for _ in range(3))
+    image = Image.merge("RGB", [gradient.point(lambda v, a=a, b=b: a + (b - a) * v // 255) for a, b in zip(low, high)])
+    draw = ImageDraw.Draw(image)
+    for _ in range(rng.randint(3, 12)):
+        x0, y0 = rng.randrange(width), rng.randrange(height)
+        x1, y1 = x0 + rng.randrange(1, width // 2 + 2), y0 + rng.randrange(1, height // 2 + 2)
+        fill = tuple(rng.randrange(256) for _ in range(3))
+        if rng.random() < 0.5:
+            draw.ellipse((x0, y0, x1, y1), fill=fill)
+        else:
+            draw.rectangle((x0, y0, x1, y1), fill=fill)
+    noise = Image.frombytes("L", (max(1, width // 4), max(1, height // 4)), rng.randbytes(max(1, width // 4) * max(1, height // 4)))
+    return Image.blend(image, Image.merge("RGB", [noise.resize(size)] * 3), 0.08)
+
+
+def save_image(image: Image.Image, path: str, rng: random.Random) -> None:
+    ext = os.path.splitext(path)[1]
+    if ext == ".gif":
+        # A short animation, a few rotated copies of the image
+        image.thumbnail((GIF_MAX_SIZE, GIF_MAX_SIZE))
+        image = image.quantize(64)
+        frames = [image.rotate(angle) for angle in (0, 4, 8, 12)]
+        frames[0].save(path, save_all=True, append_images=frames[1:], duration=100, loop=0)
+    elif ext in (".jpg", ".webp"):
+        image.save(path, quality=rng.choice((80, 90, 95)))
+    else:
+        image.save(path)
+
+
+def write_video(path: str, rng: random.Random, size: Tuple[int, int] = (320, 240), frames: int = 48, fps: int = 24) -> None:
+    """A short MP4 of a moving shape. Needs PyAV, the same library the app reads videos with."""
+    import av
+    image = make_image(rng, size)
+    with av.open(path, mode="w") as container:
+        stream = container.add_stream("mpeg4", rate=fps)
+        stream.width, stream.height = size
+        stream.pix_fmt = "yuv420p"
+        for number in range(frames):
+            frame = av.VideoFrame.from_image(image.rotate(number * 360 / frames))
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+
+
+#endregion
+#region Dataset
+
+
+def generate_dataset(
+    folder: str,
+    images: int = 500,
+    videos: int = 0,
+    seed: int = 0,
+    vocabulary_size: int = 2000,
+    zipf_exponent: float = 1.1,
+    mean_tags: int = 25,
+    caption_ratio: float = 0.95,
+    duplicate_ratio: float = 0.02,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> Dict[str, Any]:
+    """
+    Write a reproducible image/text dataset to folder and return its manifest.
+
+    The same options and seed always give the same files. Images come in mixed
+    formats and sizes, captions are comma separated tags with a Zipf distribution
+    (a few tags in most captions, a long tail of rare ones), some images have no
+    text file and some are exact copies of others. Videos are skipped when PyAV
+    isn't installed, the manifest says how many were written.
+    """
+    options = {
+        "generator_version": GENERATOR_VERSION, "images": images, "videos": videos, "seed": seed,
+        "vocabulary_size": vocabulary_size, "zipf_exponent": zipf_exponent, "mean_tags": mean_tags,
+        "caption_ratio": caption_ratio, "duplicate_ratio": duplicate_ratio,
+    }
+    manifest = load_manifest(folder)
+    if manifest is not None and manifest.get("options") == options:
+        return manifest
+    if os.path.isdir(folder) and os.listdir(folder):
+        raise ValueError(f"{folder} is not empty and doesn't hold a dataset generated with these options")
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed)
+    vocabulary = tag_vocabulary(vocabulary_size)
+    cum_weights = zipf_weights(len(vocabulary), zipf_exponent)
+    formats, format_weights = list(FORMAT_WEIGHTS), list(FORMAT_WEIGHTS.values())
+    total = images + videos
+    # Plan every file first, each image then draws from its own generator so they can be written in parallel
+    originals, copies = [], []
+    for number in range(images):
+        if originals and rng.random() < duplicate_ratio:
+            source = rng.choice(originals)
+            copies.append((f"{number:06}{os.path.splitext(source)[1]}", source))
+        else:
+            originals.append(f"{number:06}{rng.choices(formats, format_weights)[0]}")
+
+    def write_original(name):
+        item_rng = _item_rng(seed, name)
+        save_image(make_image(item_rng, image_size(item_rng)), os.path.join(folder, name), item_rng)
+        _write_caption(folder, name, item_rng, vocabulary, cum_weights, mean_tags, caption_ratio)
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+        for _ in executor.map(write_original, originals):
+            done += 1
+            if progress_callback:
+                progress_callback(done, total)
+    for name, source in copies:
+        # An exact copy of an earlier image, for Find Duplicates
+        with open(os.path.join(folder, source), "rb") as src, open(os.path.join(folder, name), "wb") as dst:
+            dst.write(src.read())
+        _write_caption(folder, name, _item_rng(seed, name), vocabulary, cum_weights, mean_tags, caption_ratio)
+        done += 1
+        if progress_callback:
+            progress_callback(done, total)
+    written = originals + [name for name, _ in copies]
+    image_bytes = sum(os.path.getsize(os.path.join(folder, name)) for name in written)
+    videos_written = 0
+    video_error = None
+    for number in range(videos):
+        name = f"video_{number:04}.mp4"
+        try:
+            write_video(os.path.join(folder, name), _item_rng(seed, name))
+        except ImportError as e:
+            video_error = f"Videos were skipped: {e}"
+            break
+        videos_written += 1
+        _write_caption(folder, name, _item_rng(seed, name), vocabulary, cum_weights, mean_tags, caption_ratio)
+        if progress_callback:
+            progress_callback(images + number + 1, total)
+    manifest = {"options": options, "images": len(written), "videos": videos_written, "image_bytes": image_bytes, "vocabulary": vocabulary}
+    if video_error:
+        manifest["video_error"] = video_error
+    with open(os.path.join(folder, MANIFEST_NAME), "w", encoding="utf-8") as file:
+        json.dump(manifest, file)
+    return manifest
+
+
+def load_manifest(folder: str) -> Optional[Dict[str, Any]]:
+    """The manifest of a generated dataset, or None if folder doesn't hold one."""
+    try:
+        with open(os.path.join(folder, MANIFEST_NAME), "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _item_rng(seed: int, name: str) -> random.Random:
+    return random.Random(f"{seed}:{name}")
+
+
+def _write_caption(folder: str, name: str, rng: random.Random, vocabulary: List[str], cum_weights: List[float], mean_tags: int, caption_ratio: float) -> None:
+    if rng.random() >= caption_ratio:
+        return
+    with open(os.path.join(folder, os.path.splitext(name)[0] + ".txt"), "w", encoding="utf-8") as file:
+        file.write(make_caption(rng, vocabulary, cum_weights, mean_tags))
+
+
+#endregion
@@ -0,0 +1,115 @@
+#region Imports
+
+
+# Standard
+import os
+from collections import Counter
+
+# Typing
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+#endregion
+#region TagIndex
+
+
+def split_tags(text: str) -> List[str]:
+    """The comma separated tags in a caption, stripped, without empty ones."""
+    return [tag for tag in (part.strip() for part in text.split(',')) if tag]
+
+
+class TagIndex:
+    """
+    Tag -> count over every text file, kept up to date incrementally.
+
+    Each file's tags are cached with its modified time and size. refresh() stats
+    the files and only re-reads the ones that changed, subtracting their old tags
+    from the counts and adding the new ones, so keeping the All Tags list current
+    costs a stat per file rather than a read.
+    """
+    def __init__(self, get_files: Callable[[], List[str]]) -> None:
+        self.get_files = get_files
+        self.counts: Counter = Counter()
+        # path -> ((mtime_ns, size), tags)
+        self._files: Dict[str, Tuple[Tuple[int, int], List[str]]] = {}
+        self._sorted: Optional[List[Tuple[str, int]]] = None
+
+
+    def refresh(self) -> bool:
+        """Bring the counts up to date with the file list. Returns True if anything changed."""
+        files = self.get_files()
+        changed = False
+        for path in set(self._files).difference(files):
+            self._remove(path)
+            changed = True
+        for path in files:
+            changed |= self._update(path)
+        return changed
+
+
+    def update(self, path: str, text: Optional[str] = None) -> bool:
+        """Update one file, from text if it was just read or written. Returns True if its tags changed."""
+        return self._update(path, text)
+
+
+    def sorted_tags(self) -> List[Tuple[str, int]]:
+        """(tag, count) by count, then alphabetically, the same order as the Stats tab."""
+        if self._sorted is None:
+            self._sorted = sorted(self.counts.items(), key=lambda item: (-item[1], item[0].lower()))
+        return self._sorted
+
+
+    def clear(self) -> None:
+        self.counts.clear()
+        self._files.clear()
+        self._sorted = None
+
+
+#endregion
+#region Mechanics
+
+
+    def _update(self, path: str, text: Optional[str] = None) -> bool:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            if path in self._files:
+                self._remove(path)
+                return True
+            return False
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        entry = self._files.get(path)
+        if entry is not None and entry[0] == stamp:
+            return False
+        if text is None:
+            try:
+                with open(path, 'r', encoding="utf-8") as file:
+                    text = file.read()
+            except (OSError, UnicodeDecodeError):
+                text = ""
+        tags = split_tags(text)
+        if entry is not None:
+            if entry[1] == tags:
+                self._files[path] = (stamp, tags)
+                return False
+            self._subtract(entry[1])
+        self._files[path] = (stamp, tags)
+        self.counts.update(tags)
+        self._sorted = None
+        return True
+
+
+    def _remove(self, path: str) -> None:
+        _, tags = self._files.pop(path)
+        self._subtract(tags)
+        self._sorted = None
+
+
+    def _subtract(self, tags: List[str]) -> None:
+        self.counts.subtract(tags)
+        for tag in tags:
+            if self.counts[tag] <= 0:
+                del self.counts[tag]
+
+
+#endregion
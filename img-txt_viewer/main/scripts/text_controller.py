@@ -4,6 +4,8 @@
 # Standard
 import os
 import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor, wait
 
 # tkinter
 from tkinter import ttk, Tk, messagebox, Frame, scrolledtext, Label, font
@@ -14,6 +16,7 @@ from nenotk import ToolTip as Tip
 
 # Local
 import main.scripts.HelpText as HelpText
+from main.scripts import caption_index
 from main.scripts.text_controller_my_tags import MyTags
 from main.scripts.text_controller_auto_tag import AutoTag
 
@@ -33,6 +36,12 @@ class TextController:
         self.root = root
 
         self.filter_is_active = False
+        # Caption index of the current text folder, opened on first use of the Filter tab
+        self.caption_index = None
+        self.caption_index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="CaptionIndex")
+        self.caption_sync_future = None
+        self.caption_sync_progress = (0, 0)
+        self.filter_count_after_id = None
         self.auto_tag = AutoTag(self.app, self.root)
         self.my_tags = MyTags(self.app, self.root)
 
@@ -252,6 +261,11 @@ class TextController:
         self.filter_entry.pack(side='left', anchor="n", fill='both', expand=True)
         ntk.bind_helpers(self.filter_entry)
         self.filter_entry.bind('<Return>', lambda event: self.filter_text_image_pairs())
+        self.filter_count_lbl = Label(btn_frame, width=10, anchor="e", text="")
+        self.filter_count_lbl.pack(side='left', anchor="n")
+        Tip.create(widget=self.filter_count_lbl, text="Pairs matching the filter, updated as you type")
+        self.app.filter_string_var.trace_add("write", self.schedule_filter_count)
+        self.app.filter_use_regex_var.trace_add("write", self.schedule_filter_count)
         self.filter_btn = ttk.Button(btn_frame, text="Go!", width=5, command=self.filter_text_image_pairs)
         self.filter_btn.pack(side='left', anchor="n")
         Tip.create(widget=self.filter_btn, text="Text files will be filtered based on the entered text")
@@ -275,39 +289,19 @@ class TextController:
             self.app.image_index_entry.delete(0, "end")
             self.app.image_index_entry.insert(0, "1")
             return
+        matches = self.find_filter_matches(filter_string)
+        if matches is None:
+            return
+        names, missing_matches = matches
+        indexed = self.caption_index.names() if missing_matches else set()
         self.filtered_image_files = []
         self.filtered_text_files = []
-        for image_file in self.app.image_files:
-            text_file = os.path.splitext(image_file)[0] + ".txt"
-            filedata = ""
-            try:
-                with open(text_file, 'r', encoding="utf-8") as file:
-                    filedata = file.read()
-            except FileNotFoundError:
-                text_file = text_file
-            if self.app.filter_empty_files_var.get():
-                if not filedata.strip():
-                    self.filtered_image_files.append(image_file)
-                    self.filtered_text_files.append(text_file)
-            else:
-                if self.app.filter_use_regex_var.get():
-                    if re.search(filter_string, filedata):
-                        self.filtered_image_files.append(image_file)
-                        self.filtered_text_files.append(text_file)
-                else:
-                    filters = filter_string.split(' + ')
-                    match = True
-                    for filter in filters:
-                        if filter.startswith('!'):
-                            if filter[1:] in filedata:
-                                match = False
-                                break
-                        elif filter not in filedata:
-                            match = False
-                            break
-                    if match:
-                        self.filtered_image_files.append(image_file)
-                        self.filtered_text_files.append(text_file)
+        for image_file, text_file in zip(self.app.image_files, self.app.text_files):
+            name = os.path.basename(text_file)
+            # Pairs without a text file match like an empty caption
+            if name in names or (missing_matches and name not in indexed):
+                self.filtered_image_files.append(image_file)
+                self.filtered_text_files.append(text_file)
         if not self.filtered_image_files:
             messagebox.showinfo("Filter", f"0 images found matching the filter:\n\n{filter_string}")
             return
@@ -372,6 +366,130 @@ class TextController:
                     widget.config(state="normal")
 
 
+    def find_filter_matches(self, filter_string): # Filter
+        """(names of the matching text files, whether pairs without a text file match), or None on error."""
+        try:
+            index = self.sync_caption_index()
+            if self.app.filter_empty_files_var.get():
+                return index.empty(), True
+            if self.app.filter_use_regex_var.get():
+                return index.regex(filter_string), re.search(filter_string, "") is not None
+            return index.filter(filter_string), caption_index.matches_filter("", filter_string)
+        except re.error as e:
+            messagebox.showerror("Filter", f"Invalid regular expression:\n\n{e}")
+        except (sqlite3.Error, OSError) as e:
+            messagebox.showerror("Error: text_controller.find_filter_matches()", f"Failed to index the text files.\n\n{e}")
+        return None
+
+
+    def get_caption_index(self): # Filter
+        """The caption index of the current text folder, opened when the folder changes."""
+        folder = os.path.normpath(self.app.text_dir or self.app.image_dir.get())
+        if self.caption_index is not None and self.caption_index.folder == folder:
+            return self.caption_index
+        self.close_caption_index()
+        index_dir = os.path.join(self.app.get_direct_app_path(), caption_index.INDEX_DIR_NAME)
+        self.caption_index = caption_index.CaptionIndex(folder, caption_index.index_path(index_dir, folder))
+        return self.caption_index
+
+
+    def close_caption_index(self): # Filter
+        # A sync still running on the old index stops at its next batch
+        if self.caption_index is not None:
+            self.caption_index.close()
+            self.caption_index = None
+            self.caption_sync_future = None
+
+
+    def update_caption_index(self, text_file): # Filter
+        """Reindex a text file that was just saved, if it belongs to the open caption index."""
+        if self.caption_index is None or os.path.normpath(os.path.dirname(text_file)) != self.caption_index.folder:
+            return
+        try:
+            self.caption_index.update(text_file)
+        except sqlite3.Error:
+            return
+        if self.app.filter_string_var.get():
+            self.schedule_filter_count()
+
+
+    def start_caption_index_sync(self): # Filter
+        """Bring the caption index up to date in the background, unless a sync is already running."""
+        if self.caption_sync_future is not None and not self.caption_sync_future.done():
+            return self.caption_sync_future
+        index = self.get_caption_index()
+        text_files = list(self.app.original_text_files if self.filter_is_active else self.app.text_files)
+        self.caption_sync_progress = (0, len(text_files))
+
+        def on_progress(done, total):
+            self.caption_sync_progress = (done, total)
+
+        self.caption_sync_future = self.caption_index_executor.submit(index.sync, text_files, on_progress)
+        return self.caption_sync_future
+
+
+    def sync_caption_index(self): # Filter
+        """Sync the caption index and wait for it. Returns the index."""
+        # A sync that started earlier may have missed the latest edits, a fresh one only re-reads what changed
+        if self.caption_sync_future is not None:
+            self.wait_for_caption_sync(self.caption_sync_future)
+            self.caption_sync_future = None
+        future = self.start_caption_index_sync()
+        self.wait_for_caption_sync(future)
+        future.result()
+        return self.caption_index
+
+
+    def wait_for_caption_sync(self, future): # Filter
+        # Only show a progress bar if the sync takes a moment
+        if wait([future], timeout=caption_index.SYNC_WAIT_SECONDS).done:
+            return
+
+        def wait_task(progress_callback):
+            while not wait([future], timeout=0.1).done:
+                done, total = self.caption_sync_progress
+                progress_callback(done, "Indexing captions...", f"{done:,} of {total:,} text files")
+
+        ntk.showprogress("Filter", "Indexing captions...", wait_task, args=(), max_value=max(1, self.caption_sync_progress[1]))
+
+
+    def schedule_filter_count(self, *args): # Filter
+        if self.filter_count_after_id is not None:
+            self.root.after_cancel(self.filter_count_after_id)
+        self.filter_count_after_id = self.root.after(caption_index.COUNT_DELAY_MS, self.update_filter_count)
+
+
+    def update_filter_count(self): # Filter
+        """Show how many pairs the filter matches, from the caption index, syncing it first if it is new."""
+        self.filter_count_after_id = None
+        filter_string = self.app.filter_string_var.get()
+        if not filter_string or not self.app.image_files or self.app.image_dir.get() == self.app.dir_placeholder_text:
+            self.filter_count_lbl.config(text="")
+            return
+        try:
+            index = self.get_caption_index()
+            if self.caption_sync_future is None:
+                self.start_caption_index_sync()
+            if not self.caption_sync_future.done():
+                done, total = self.caption_sync_progress
+                self.filter_count_lbl.config(text=f"Indexing {done * 100 // max(1, total)}%")
+                self.filter_count_after_id = self.root.after(200, self.update_filter_count)
+                return
+            text_files = self.app.original_text_files if self.filter_is_active else self.app.text_files
+            missing = max(0, len(text_files) - len(index))
+            if self.app.filter_use_regex_var.get():
+                count = len(index.regex(filter_string)) + (missing if re.search(filter_string, "") else 0)
+            else:
+                count = index.count(filter_string) + (missing if caption_index.matches_filter("", filter_string) else 0)
+        except re.error:
+            self.filter_count_lbl.config(text="Bad regex")
+            return
+        except (sqlite3.Error, OSError):
+            self.filter_count_lbl.config(text="")
+            return
+        self.filter_count_lbl.config(text=f"{count:,} found")
+
+
 #endregion
 #region (6) Highlight
 
@@ -14,7 +14,6 @@ from nenotk import ToolTip as Tip
 
 # Local
 from main.scripts.OnnxTagger import OnnxTagger as OnnxTagger
-import main.scripts.video_thumbnail_generator as vtg
 import main.scripts.HelpText as HelpText
 
 # Typing
@@ -23,6 +22,33 @@ if TYPE_CHECKING:
     from app import ImgTxtViewer as Main
 
 
+#endregion
+#region Helpers
+
+
+def find_onnx_models(models_dir):
+    """Model folder name -> model.onnx path, for every folder under models_dir with a model.onnx and selected_tags.csv."""
+    model_dict = {}
+    for onnx_model_path, dirs, files in os.walk(models_dir):
+        if "model.onnx" in files and "selected_tags.csv" in files:
+            folder_name = os.path.basename(onnx_model_path)
+            model_file_path = os.path.join(onnx_model_path, "model.onnx")
+            model_dict[folder_name] = model_file_path
+    return model_dict
+
+
+def merge_tags(current_text, tags, mode):
+    """current_text with tags inserted by an Auto-Insert mode, "prefix", "append" or "replace". None for any other mode."""
+    tags_str = ', '.join(tags)
+    if mode == "prefix":
+        return tags_str + ', ' + current_text if current_text else tags_str
+    elif mode == "append":
+        return current_text + ', ' + tags_str if current_text else tags_str
+    elif mode == "replace":
+        return tags_str
+    return None
+
+
 #endregion
 #region AutoTag
 
@@ -375,28 +401,16 @@ class AutoTag:
         mode = self.auto_insert_mode_var.get()
         if mode == "disable":
             return
-        tags_str = ', '.join(tags)
         current_text = self.app.text_box.get("1.0", "end-1c")
-        if mode == "prefix":
-            new_text = tags_str + ', ' + current_text if current_text else tags_str
-        elif mode == "append":
-            new_text = current_text + ', ' + tags_str if current_text else tags_str
-        elif mode == "replace":
-            new_text = tags_str
-        else:
+        new_text = merge_tags(current_text, tags, mode)
+        if new_text is None:
             return
         self.app.text_box.delete("1.0", "end")
         self.app.text_box.insert("1.0", new_text)
 
 
     def get_onnx_model_list(self):
-        model_dict = {}
-        for onnx_model_path, dirs, files in os.walk(self.app.onnx_models_dir):
-            if "model.onnx" in files and "selected_tags.csv" in files:
-                folder_name = os.path.basename(onnx_model_path)
-                model_file_path = os.path.join(onnx_model_path, "model.onnx")
-                model_dict[folder_name] = model_file_path
-        self.onnx_model_dict = model_dict
+        self.onnx_model_dict = find_onnx_models(self.app.onnx_models_dir)
 
 
     def set_auto_tag_combo_box(self):
@@ -462,7 +476,7 @@ class AutoTag:
                 else:
                     self.update_tag_options()
                 if image_path.lower().endswith('.mp4'):
-                    video_frame = vtg.get_video_frame(image_path, timestamp_seconds=2.0)
+                    video_frame = self.app.media_probe.frame(image_path)
                     if video_frame:
                         tag_list, tag_dict = self.app.onnx_tagger.tag_image(video_frame, model_path=selected_model_path)
                     else:
@@ -496,7 +510,6 @@ class AutoTag:
         mode = self.auto_insert_mode_var.get()
         if mode == "disable":
             return
-        tags_str = ', '.join(tags)
         current_text = ''
         if os.path.exists(text_file_path):
             with open(text_file_path, 'r', encoding='utf-8') as f:
@@ -504,13 +517,8 @@ class AutoTag:
         else:
             with open(text_file_path, 'w', encoding='utf-8') as f:
                 f.write('')
-        if mode == "prefix":
-            new_text = tags_str + ', ' + current_text if current_text else tags_str
-        elif mode == "append":
-            new_text = current_text + ', ' + tags_str if current_text else tags_str
-        elif mode == "replace":
-            new_text = tags_str
-        else:
+        new_text = merge_tags(current_text, tags, mode)
+        if new_text is None:
             return
         new_text = new_text.strip(', ')
         with open(text_file_path, 'w', encoding='utf-8') as f:
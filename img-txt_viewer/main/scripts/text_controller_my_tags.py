@@ -3,6 +3,7 @@
 
 # Standard Library
 import os
+import copy
 
 # tkinter
 from tkinter import ttk, Tk, messagebox, TclError, BooleanVar, Frame, Menu, Listbox, colorchooser, PhotoImage
@@ -45,6 +46,10 @@ class MyTags:
         self.text_frame = None
         self.tag_entry = None
 
+        # Tags currently in the All Tags listbox, and my_tags.yaml as last parsed: ((mtime_ns, size), data)
+        self._alltags_shown = None
+        self._mytags_cache = None
+
         # DnD state
         self._drag_state = {
             'active': False,
@@ -668,14 +673,16 @@ class MyTags:
 
     def refresh_all_tags_listbox(self, tags=None):
         if tags is None:
-            self.app.stat_calculator.calculate_file_stats()
-            tags = self.app.stat_calculator.sorted_captions
+            # Only the text files that changed since the last refresh are read
+            self.app.tag_index.refresh()
+            tags = self.app.tag_index.sorted_tags()
+        names = [t for t in ((tag or '').strip() for tag, count in tags) if t]
+        if names == self._alltags_shown:
+            return
+        self._alltags_shown = names
         self.alltags_listbox.delete(0, 'end')
-        for tag, count in tags:
-            t = (tag or '').strip()
-            if not t:
-                continue
-            self.alltags_listbox.insert('end', t)
+        if names:
+            self.alltags_listbox.insert('end', *names)
 
 
     def insert_selected_tags(self, widget, position: str = 'start'):
@@ -1061,6 +1068,18 @@ class MyTags:
 
 
     def _read_mytags_data(self):
+        """my_tags.yaml as structured data, parsed again only when the file changes. Callers get their own copy."""
+        try:
+            stat = os.stat(self.app.my_tags_yml)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return self._load_mytags_data()
+        if self._mytags_cache is None or self._mytags_cache[0] != stamp:
+            self._mytags_cache = (stamp, self._load_mytags_data())
+        return copy.deepcopy(self._mytags_cache[1])
+
+
+    def _load_mytags_data(self):
         path = self.app.my_tags_yml
 
         def normalize_group_entry(entry):
@@ -1167,6 +1186,7 @@ class MyTags:
 
         with open(path, 'w', encoding='utf-8') as f:
             yaml.safe_dump({'items': items, 'groups': groups}, f, allow_unicode=True, sort_keys=False)
+        self._mytags_cache = None
 
 
     def _insert_folder(self, parent_iid, name):
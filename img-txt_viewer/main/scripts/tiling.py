@@ -0,0 +1,87 @@
+#region Imports
+
+
+# Standard
+import math
+
+# Third-Party
+from PIL import Image
+
+# Typing
+from typing import Iterator, Tuple
+
+
+#endregion
+#region Constants
+
+
+# Images with more pixels than this are processed in horizontal strips
+TILED_PIXEL_THRESHOLD = 24_000_000
+
+# Target pixel count for a single strip (before halo rows are added)
+STRIP_PIXELS = 2_000_000
+
+
+#endregion
+#region Strips
+
+
+def use_tiling(size: Tuple[int, int], threshold: int = TILED_PIXEL_THRESHOLD) -> bool:
+    """Return True if an image of this (width, height) should be processed in strips."""
+    width, height = size
+    return width * height > threshold
+
+
+def strip_height_for(width: int, strip_pixels: int = STRIP_PIXELS) -> int:
+    return max(1, strip_pixels // max(1, width))
+
+
+def iter_strips(height: int, strip_height: int, halo: int = 0) -> Iterator[Tuple[int, int, int, int]]:
+    """
+    Yield (top, bottom, read_top, read_bottom) row ranges covering height.
+
+    top/bottom is the region a strip is responsible for. read_top/read_bottom
+    extends it by halo rows on each side (clamped to the image) so that
+    neighbourhood filters see the same pixels they would on the full image.
+    """
+    for top in range(0, height, strip_height):
+        bottom = min(height, top + strip_height)
+        yield top, bottom, max(0, top - halo), min(height, bottom + halo)
+
+
+#endregion
+#region Resize
+
+
+def resize(image: Image.Image, size: Tuple[int, int], resample: int = Image.LANCZOS, threshold: int = TILED_PIXEL_THRESHOLD) -> Image.Image:
+    """
+    Drop-in replacement for Image.resize() that bounds memory on very large images.
+
+    Output rows are produced in strips with Image.resize(box=...). PIL reads the
+    filter support around the box from the source, so the result matches a
+    single resize within rounding (the filter weights are computed per strip,
+    rows next to a strip edge can differ by a few levels), while the
+    intermediate horizontal pass only ever holds one strip instead of
+    (new_width x old_height) pixels.
+    """
+    width, height = size
+    if not use_tiling(image.size, threshold) and not use_tiling(size, threshold):
+        return image.resize(size, resample)
+    image.load()
+    if image.mode in ("P", "1"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    result = Image.new(image.mode, size)
+    scale_y = image.height / height
+    for top, bottom, _, _ in iter_strips(height, strip_height_for(max(width, image.width))):
+        box = (0, top * scale_y, image.width, min(image.height, bottom * scale_y))
+        result.paste(image.resize((width, bottom - top), resample, box=box), (0, top))
+    result.info = dict(image.info)
+    return result
+
+
+def halo_for_radius(radius: float) -> int:
+    """Rows of overlap needed so a Gaussian blur of radius matches the full-image result."""
+    return int(math.ceil(radius * 3)) + 2
+
+
+#endregion
@@ -4,15 +4,18 @@
 # Standard
 import os
 import shutil
-import subprocess
+from tkinter import ttk, Toplevel, Frame, StringVar
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 # Third-Party
 import nenotk as ntk
-from PIL import Image, ImageSequence
+from PIL import Image, ImageSequence, ImageChops, ImageStat
 
 # Typing
-from typing import TYPE_CHECKING, Optional, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
 if TYPE_CHECKING:
+	from tkinter import Misc
 	from app import ImgTxtViewer as Main
 
 
@@ -20,13 +23,19 @@ if TYPE_CHECKING:
 #region Main Controller
 
 
-def extract(app: "Main", input_path: Optional[str] = None) -> Optional[str]:
+def extract(app: "Main", input_path: Optional[str] = None, frame_step: int = 1, start_time: Optional[float] = None, end_time: Optional[float] = None, scene_threshold: Optional[float] = None, ask_options: bool = False) -> Optional[str]:
 	"""Extract frames from a GIF or MP4 into PNG files.
+	The sampling options apply to MP4 files, see extract_video_frames(). With ask_options, they are asked for instead.
 	Returns the output directory path on success, otherwise None.
 	"""
 	input_path = _resolve_input_path(app, input_path)
 	if input_path is None:
 		return None
+	if ask_options and input_path.lower().endswith('.mp4'):
+		options = ask_sampling_options(app.root)
+		if options is None:
+			return None
+		frame_step, start_time, end_time, scene_threshold = options["frame_step"], options["start_time"], options["end_time"], options["scene_threshold"]
 	out_dir = get_out_dir(input_path)
 	confirmed, chosen_dir = ntk.confirmpath("Confirm Extraction Folder", f"Extract frames from:\n\n{input_path}\n\nInto the folder below:", path=out_dir)
 	if not confirmed or not chosen_dir:
@@ -42,17 +51,90 @@ def extract(app: "Main", input_path: Optional[str] = None) -> Optional[str]:
 				_show_done_and_open_folder(frame_count, out_dir)
 				return out_dir
 		elif ext == '.mp4':
-			success, frame_count = _extract_mp4_frames_with_progress(app, input_path, out_dir)
+			success, frame_count = _extract_mp4_frames_with_progress(app, input_path, out_dir, frame_step, start_time, end_time, scene_threshold)
 			if success:
 				_show_done_and_open_folder(frame_count, out_dir)
 				return out_dir
-	except subprocess.CalledProcessError as e:
-		ntk.showinfo("FFmpeg Error", f"FFmpeg failed to extract frames:\n\n{e}")
 	except Exception as e:
 		ntk.showinfo("Error", f"An error occurred while extracting frames:\n\n{e}")
 	return None
 
 
+#endregion
+#region Sampling Options
+
+
+# (key, label, default) of the fields in the sampling options dialog
+SAMPLING_FIELDS = (
+	("frame_step", "Keep every Nth frame:", "1"),
+	("start_time", "Start time (seconds):", ""),
+	("end_time", "End time (seconds):", ""),
+	("scene_threshold", "Scene change (0-1):", ""),
+)
+
+
+def parse_sampling_options(values: Dict[str, str]) -> dict:
+	"""Turn the dialog's text into extract() arguments, blank fields are None. Raises ValueError with a message for the user."""
+	def number(key, name):
+		text = values.get(key, "").strip()
+		if not text:
+			return None
+		try:
+			return float(text)
+		except ValueError:
+			raise ValueError(f"{name} must be a number.") from None
+
+	frame_step = number("frame_step", "Frame step")
+	if frame_step is not None and (frame_step < 1 or frame_step != int(frame_step)):
+		raise ValueError("Frame step must be a whole number of 1 or more.")
+	start_time = number("start_time", "Start time")
+	end_time = number("end_time", "End time")
+	scene_threshold = number("scene_threshold", "Scene change")
+	if (start_time is not None and start_time < 0) or (end_time is not None and end_time < 0):
+		raise ValueError("Times can't be negative.")
+	if start_time is not None and end_time is not None and end_time <= start_time:
+		raise ValueError("End time must be after the start time.")
+	if scene_threshold is not None and not 0 < scene_threshold <= 1:
+		raise ValueError("Scene change must be above 0 and at most 1.")
+	return {"frame_step": int(frame_step or 1), "start_time": start_time, "end_time": end_time, "scene_threshold": scene_threshold}
+
+
+def ask_sampling_options(parent: "Misc") -> Optional[dict]:
+	"""Ask which frames of a video to extract. Returns extract() arguments, or None if cancelled."""
+	dialog = Toplevel(parent)
+	dialog.title("Extract Video Frames")
+	dialog.resizable(False, False)
+	dialog.transient(parent)
+	variables = {}
+	for row, (key, label, default) in enumerate(SAMPLING_FIELDS):
+		ttk.Label(dialog, text=label).grid(row=row, column=0, sticky="w", padx=(10, 5), pady=2)
+		variables[key] = StringVar(value=default)
+		entry = ttk.Entry(dialog, textvariable=variables[key], width=10)
+		entry.grid(row=row, column=1, sticky="ew", padx=(0, 10), pady=2)
+		if row == 0:
+			entry.focus_set()
+	ttk.Label(dialog, text="Leave the times blank for the whole video, and the scene\nchange blank to keep every sampled frame.").grid(row=len(SAMPLING_FIELDS), column=0, columnspan=2, sticky="w", padx=10, pady=(5, 0))
+	result = {}
+
+	def on_ok(event=None):
+		try:
+			result.update(parse_sampling_options({key: variable.get() for key, variable in variables.items()}))
+		except ValueError as e:
+			ntk.showinfo("Invalid Input", str(e))
+			return
+		dialog.destroy()
+
+	button_frame = Frame(dialog)
+	button_frame.grid(row=len(SAMPLING_FIELDS) + 1, column=0, columnspan=2, pady=10)
+	ttk.Button(button_frame, text="Extract", command=on_ok).pack(side="left", padx=5)
+	ttk.Button(button_frame, text="Cancel", command=dialog.destroy).pack(side="left", padx=5)
+	dialog.bind("<Return>", on_ok)
+	dialog.bind("<Escape>", lambda event: dialog.destroy())
+	dialog.grab_set()
+	dialog.wait_window()
+	return result or None
+
+
 #endregion
 #region Validation & Output Helpers
 
@@ -161,78 +243,117 @@ def _extract_gif_frames_with_progress(input_path: str, out_dir: str) -> Tuple[bo
 	return (frame_count is not None), frame_count or 0
 
 
-def _extract_mp4_frames_with_progress(app: "Main", input_path: str, out_dir: str) -> Tuple[bool, int]:
-	"""Extract frames from an MP4 using ffmpeg with progress dialog."""
+def _extract_mp4_frames_with_progress(app: "Main", input_path: str, out_dir: str, frame_step: int = 1, start_time: Optional[float] = None, end_time: Optional[float] = None, scene_threshold: Optional[float] = None) -> Tuple[bool, int]:
+	"""Extract frames from an MP4 using PyAV with progress dialog."""
 	if not app.is_ffmpeg_installed:
 		ntk.showinfo("FFmpeg Not Found", "FFmpeg is required to extract frames from videos.\n\nPlease install FFmpeg and ensure it is in your PATH.")
 		return False, 0
 
 	def mp4_task(progress_callback):
-		cmd = [
-			"ffmpeg",
-			"-hide_banner",
-			"-loglevel", "error",
-			"-i", input_path,
-			os.path.join(out_dir, "frame_%05d.png")
-		]
-		# Use helper to estimate frame count
-		total_frames = _estimate_frames_with_ffprobe(input_path)
-		proc = subprocess.Popen(cmd)
-		import time
-		frame_count = 0
-		while proc.poll() is None:
-			# Use helper to count extracted image files
-			frame_count = _count_image_files(out_dir)
-			progress_callback(frame_count, f"Extracting frame {frame_count}", f"{frame_count} extracted")
-			time.sleep(0.2)
-		# Final count
-		frame_count = _count_image_files(out_dir)
-		progress_callback(frame_count, f"Extracting frame {frame_count}", f"{frame_count} extracted")
-		return frame_count
+		def on_progress(decoded, written):
+			progress_callback(decoded, f"Extracting frame {decoded}", f"{written} extracted")
+		return extract_video_frames(input_path, out_dir, frame_step=frame_step, start_time=start_time, end_time=end_time, scene_threshold=scene_threshold, progress_callback=on_progress)
 
-	try:
-		total_frames = _estimate_frames_with_ffprobe(input_path)
-	except Exception:
-		total_frames = None
+	# Frame count from the container metadata, decoding the whole stream just to count frames is too slow
+	video_data = app.media_probe.probe(input_path)
+	total_frames = _frames_in_range(video_data, start_time, end_time)
 	frame_count = ntk.showprogress("Extracting MP4 Frames", "Extracting frames from MP4...", mp4_task, args=(), max_value=total_frames if total_frames else 1000)
 	return (frame_count is not None), frame_count or 0
 
 
-def _count_image_files(out_dir: str, exts: Tuple[str, ...] = ('.png', '.jpg', '.jpeg')) -> int:
-	"""Return the number of image files in out_dir matching the given extensions."""
-	try:
-		return sum(1 for f in os.listdir(out_dir) if f.lower().endswith(exts))
-	except Exception:
-		return 0
+def _frames_in_range(video_data: Optional[dict], start_time: Optional[float], end_time: Optional[float]) -> Optional[int]:
+	"""Estimate how many frames will be decoded for the given time range, from probed metadata."""
+	if not video_data or not video_data.get('frame_count'):
+		return None
+	total_frames = video_data['frame_count']
+	duration, framerate = video_data.get('duration'), video_data.get('framerate')
+	if (start_time is None and end_time is None) or not duration or not framerate:
+		return total_frames
+	start = max(0.0, start_time or 0.0)
+	end = min(duration, end_time) if end_time is not None else duration
+	return max(1, min(total_frames, round((end - start) * framerate)))
 
 
-def _estimate_frames_with_ffprobe(input_path: str) -> Optional[int]:
-	"""Use ffprobe to estimate the total frame count for a video. Returns None on failure."""
-	try:
-		import json
-		probe_cmd = [
-			"ffprobe",
-			"-v", "error",
-			"-select_streams", "v:0",
-			"-count_frames",
-			"-show_entries", "stream=nb_read_frames",
-			"-of", "json",
-			input_path
-		]
-		proc = subprocess.run(probe_cmd, capture_output=True, text=True)
-		info = json.loads(proc.stdout or "{}")
-		streams = info.get("streams")
-		if not streams:
-			return None
-		val = streams[0].get("nb_read_frames")
-		if val is None:
-			return None
-		try:
-			return int(val)
-		except (ValueError, TypeError):
-			return None
-	except Exception:
-		return None
+#endregion
+#region Video Decoding
+
+
+# Frames encoded to PNG at the same time, the decoder waits when the writers fall this far behind
+WRITER_QUEUE_PER_WORKER = 4
+
+# Scene-change detection compares small grayscale copies of each frame
+SCENE_SAMPLE_SIZE = (64, 36)
+
+
+def extract_video_frames(
+	input_path: str,
+	out_dir: str,
+	frame_step: int = 1,
+	start_time: Optional[float] = None,
+	end_time: Optional[float] = None,
+	scene_threshold: Optional[float] = None,
+	progress_callback: Optional[Callable[[int, int], None]] = None,
+	max_workers: Optional[int] = None
+) -> int:
+	"""
+	Decode a video once with PyAV and write the sampled frames as numbered PNGs.
+
+	Args:
+		input_path: Video file to read.
+		out_dir: Existing folder to write frame_00001.png, frame_00002.png, ... into.
+		frame_step: Keep every Nth decoded frame.
+		start_time: Skip frames before this many seconds.
+		end_time: Stop after this many seconds.
+		scene_threshold: If set (0-1), only keep frames that differ from the last kept frame
+			by at least this mean pixel difference. Applied after frame_step.
+		progress_callback: Called with (frames decoded, frames written) while decoding.
+		max_workers: PNG writer threads. Encoding is the slow part, so it runs in parallel with decoding.
+
+	Returns:
+		The number of frames written.
+	"""
+	# PyAV is slow to import, so it is only loaded when a video is extracted
+	import av
+	frame_step = max(1, int(frame_step))
+	max_workers = max_workers or min(8, os.cpu_count() or 1)
+	decoded = written = 0
+	previous_sample = None
+	in_flight = deque()
+	with av.open(input_path) as container, ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="FrameWriter") as writer:
+		stream = container.streams.video[0]
+		stream.thread_type = "AUTO"
+		if start_time:
+			# Seeks land on the keyframe before start_time, earlier frames are skipped below
+			container.seek(int(start_time * 1000000))
+		for frame in container.decode(stream):
+			timestamp = frame.time
+			if timestamp is not None:
+				if start_time and timestamp < start_time:
+					continue
+				if end_time is not None and timestamp > end_time:
+					break
+			decoded += 1
+			if (decoded - 1) % frame_step == 0:
+				image = frame.to_image()
+				keep = True
+				if scene_threshold is not None:
+					sample = image.convert("L").resize(SCENE_SAMPLE_SIZE, Image.BILINEAR)
+					if previous_sample is not None:
+						difference = ImageStat.Stat(ImageChops.difference(sample, previous_sample)).mean[0] / 255
+						keep = difference >= scene_threshold
+					if keep:
+						previous_sample = sample
+				if keep:
+					written += 1
+					in_flight.append(writer.submit(image.save, os.path.join(out_dir, f"frame_{written:05d}.png")))
+					while len(in_flight) > max_workers * WRITER_QUEUE_PER_WORKER:
+						in_flight.popleft().result()
+			if progress_callback:
+				progress_callback(decoded, written)
+		# Raise any write error
+		for future in in_flight:
+			future.result()
+	return written
 
 
 #endregion
@@ -5,18 +5,19 @@
 import os
 
 # Third Party
-import av
 from PIL import Image
 
 # Typing
-from typing import List, Dict, Optional, Tuple, Any
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple, Any
+if TYPE_CHECKING:
+    import av
 
 
 #endregion
 #region Video Thumbnail Generator
 
 
-def _get_video_stream(container: av.container.InputContainer) -> Optional[av.video.stream.VideoStream]:
+def _get_video_stream(container: 'av.container.InputContainer') -> Optional['av.video.stream.VideoStream']:
     """
     Helper function to get the video stream from a container.
 
@@ -33,8 +34,8 @@ def _get_video_stream(container: av.container.InputContainer) -> Optional[av.vid
 
 
 def _extract_frame(
-    container: av.container.InputContainer,
-    stream: av.video.stream.VideoStream,
+    container: 'av.container.InputContainer',
+    stream: 'av.video.stream.VideoStream',
     timestamp_seconds: float,
     thumbnail_size: Optional[Tuple[int, int]] = None
 ) -> Optional[Image.Image]:
@@ -79,6 +80,8 @@ def _open_video_and_get_stream(file_path: str):
     """
     if not os.path.isfile(file_path):
         return None, None
+    # PyAV is slow to import, so it is only loaded once a video is opened
+    import av
     try:
         container = av.open(file_path)
         stream = _get_video_stream(container)
@@ -91,6 +94,60 @@ def _open_video_and_get_stream(file_path: str):
         return None, None
 
 
+def _stream_duration(container: 'av.container.InputContainer', stream: 'av.video.stream.VideoStream') -> Optional[float]:
+    """Duration in seconds from the stream or container header, or None if neither has one."""
+    if stream.duration and stream.time_base:
+        return float(stream.duration * stream.time_base)
+    if container.duration:
+        # Container durations are in AV_TIME_BASE units (microseconds)
+        return container.duration / 1000000
+    return None
+
+
+def probe_video(
+    file_path: str,
+    timestamp_seconds: float = 2.0,
+    thumbnail_size: Optional[Tuple[int, int]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Read a video's metadata and one frame, opening the file once.
+
+    The frame count comes from the container header. If the header doesn't
+    store it, it is estimated from the duration and framerate, so the stream
+    is never decoded just to count frames.
+
+    Args:
+        file_path: Path to the video file
+        timestamp_seconds: Time position in seconds to extract the frame from
+        thumbnail_size: Optional tuple (width, height) to resize the frame
+
+    Returns:
+        Dictionary containing 'thumbnail' (PIL Image or None), 'resolution',
+        'framerate', 'duration' and 'frame_count', or None if the file can't be opened
+    """
+    container, stream = _open_video_and_get_stream(file_path)
+    if not container or not stream:
+        return None
+    try:
+        framerate = float(stream.average_rate) if stream.average_rate else None
+        duration = _stream_duration(container, stream)
+        frame_count = stream.frames or None
+        if frame_count is None and duration and framerate:
+            frame_count = round(duration * framerate)
+        return {
+            'thumbnail': _extract_frame(container, stream, timestamp_seconds, thumbnail_size),
+            'resolution': (stream.width, stream.height),
+            'framerate': framerate,
+            'duration': duration,
+            'frame_count': frame_count
+        }
+    except Exception as e:
+        print(f"Error processing {file_path}: {str(e)}")
+        return None
+    finally:
+        container.close()
+
+
 def generate_video_thumbnails(
     file_paths: List[str],
     timestamp_seconds: float = 2.0,
@@ -109,31 +166,17 @@ def generate_video_thumbnails(
             - 'thumbnail': PIL Image object
             - 'resolution': Tuple (width, height) of original video
             - 'framerate': Float value of video framerate
+            - 'duration': Float value of video duration in seconds, or None
+            - 'frame_count': Number of frames from the container metadata, or None
     """
     video_thumb_dict = {}
     for file_path in file_paths:
         # Skip if not an MP4 file
         if not file_path.lower().endswith('.mp4'):
             continue
-        container, stream = _open_video_and_get_stream(file_path)
-        if not container or not stream:
-            continue
-        try:
-            # Extract resolution and framerate
-            resolution = (stream.width, stream.height)
-            framerate = float(stream.average_rate) if stream.average_rate else None
-            # Extract frame
-            img = _extract_frame(container, stream, timestamp_seconds, thumbnail_size)
-            if img:
-                video_thumb_dict[file_path] = {
-                    'thumbnail': img,
-                    'resolution': resolution,
-                    'framerate': framerate
-                }
-        except Exception as e:
-            print(f"Error processing {file_path}: {str(e)}")
-        finally:
-            container.close()
+        video_data = probe_video(file_path, timestamp_seconds, thumbnail_size)
+        if video_data and video_data['thumbnail']:
+            video_thumb_dict[file_path] = video_data
     return video_thumb_dict
 
 
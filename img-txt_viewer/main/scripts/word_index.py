@@ -0,0 +1,101 @@
+#region Imports
+
+
+# Standard
+import re
+from bisect import bisect_right
+
+# Typing
+from typing import Dict, List, Tuple, Set, Optional, Iterable
+
+
+#endregion
+#region WordIndex
+
+
+# Words are separated by whitespace and commas, matching how captions are tagged
+TOKEN_PATTERN = re.compile(r"[^\s,]+")
+
+
+class WordIndex:
+    """
+    Word -> offsets map for the text box, rebuilt in a single tokenizer pass per text change.
+
+    Character offsets are converted to Tk "line.char" indices with a line-start
+    table, so no widget round trips are needed to place highlight tags.
+    """
+    def __init__(self) -> None:
+        self.text: Optional[str] = None
+        self.line_starts: List[int] = [0]
+        self.offsets: Dict[str, List[int]] = {}
+
+
+    def update(self, text: str) -> Optional[Set[str]]:
+        """
+        Re-index text. Returns the set of words whose occurrences may have changed,
+        an empty set if text is unchanged, or None if there was no previous text.
+        """
+        previous = self.text
+        if text == previous:
+            return set()
+        self.text = text
+        self.line_starts = [0] + [match.end() for match in re.finditer("\n", text)]
+        offsets: Dict[str, List[int]] = {}
+        for match in TOKEN_PATTERN.finditer(text):
+            offsets.setdefault(match.group(), []).append(match.start())
+        self.offsets = offsets
+        if previous is None:
+            return None
+        # Only words overlapping the edited region can have gained or lost an occurrence
+        prefix = 0
+        limit = min(len(previous), len(text))
+        while prefix < limit and previous[prefix] == text[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and previous[-1 - suffix] == text[-1 - suffix]:
+            suffix += 1
+        affected = set(self._words_in_span(previous, prefix, len(previous) - suffix))
+        affected.update(self._words_in_span(text, prefix, len(text) - suffix))
+        return affected
+
+
+    def duplicates(self, min_length: int = 3) -> Dict[str, List[int]]:
+        return {word: starts for word, starts in self.offsets.items() if len(starts) > 1 and len(word) >= min_length}
+
+
+    def find(self, pattern: str, regex: bool = False) -> List[Tuple[int, int]]:
+        """Return (start, end) offsets of every match of pattern in the indexed text."""
+        if not regex:
+            pattern = re.escape(pattern)
+        return [match.span() for match in re.finditer(pattern, self.text or "") if match.end() > match.start()]
+
+
+    def word_spans(self, word: str) -> List[Tuple[int, int]]:
+        return [(start, start + len(word)) for start in self.offsets.get(word, [])]
+
+
+    def to_tk_index(self, offset: int) -> str:
+        line = bisect_right(self.line_starts, offset)
+        return f"{line}.{offset - self.line_starts[line - 1]}"
+
+
+    def to_tk_ranges(self, spans: Iterable[Tuple[int, int]]) -> List[str]:
+        """Flatten (start, end) offsets into [start1, end1, start2, end2, ...] Tk indices for a single tag_add call."""
+        ranges = []
+        for start, end in spans:
+            ranges.append(self.to_tk_index(start))
+            ranges.append(self.to_tk_index(end))
+        return ranges
+
+
+    @staticmethod
+    def _words_in_span(text: str, start: int, end: int) -> List[str]:
+        """Tokens of text that overlap or touch [start, end)."""
+        while start > 0 and TOKEN_PATTERN.match(text, start - 1):
+            start -= 1
+        while end < len(text) and TOKEN_PATTERN.match(text, end):
+            end += 1
+        return TOKEN_PATTERN.findall(text, start, end)
+
+
+#endregion
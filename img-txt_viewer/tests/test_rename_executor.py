@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main.scripts import rename_executor
+
+
+class PlanRenamesTest(unittest.TestCase):
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.dir = self._temp.name
+        for name in ("00001.png", "00002.png", "00003.png", "zz.png"):
+            self.write(name, name)
+
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+
+    def write(self, name, text):
+        with open(self.path(name), "w", encoding="utf-8") as file:
+            file.write(text)
+
+
+    def read(self, name):
+        with open(self.path(name), "r", encoding="utf-8") as file:
+            return file.read()
+
+
+    def test_rename_onto_a_skipped_source_is_skipped(self):
+        renames = [(self.path("00003.png"), self.path("00002.png")), (self.path("zz.png"), self.path("00003.png"))]
+        plan = rename_executor.plan_renames(self.dir, renames)
+        self.assertEqual(plan.entries, [])
+        self.assertEqual(len(plan.skipped), 2)
+        rename_executor.execute_plan(plan)
+        for name in ("00001.png", "00002.png", "00003.png", "zz.png"):
+            self.assertEqual(self.read(name), name)
+
+
+    def test_shifted_numbering(self):
+        renames = [(self.path("00002.png"), self.path("00001.png")), (self.path("00001.png"), self.path("00002.png"))]
+        rename_executor.execute_plan(rename_executor.plan_renames(self.dir, renames))
+        self.assertEqual(self.read("00001.png"), "00002.png")
+        self.assertEqual(self.read("00002.png"), "00001.png")
+
+
+    def test_existing_destination_is_not_overwritten(self):
+        plan = rename_executor.plan_renames(self.dir, [(self.path("zz.png"), self.path("new.png"))])
+        # Appears after the plan was made
+        self.write("new.png", "new")
+        with self.assertRaises(FileExistsError):
+            rename_executor.execute_plan(plan)
+        self.assertEqual(self.read("new.png"), "new")
+        self.assertEqual(self.read("zz.png"), "zz.png")
+        self.assertFalse(os.path.exists(self.path(rename_executor.JOURNAL_NAME)))
+
+
+if __name__ == "__main__":
+    unittest.main()